@@ -1,6 +1,14 @@
+import json
+import re
 import time
+from collections import OrderedDict
+from urllib.parse import urlparse
 
+from jose import jwt
 from js9 import j
+from requests import Response
+from requests.adapters import HTTPAdapter
+from requests.auth import AuthBase
 
 from .client import Client
 
@@ -11,9 +19,14 @@ _template = """
 url = "http://localhost:6600"
 jwt_ = ""
 secrets_ = []
+owner_secret_ = ""
 """
 
 
+# number of seconds the robot holds a request waiting for a blueprint job to finish
+_BLUEPRINT_JOB_WAIT = 30
+
+
 class ZeroRobotClient(JSConfigClientBase):
 
     def __init__(self, instance="main", data={}, parent=None, template=None, ui=None, interactive=True):
@@ -26,6 +39,8 @@ class ZeroRobotClient(JSConfigClientBase):
         super().__init__(instance=instance, data=data, parent=parent, template=_template, ui=ui, interactive=interactive)
         self._api = None
         self._jwt_expire_timestamp = None
+        # index of the secrets, see _secrets_index
+        self._secrets = None
 
     @property
     def api(self):
@@ -53,7 +68,281 @@ class ZeroRobotClient(JSConfigClientBase):
                 header = 'Bearer %s' % self.config.data['jwt_']
                 self._api.security_schemes.passthrough_client_user.set_zrobotuser_header(header)
                 self._api.security_schemes.passthrough_client_admin.set_zrobotadmin_header(header)
-            if self.config.data.get('secrets_'):
-                header = 'Bearer %s' % ' '.join(self.config.data['secrets_'])
-                self._api.security_schemes.passthrough_client_service.set_zrobotsecret_header(header)
+            session = self._api.services.client.session
+            # the secrets are selected for each request, see _SecretAuth
+            session.auth = _SecretAuth(self, self.config.data["url"])
+            # revalidate the cached responses instead of downloading them again, see _ConditionalAdapter
+            adapter = _ConditionalAdapter()
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
         return self._api
+
+    def add_secret(self, secret, owner_secret=None):
+        """
+        save the secret of a service, and optionally the secret of its owner, in the configuration
+        """
+        changed = False
+        if secret and secret not in self.config.data['secrets_']:
+            self.config.data['secrets_'].append(secret)
+            changed = True
+        if owner_secret and owner_secret != self.config.data.get('owner_secret_'):
+            self.config.data_set('owner_secret_', owner_secret)
+            changed = True
+        if changed:
+            self.config.save()
+            self._secrets = None
+
+    def remove_secret(self, service_guid):
+        """
+        remove the secret of a service from the configuration
+        """
+        secret = self._secrets_index().by_guid.get(service_guid)
+        if secret is None:
+            return
+        self.config.data['secrets_'].remove(secret)
+        self.config.save()
+        self._secrets = None
+
+    def _secrets_index(self):
+        """
+        return a _SecretsIndex of the secrets present in the configuration
+        the index is only rebuilt when the secrets change
+        """
+        secrets = self.config.data.get('secrets_') or []
+        owner_secret = self.config.data.get('owner_secret_') or ''
+        if self._secrets is None or not self._secrets.is_valid(secrets, owner_secret):
+            self._secrets = _SecretsIndex(secrets, owner_secret)
+        return self._secrets
+
+    def diff_blueprint(self, content):
+        """
+        compute the changes a blueprint would make, without executing it
+
+        @param content: content of the blueprint
+        @return: BlueprintDiff describing the services to create or update and the services targeted by the actions
+        """
+        diff, _ = self.api.blueprints.DiffBlueprint({'content': content})
+        return diff
+
+    def execute_blueprint_async(self, content):
+        """
+        execute a blueprint in the background
+
+        if the client has no owner secret yet, the robot creates one for the job,
+        it is saved in the configuration so the secrets of the services created can be retrieved
+
+        @param content: content of the blueprint
+        @return: the id of the job, use wait_blueprint_job to wait for its result
+        """
+        job, _ = self.api.blueprints.CreateBlueprintJob({'content': content})
+        if job.owner_secret:
+            self.add_secret(None, job.owner_secret)
+        return job.id
+
+    def wait_blueprint_job(self, job_id, timeout=None):
+        """
+        wait for a blueprint job to be finished
+
+        the robot is asked to hold the requests until the job is done, so only a few requests are needed.
+        once the job succeeded, the secrets of the services created are saved in the configuration
+
+        @param job_id: id of the job returned by execute_blueprint_async
+        @param timeout: if the job didn't finished within timeout seconds, raises TimeoutError
+        @return: the finished BlueprintJob, check its state to know if it succeeded
+        """
+        deadline = time.time() + float(timeout) if timeout else None
+        while True:
+            wait = _BLUEPRINT_JOB_WAIT
+            if deadline is not None:
+                wait = min(wait, deadline - time.time())
+                if wait <= 0:
+                    raise TimeoutError()
+            job, _ = self.api.blueprints.GetBlueprintJob(job_id, query_params={'wait': wait})
+            if job.state.value in ('ok', 'error'):
+                break
+
+        if job.result:
+            for service in job.result.services:
+                self.add_secret(service.secret, service.owner_secret)
+        return job
+
+    def subscribe(self, service_guids=None, templates=None):
+        """
+        subscribe to the events of the robot
+
+        this is a generator that yields the events as dict as soon as they happen on the robot.
+        the connection is closed when the generator is closed
+
+        @param service_guids: if set, only receive the events of these services
+        @param templates: if set, only receive the events of the services using these templates.
+                          can be a full template uid or a template name
+        """
+        params = {}
+        if service_guids:
+            params['service_guid'] = ','.join(service_guids)
+        if templates:
+            params['template'] = ','.join(templates)
+
+        http = self.api.services.client
+        resp = http.session.get(http.base_url + '/events', params=params, stream=True)
+        try:
+            resp.raise_for_status()
+            data = []
+            for line in resp.iter_lines(chunk_size=None, decode_unicode=True):
+                if line is None:
+                    continue
+                if line.startswith('data:'):
+                    data.append(line[5:].strip())
+                elif not line and data:
+                    # an empty line marks the end of an event
+                    yield json.loads('\n'.join(data))
+                    data = []
+        finally:
+            resp.close()
+
+
+class _SecretsIndex:
+    """
+    index of the secrets of the services, used to select the secrets to send with each request
+    """
+
+    def __init__(self, secrets, owner_secret):
+        self._secrets = tuple(secrets)
+        self._owner_secret = owner_secret
+        owner_claims = _unverified_claims(owner_secret) if owner_secret else {}
+        self._owner_exp = owner_claims.get('exp')
+        if self._owner_exp is not None and self._owner_exp <= time.time():
+            # the robot refuses expired owner secrets, use the secrets of the services instead
+            owner_secret, owner_claims = None, {}
+        self._valid_owner_secret = owner_secret
+        owner = owner_claims.get('owner')
+
+        self.by_guid = {}
+        # secrets of the services not covered by the owner secret
+        others = []
+        for secret in secrets:
+            claims = _unverified_claims(secret)
+            guid = claims.get('service_guid')
+            if guid:
+                self.by_guid[guid] = secret
+            if not owner or claims.get('owner') != owner:
+                others.append(secret)
+
+        tokens = ([owner_secret] if owner_secret else []) + others
+        self.multi_header = 'Bearer %s' % ' '.join(tokens) if tokens else None
+
+    def is_valid(self, secrets, owner_secret):
+        """
+        check the index still matches the secrets of the configuration
+        """
+        if self._owner_exp is not None and self._valid_owner_secret and self._owner_exp <= time.time():
+            return False
+        return self._owner_secret == owner_secret and self._secrets == tuple(secrets)
+
+    def header(self, service_guid=None):
+        """
+        return the value of the ZrobotSecret header to send for a request
+
+        @param service_guid: guid of the service the request is about,
+                             None for the requests that are about multiple services
+        """
+        if service_guid is None:
+            return self.multi_header
+
+        secret = self.by_guid.get(service_guid) or self._valid_owner_secret
+        return 'Bearer %s' % secret if secret else None
+
+
+class _SecretAuth(AuthBase):
+    """
+    requests authentication hook that only sends the secrets needed by each request
+
+    a request about a single service only carries the secret of this service,
+    requests about multiple services carry the owner secret and the secrets of the services it doesn't cover
+    """
+
+    _service_path = re.compile(r'^/services/([^/]+)')
+
+    def __init__(self, client, base_url):
+        """
+        @param client: ZeroRobotClient the secrets come from
+        @param base_url: URL of the robot, the path of the requests is matched relative to it
+        """
+        self._client = client
+        self._base_path = urlparse(base_url).path.rstrip('/')
+
+    def __call__(self, r):
+        service_guid = None
+        path = urlparse(r.url).path
+        if self._base_path and path.startswith(self._base_path + '/'):
+            path = path[len(self._base_path):]
+        match = self._service_path.match(path)
+        if match and match.group(1) != 'task_list':
+            service_guid = match.group(1)
+
+        header = self._client._secrets_index().header(service_guid)
+        if header:
+            r.headers['ZrobotSecret'] = header
+            r.headers['Zrobot'] = header  # for backward compatibility with 0.6.x
+        return r
+
+
+class _ConditionalAdapter(HTTPAdapter):
+    """
+    requests transport adapter that keeps the responses of the GET requests tagged with an ETag
+
+    the next identical request is sent with If-None-Match,
+    when the robot answers 304 the cached response is returned instead
+    """
+
+    def __init__(self, size=100, **kwargs):
+        """
+        @param size: maximum number of responses kept in the cache, least recently used are evicted first
+        """
+        super().__init__(**kwargs)
+        self.size = size
+        self._entries = OrderedDict()
+
+    def send(self, request, stream=False, **kwargs):
+        if request.method != 'GET' or stream:
+            return super().send(request, stream=stream, **kwargs)
+
+        # the secrets are part of the key since the robot answers differently depending on them
+        key = (request.url, tuple(sorted(request.headers.items())))
+        cached = self._entries.get(key)
+        if cached is not None:
+            request.headers['If-None-Match'] = cached.headers['ETag']
+
+        resp = super().send(request, stream=stream, **kwargs)
+        if resp.status_code == 304 and cached is not None:
+            self._entries.move_to_end(key)
+            return self._from_cache(cached, request)
+
+        if resp.status_code == 200 and 'ETag' in resp.headers:
+            resp.content  # read the body so it can be served again
+            self._entries[key] = resp
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+        else:
+            self._entries.pop(key, None)
+        return resp
+
+    def _from_cache(self, cached, request):
+        resp = Response()
+        resp.status_code = cached.status_code
+        resp.reason = cached.reason
+        resp.headers = cached.headers.copy()
+        resp.encoding = cached.encoding
+        resp.url = cached.url
+        resp._content = cached.content
+        resp.request = request
+        resp.connection = self
+        return resp
+
+
+def _unverified_claims(token):
+    try:
+        return jwt.get_unverified_claims(token)
+    except:
+        return {}
@@ -0,0 +1,73 @@
+# DO NOT EDIT THIS FILE. This file will be overwritten when re-running go-raml.
+
+"""
+Auto-generated class for BlueprintJob
+"""
+from .BlueprintJobAction import BlueprintJobAction
+from .BlueprintJobService import BlueprintJobService
+from .BlueprintResult import BlueprintResult
+from .EnumBlueprintJobState import EnumBlueprintJobState
+from .Error import Error
+from six import string_types
+
+from . import client_support
+
+
+class BlueprintJob(object):
+    """
+    auto-generated. don't touch.
+    """
+
+    @staticmethod
+    def create(**kwargs):
+        """
+        :type actions: list[BlueprintJobAction]
+        :type created: int
+        :type error: Error
+        :type finished: int
+        :type id: string_types
+        :type owner_secret: string_types
+        :type result: BlueprintResult
+        :type services: list[BlueprintJobService]
+        :type state: EnumBlueprintJobState
+        :rtype: BlueprintJob
+        """
+
+        return BlueprintJob(**kwargs)
+
+    def __init__(self, json=None, **kwargs):
+        if json is None and not kwargs:
+            raise ValueError('No data or kwargs present')
+
+        class_name = 'BlueprintJob'
+        data = json or kwargs
+
+        # set attributes
+        data_types = [BlueprintJobAction]
+        self.actions = client_support.set_property('actions', data, data_types, False, [], True, True, class_name)
+        data_types = [int]
+        self.created = client_support.set_property('created', data, data_types, False, [], False, True, class_name)
+        data_types = [Error]
+        self.error = client_support.set_property('error', data, data_types, False, [], False, False, class_name)
+        data_types = [int]
+        self.finished = client_support.set_property('finished', data, data_types, False, [], False, False, class_name)
+        data_types = [string_types]
+        self.id = client_support.set_property('id', data, data_types, False, [], False, True, class_name)
+        data_types = [string_types]
+        self.owner_secret = client_support.set_property(
+            'owner_secret', data, data_types, False, [], False, False, class_name)
+        data_types = [BlueprintResult]
+        self.result = client_support.set_property('result', data, data_types, False, [], False, False, class_name)
+        data_types = [BlueprintJobService]
+        self.services = client_support.set_property('services', data, data_types, False, [], True, True, class_name)
+        data_types = [EnumBlueprintJobState]
+        self.state = client_support.set_property('state', data, data_types, False, [], False, True, class_name)
+
+    def __str__(self):
+        return self.as_json(indent=4)
+
+    def as_json(self, indent=0):
+        return client_support.to_json(self, indent=indent)
+
+    def as_dict(self):
+        return client_support.to_dict(self)
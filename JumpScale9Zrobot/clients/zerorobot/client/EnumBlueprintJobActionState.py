@@ -0,0 +1,9 @@
+# DO NOT EDIT THIS FILE. This file will be overwritten when re-running go-raml.
+
+from enum import Enum
+
+
+class EnumBlueprintJobActionState(Enum):
+    pending = "pending"
+    scheduled = "scheduled"
+    error = "error"
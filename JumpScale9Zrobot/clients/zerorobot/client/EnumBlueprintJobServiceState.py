@@ -0,0 +1,11 @@
+# DO NOT EDIT THIS FILE. This file will be overwritten when re-running go-raml.
+
+from enum import Enum
+
+
+class EnumBlueprintJobServiceState(Enum):
+    pending = "pending"
+    created = "created"
+    updated = "updated"
+    error = "error"
+    deleted = "deleted"
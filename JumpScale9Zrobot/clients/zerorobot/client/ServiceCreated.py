@@ -20,6 +20,7 @@ class ServiceCreated(object):
         :type data: dict
         :type guid: string_types
         :type name: string_types
+        :type owner_secret: string_types
         :type public: bool
         :type secret: string_types
         :type state: list[ServiceState]
@@ -44,10 +45,13 @@ class ServiceCreated(object):
         self.guid = client_support.set_property('guid', data, data_types, False, [], False, True, class_name)
         data_types = [string_types]
         self.name = client_support.set_property('name', data, data_types, False, [], False, True, class_name)
+        data_types = [string_types]
+        self.owner_secret = client_support.set_property(
+            'owner_secret', data, data_types, False, [], False, False, class_name)
         data_types = [bool]
         self.public = client_support.set_property('public', data, data_types, False, [], False, False, class_name)
         data_types = [string_types]
-        self.secret = client_support.set_property('secret', data, data_types, False, [], False, True, class_name)
+        self.secret = client_support.set_property('secret', data, data_types, False, [], False, False, class_name)
         data_types = [ServiceState]
         self.state = client_support.set_property('state', data, data_types, False, [], True, True, class_name)
         data_types = [string_types]
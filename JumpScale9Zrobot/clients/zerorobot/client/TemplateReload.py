@@ -0,0 +1,49 @@
+# DO NOT EDIT THIS FILE. This file will be overwritten when re-running go-raml.
+
+"""
+Auto-generated class for TemplateReload
+"""
+from six import string_types
+
+from . import client_support
+
+
+class TemplateReload(object):
+    """
+    auto-generated. don't touch.
+    """
+
+    @staticmethod
+    def create(**kwargs):
+        """
+        :type added: list[string_types]
+        :type unchanged: list[string_types]
+        :type updated: list[string_types]
+        :rtype: TemplateReload
+        """
+
+        return TemplateReload(**kwargs)
+
+    def __init__(self, json=None, **kwargs):
+        if json is None and not kwargs:
+            raise ValueError('No data or kwargs present')
+
+        class_name = 'TemplateReload'
+        data = json or kwargs
+
+        # set attributes
+        data_types = [string_types]
+        self.added = client_support.set_property('added', data, data_types, False, [], True, True, class_name)
+        data_types = [string_types]
+        self.unchanged = client_support.set_property('unchanged', data, data_types, False, [], True, True, class_name)
+        data_types = [string_types]
+        self.updated = client_support.set_property('updated', data, data_types, False, [], True, True, class_name)
+
+    def __str__(self):
+        return self.as_json(indent=4)
+
+    def as_json(self, indent=0):
+        return client_support.to_json(self, indent=indent)
+
+    def as_dict(self):
+        return client_support.to_dict(self)
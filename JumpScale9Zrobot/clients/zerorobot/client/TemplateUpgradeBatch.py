@@ -0,0 +1,64 @@
+# DO NOT EDIT THIS FILE. This file will be overwritten when re-running go-raml.
+
+"""
+Auto-generated class for TemplateUpgradeBatch
+"""
+from .TemplateUpgradeError import TemplateUpgradeError
+
+from . import client_support
+
+
+class TemplateUpgradeBatch(object):
+    """
+    auto-generated. don't touch.
+    """
+
+    @staticmethod
+    def create(**kwargs):
+        """
+        :type canary: bool
+        :type duration: float
+        :type errors: list[TemplateUpgradeError]
+        :type failed: int
+        :type finished: int
+        :type size: int
+        :type started: int
+        :type upgraded: int
+        :rtype: TemplateUpgradeBatch
+        """
+
+        return TemplateUpgradeBatch(**kwargs)
+
+    def __init__(self, json=None, **kwargs):
+        if json is None and not kwargs:
+            raise ValueError('No data or kwargs present')
+
+        class_name = 'TemplateUpgradeBatch'
+        data = json or kwargs
+
+        # set attributes
+        data_types = [bool]
+        self.canary = client_support.set_property('canary', data, data_types, False, [], False, True, class_name)
+        data_types = [float]
+        self.duration = client_support.set_property('duration', data, data_types, False, [], False, False, class_name)
+        data_types = [TemplateUpgradeError]
+        self.errors = client_support.set_property('errors', data, data_types, False, [], True, True, class_name)
+        data_types = [int]
+        self.failed = client_support.set_property('failed', data, data_types, False, [], False, True, class_name)
+        data_types = [int]
+        self.finished = client_support.set_property('finished', data, data_types, False, [], False, False, class_name)
+        data_types = [int]
+        self.size = client_support.set_property('size', data, data_types, False, [], False, True, class_name)
+        data_types = [int]
+        self.started = client_support.set_property('started', data, data_types, False, [], False, False, class_name)
+        data_types = [int]
+        self.upgraded = client_support.set_property('upgraded', data, data_types, False, [], False, True, class_name)
+
+    def __str__(self):
+        return self.as_json(indent=4)
+
+    def as_json(self, indent=0):
+        return client_support.to_json(self, indent=indent)
+
+    def as_dict(self):
+        return client_support.to_dict(self)
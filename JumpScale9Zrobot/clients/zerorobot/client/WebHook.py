@@ -17,6 +17,7 @@ class WebHook(object):
     @staticmethod
     def create(**kwargs):
         """
+        :type batch: bool
         :type id: string_types
         :type kind: EnumWebHookKind
         :type url: string_types
@@ -33,6 +34,8 @@ class WebHook(object):
         data = json or kwargs
 
         # set attributes
+        data_types = [bool]
+        self.batch = client_support.set_property('batch', data, data_types, False, [], False, False, class_name)
         data_types = [string_types]
         self.id = client_support.set_property('id', data, data_types, False, [], False, False, class_name)
         data_types = [EnumWebHookKind]
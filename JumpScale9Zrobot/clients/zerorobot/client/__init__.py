@@ -2,11 +2,22 @@
 
 from .Action import Action
 from .Blueprint import Blueprint
+from .BlueprintDiff import BlueprintDiff
+from .BlueprintDiffAction import BlueprintDiffAction
+from .BlueprintDiffService import BlueprintDiffService
+from .BlueprintJob import BlueprintJob
+from .BlueprintJobAction import BlueprintJobAction
+from .BlueprintJobService import BlueprintJobService
 from .BlueprintResult import BlueprintResult
 from .Eco import Eco
+from .EnumBlueprintDiffServiceChange import EnumBlueprintDiffServiceChange
+from .EnumBlueprintJobActionState import EnumBlueprintJobActionState
+from .EnumBlueprintJobServiceState import EnumBlueprintJobServiceState
+from .EnumBlueprintJobState import EnumBlueprintJobState
 from .EnumRobotInfoType import EnumRobotInfoType
 from .EnumServiceStateState import EnumServiceStateState
 from .EnumTaskState import EnumTaskState
+from .EnumTemplateUpgradeState import EnumTemplateUpgradeState
 from .EnumWebHookKind import EnumWebHookKind
 from .Error import Error
 from .Logs import Logs
@@ -23,8 +34,13 @@ from .ServiceFilter import ServiceFilter
 from .ServiceState import ServiceState
 from .Task import Task
 from .TaskCreate import TaskCreate
+from .TaskSchedule import TaskSchedule
 from .Template import Template
+from .TemplateReload import TemplateReload
 from .TemplateRepository import TemplateRepository
+from .TemplateUpgrade import TemplateUpgrade
+from .TemplateUpgradeBatch import TemplateUpgradeBatch
+from .TemplateUpgradeError import TemplateUpgradeError
 from .WebHook import WebHook
 
 from .blueprints_service import BlueprintsService
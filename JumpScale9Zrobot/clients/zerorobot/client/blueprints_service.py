@@ -1,4 +1,6 @@
 # DO NOT EDIT THIS FILE. This file will be overwritten when re-running go-raml.
+from .BlueprintDiff import BlueprintDiff
+from .BlueprintJob import BlueprintJob
 from .BlueprintResult import BlueprintResult
 from .unhandled_api_error import UnhandledAPIError
 from .unmarshall_error import UnmarshallError
@@ -31,3 +33,76 @@ class BlueprintsService:
             raise uae
         except Exception as e:
             raise UnmarshallError(resp, e.message)
+
+    def DiffBlueprint(self, data, headers=None, query_params=None, content_type="application/json"):
+        """
+        Compute the changes a blueprint would make, without creating, updating or scheduling anything
+        It is method for POST /blueprints/diff
+        """
+        if query_params is None:
+            query_params = {}
+
+        uri = self.client.base_url + "/blueprints/diff"
+        resp = self.client.post(uri, data, headers, query_params, content_type)
+        try:
+            if resp.status_code == 200:
+                return BlueprintDiff(resp.json()), resp
+
+            message = 'unknown status code={}'.format(resp.status_code)
+            raise UnhandledAPIError(response=resp, code=resp.status_code,
+                                    message=message)
+        except ValueError as msg:
+            raise UnmarshallError(resp, msg)
+        except UnhandledAPIError as uae:
+            raise uae
+        except Exception as e:
+            raise UnmarshallError(resp, e.message)
+
+    def CreateBlueprintJob(self, data, headers=None, query_params=None, content_type="application/json"):
+        """
+        Execute a blueprint in the background.
+        The job is returned right away, use GetBlueprintJob to follow its progress
+        It is method for POST /blueprints/jobs
+        """
+        if query_params is None:
+            query_params = {}
+
+        uri = self.client.base_url + "/blueprints/jobs"
+        resp = self.client.post(uri, data, headers, query_params, content_type)
+        try:
+            if resp.status_code == 202:
+                return BlueprintJob(resp.json()), resp
+
+            message = 'unknown status code={}'.format(resp.status_code)
+            raise UnhandledAPIError(response=resp, code=resp.status_code,
+                                    message=message)
+        except ValueError as msg:
+            raise UnmarshallError(resp, msg)
+        except UnhandledAPIError as uae:
+            raise uae
+        except Exception as e:
+            raise UnmarshallError(resp, e.message)
+
+    def GetBlueprintJob(self, job_id, headers=None, query_params=None, content_type="application/json"):
+        """
+        Retrieve the progress of the execution of a blueprint
+        It is method for GET /blueprints/jobs/{job_id}
+        """
+        if query_params is None:
+            query_params = {}
+
+        uri = self.client.base_url + "/blueprints/jobs/" + job_id
+        resp = self.client.get(uri, None, headers, query_params, content_type)
+        try:
+            if resp.status_code == 200:
+                return BlueprintJob(resp.json()), resp
+
+            message = 'unknown status code={}'.format(resp.status_code)
+            raise UnhandledAPIError(response=resp, code=resp.status_code,
+                                    message=message)
+        except ValueError as msg:
+            raise UnmarshallError(resp, msg)
+        except UnhandledAPIError as uae:
+            raise uae
+        except Exception as e:
+            raise UnmarshallError(resp, e.message)
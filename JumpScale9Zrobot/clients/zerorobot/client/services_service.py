@@ -13,6 +13,34 @@ class ServicesService:
     def __init__(self, client):
         self.client = client
 
+    def ScheduleTasks(self, data, headers=None, query_params=None, content_type="application/json"):
+        """
+        Schedule tasks on multiple services in a single request.
+        All the tasks are validated before any of them is scheduled.
+        It is method for POST /services/task_list
+        """
+        if query_params is None:
+            query_params = {}
+
+        uri = self.client.base_url + "/services/task_list"
+        resp = self.client.post(uri, data, headers, query_params, content_type)
+        try:
+            if resp.status_code == 201:
+                resps = []
+                for elem in resp.json():
+                    resps.append(Task(elem))
+                return resps, resp
+
+            message = 'unknown status code={}'.format(resp.status_code)
+            raise UnhandledAPIError(response=resp, code=resp.status_code,
+                                    message=message)
+        except ValueError as msg:
+            raise UnmarshallError(resp, msg)
+        except UnhandledAPIError as uae:
+            raise uae
+        except Exception as e:
+            raise UnmarshallError(resp, e.message)
+
     def ListActions(self, service_guid, headers=None, query_params=None, content_type="application/json"):
         """
         List all the possible action a service can do.
@@ -1,6 +1,7 @@
 # DO NOT EDIT THIS FILE. This file will be overwritten when re-running go-raml.
 from .Error import Error
 from .Template import Template
+from .TemplateUpgrade import TemplateUpgrade
 from .unhandled_api_error import UnhandledAPIError
 from .unmarshall_error import UnmarshallError
 
@@ -65,11 +66,76 @@ class TemplatesService:
 
     def CheckoutVersionTemplateRepo(self, data, headers=None, query_params=None, content_type="application/json"):
         """
-        Checkout a certain branch/tag/revision of a template repository
+        Checkout a certain branch/tag/revision of a template repository.
+        The services are upgraded in the background, use GetTemplateUpgrade to follow the upgrade
         It is method for PUT /templates
         """
         if query_params is None:
             query_params = {}
 
         uri = self.client.base_url + "/templates"
-        return self.client.put(uri, data, headers, query_params, content_type)
+        resp = self.client.put(uri, data, headers, query_params, content_type)
+        try:
+            if resp.status_code == 202:
+                return TemplateUpgrade(resp.json()), resp
+
+            message = 'unknown status code={}'.format(resp.status_code)
+            raise UnhandledAPIError(response=resp, code=resp.status_code,
+                                    message=message)
+        except ValueError as msg:
+            raise UnmarshallError(resp, msg)
+        except UnhandledAPIError as uae:
+            raise uae
+        except Exception as e:
+            raise UnmarshallError(resp, e.message)
+
+    def ListTemplateUpgrades(self, headers=None, query_params=None, content_type="application/json"):
+        """
+        List the last rolling upgrades of the services
+        It is method for GET /templates/upgrades
+        """
+        if query_params is None:
+            query_params = {}
+
+        uri = self.client.base_url + "/templates/upgrades"
+        resp = self.client.get(uri, None, headers, query_params, content_type)
+        try:
+            if resp.status_code == 200:
+                resps = []
+                for elem in resp.json():
+                    resps.append(TemplateUpgrade(elem))
+                return resps, resp
+
+            message = 'unknown status code={}'.format(resp.status_code)
+            raise UnhandledAPIError(response=resp, code=resp.status_code,
+                                    message=message)
+        except ValueError as msg:
+            raise UnmarshallError(resp, msg)
+        except UnhandledAPIError as uae:
+            raise uae
+        except Exception as e:
+            raise UnmarshallError(resp, e.message)
+
+    def GetTemplateUpgrade(self, upgrade_id, headers=None, query_params=None, content_type="application/json"):
+        """
+        Retrieve the progress of a rolling upgrade of the services
+        It is method for GET /templates/upgrades/{upgrade_id}
+        """
+        if query_params is None:
+            query_params = {}
+
+        uri = self.client.base_url + "/templates/upgrades/" + upgrade_id
+        resp = self.client.get(uri, None, headers, query_params, content_type)
+        try:
+            if resp.status_code == 200:
+                return TemplateUpgrade(resp.json()), resp
+
+            message = 'unknown status code={}'.format(resp.status_code)
+            raise UnhandledAPIError(response=resp, code=resp.status_code,
+                                    message=message)
+        except ValueError as msg:
+            raise UnmarshallError(resp, msg)
+        except UnhandledAPIError as uae:
+            raise uae
+        except Exception as e:
+            raise UnmarshallError(resp, e.message)
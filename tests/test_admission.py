@@ -0,0 +1,135 @@
+import unittest
+
+import gevent
+from flask import Flask
+from gevent.event import Event
+from werkzeug.test import Client
+from werkzeug.wrappers import Response
+
+from zerorobot.server.admission import (CLASS_HEAVY, CLASS_LIGHT,
+                                        CLASS_LONG_POLL, CLASS_STREAM,
+                                        AdmissionControl)
+
+
+class TestAdmissionControl(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.release = Event()
+
+        @self.app.route('/blueprints', methods=['POST'])
+        def blueprint():
+            self.release.wait()
+            return 'ok'
+
+        @self.app.route('/blueprints/diff', methods=['POST'])
+        def blueprint_diff():
+            return 'ok'
+
+        @self.app.route('/blueprints/jobs', methods=['POST'])
+        def blueprint_job():
+            return 'ok'
+
+        @self.app.route('/blueprints/jobs/<job_id>', methods=['GET'])
+        def get_blueprint_job(job_id):
+            return 'ok'
+
+        @self.app.route('/services/<service_guid>', methods=['GET'])
+        def get_service(service_guid):
+            self.release.wait()
+            return 'ok'
+
+        @self.app.route('/services/<service_guid>/task_list/<task_guid>', methods=['GET'])
+        def get_task(service_guid, task_guid):
+            self.release.wait()
+            return 'ok'
+
+        @self.app.route('/events', methods=['GET'])
+        def events():
+            return 'ok'
+
+        @self.app.route('/metrics', methods=['GET'])
+        def metrics():
+            return 'ok'
+
+    def _client(self, **kwargs):
+        # requests need to be buffered so the response is closed and the slot released like a real server would
+        return Client(AdmissionControl(self.app, **kwargs), Response)
+
+    def test_classify(self):
+        admission = AdmissionControl(self.app)
+        self.assertEqual(admission.classify(_environ('POST', '/blueprints')), CLASS_HEAVY)
+        self.assertEqual(admission.classify(_environ('GET', '/services/abc')), CLASS_LIGHT)
+        self.assertEqual(admission.classify(_environ('GET', '/events')), CLASS_STREAM)
+        self.assertEqual(admission.classify(_environ('GET', '/notfound')), CLASS_LIGHT)
+        self.assertIsNone(admission.classify(_environ('GET', '/metrics')))
+        self.assertEqual(admission.classify(_environ('GET', '/services/abc/task_list/def')), CLASS_LIGHT)
+        self.assertEqual(admission.classify(_environ('GET', '/services/abc/task_list/def', 'wait=30')), CLASS_LONG_POLL)
+        self.assertEqual(admission.classify(_environ('GET', '/services/abc/task_list/def', 'wait=0')), CLASS_LIGHT)
+
+    def test_classify_blueprints(self):
+        admission = AdmissionControl(self.app)
+        self.assertEqual(admission.classify(_environ('POST', '/blueprints/diff')), CLASS_HEAVY)
+        self.assertEqual(admission.classify(_environ('POST', '/blueprints/jobs')), CLASS_HEAVY)
+        self.assertEqual(admission.classify(_environ('GET', '/blueprints/jobs/abc')), CLASS_LIGHT)
+        self.assertEqual(admission.classify(_environ('GET', '/blueprints/jobs/abc', 'wait=10')), CLASS_LONG_POLL)
+
+    def test_long_polls(self):
+        client = self._client(max_requests=1, max_long_polls=1, queue_timeout=0)
+
+        gl = gevent.spawn(client.get, '/services/abc/task_list/def?wait=30', buffered=True)
+        gevent.sleep(0.01)
+        # the long-poll doesn't take the global slot
+        gl2 = gevent.spawn(client.get, '/services/abc', buffered=True)
+        gevent.sleep(0.01)
+        self.assertEqual(client.get('/services/abc/task_list/def?wait=30', buffered=True).status_code, 503,
+                         "long-polls should be limited by their own limit")
+        self.release.set()
+        self.assertEqual(gl.get().status_code, 200)
+        self.assertEqual(gl2.get().status_code, 200)
+
+    def test_reject_heavy(self):
+        client = self._client(max_heavy_requests=1, queue_timeout=0.1, retry_after=3)
+
+        gl = gevent.spawn(client.post, '/blueprints', buffered=True)
+        gevent.sleep(0.01)
+
+        resp = client.post('/blueprints', buffered=True)
+        self.assertEqual(resp.status_code, 503)
+        self.assertEqual(resp.headers['Retry-After'], '3')
+
+        # light requests are not impacted
+        self.release.set()
+        resp = client.get('/services/abc', buffered=True)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(gl.get().status_code, 200)
+
+        # slot is released once the request is done
+        self.assertEqual(client.post('/blueprints', buffered=True).status_code, 200)
+
+    def test_queue(self):
+        client = self._client(max_requests=1, queue_timeout=1)
+
+        gl = gevent.spawn(client.get, '/services/abc', buffered=True)
+        gevent.sleep(0.01)
+        gevent.spawn_later(0.1, self.release.set)
+
+        # waits for the first request to finish instead of being rejected
+        self.assertEqual(client.get('/services/abc', buffered=True).status_code, 200)
+        self.assertEqual(gl.get().status_code, 200)
+
+    def test_metrics_exempt(self):
+        client = self._client(max_requests=1, queue_timeout=0)
+
+        gl = gevent.spawn(client.get, '/services/abc', buffered=True)
+        gevent.sleep(0.01)
+        self.assertEqual(client.get('/services/abc', buffered=True).status_code, 503)
+        self.assertEqual(client.get('/metrics', buffered=True).status_code, 200)
+        self.assertEqual(client.get('/events', buffered=True).status_code, 200)
+        self.release.set()
+        gl.get()
+
+
+def _environ(method, path, query=''):
+    return {'REQUEST_METHOD': method, 'PATH_INFO': path, 'QUERY_STRING': query,
+            'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'wsgi.url_scheme': 'http'}
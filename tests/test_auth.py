@@ -0,0 +1,131 @@
+import json
+import unittest
+from unittest import mock
+
+from flask import Flask, jsonify
+
+from zerorobot import service_collection as scol
+from zerorobot.server import auth
+from zerorobot.server.auth import user_jwt
+from zerorobot.server.auth.flask_httpauth import HTTPTokenAuth, MultiAuth
+
+
+class TestMultiAuth(unittest.TestCase):
+
+    def setUp(self):
+        self.admin = HTTPTokenAuth('Bearer', header='ZrobotAdmin')
+        self.user = HTTPTokenAuth('Bearer', header='ZrobotUser')
+        self.verified = []
+
+        @self.admin.verify_token
+        def verify_admin(token):
+            self.verified.append('admin')
+            return token == 'admin'
+
+        @self.user.verify_token
+        def verify_user(token):
+            self.verified.append('user')
+            return token == 'user'
+
+        multi = MultiAuth(self.admin, self.user)
+        self.calls = 0
+        app = Flask(__name__)
+
+        @app.route('/found')
+        @multi.login_required
+        def found():
+            self.calls += 1
+            return jsonify(code=200), 200
+
+        @app.route('/notfound')
+        @multi.login_required
+        def notfound():
+            self.calls += 1
+            return json.dumps({'code': 404, 'message': 'not found'}), 404, {"Content-type": 'application/json'}
+
+        self.client = app.test_client()
+
+    def test_unauthorized(self):
+        resp = self.client.get('/found', headers={'ZrobotUser': 'Bearer wrong'})
+        self.assertEqual(resp.status_code, 401)
+        self.assertEqual(self.calls, 0, "handler should not be called when no scheme authorizes the request")
+        self.assertEqual(self.verified, ['admin', 'user'])
+
+    def test_authorized(self):
+        resp = self.client.get('/found', headers={'ZrobotAdmin': 'Bearer admin'})
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self.verified, ['admin'], "remaining schemes should not be evaluated once one succeeds")
+
+    def test_handler_called_once_on_error(self):
+        for headers in [{'ZrobotAdmin': 'Bearer admin'},
+                        {'ZrobotUser': 'Bearer user'},
+                        {'ZrobotAdmin': 'Bearer admin', 'ZrobotUser': 'Bearer user'}]:
+            self.calls = 0
+            resp = self.client.get('/notfound', headers=headers)
+            self.assertEqual(resp.status_code, 404, "error response of the handler should be returned as is")
+            self.assertEqual(self.calls, 1, "handler should be called exactly once")
+
+
+class TestServiceAuth(unittest.TestCase):
+
+    def setUp(self):
+        app = Flask(__name__)
+
+        @app.route('/services/task_list', methods=['POST'], endpoint='services_api.ScheduleTasks')
+        @auth.service.login_required
+        def schedule():
+            return jsonify(code=201), 201
+
+        @app.route('/events', methods=['GET'], endpoint='events_api.StreamEvents')
+        @auth.service.login_required
+        def events():
+            return jsonify(code=200), 200
+
+        @app.route('/services/other', methods=['GET'])
+        @auth.service.login_required
+        def other():
+            return jsonify(code=200), 200
+
+        self.client = app.test_client()
+        patcher = mock.patch.multiple(scol, get_service_owner=mock.Mock(return_value='owner'),
+                                      is_service_public=mock.Mock(side_effect=lambda guid: guid == 'public'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _schedule(self, tasks, secrets=()):
+        headers = {'ZrobotSecret': 'Bearer %s' % ' '.join(secrets)} if secrets else {}
+        return self.client.post('/services/task_list', data=json.dumps(tasks),
+                                content_type='application/json', headers=headers)
+
+    def test_multiple_services(self):
+        secret = user_jwt.create({'service_guid': 'a'})
+        tasks = [{'action_name': 'start', 'service_guid': 'a'}, {'action_name': 'start', 'service_guid': 'public'}]
+        self.assertEqual(self._schedule(tasks, [secret]).status_code, 201)
+
+        tasks.append({'action_name': 'start', 'service_guid': 'b'})
+        self.assertEqual(self._schedule(tasks, [secret]).status_code, 401,
+                         "a secret is required for every service targeted by guid")
+
+        owner_secret = user_jwt.create({'owner': 'owner'})
+        self.assertEqual(self._schedule(tasks, [owner_secret]).status_code, 201,
+                         "owner secret should give access to all the services of the owner")
+
+    def test_filter(self):
+        # the services selected by a filter are checked by the handler
+        tasks = [{'action_name': 'start', 'filter': {'name': 'a'}}]
+        self.assertEqual(self._schedule(tasks).status_code, 201)
+
+    def test_query(self):
+        secret = user_jwt.create({'service_guid': 'a'})
+        headers = {'ZrobotSecret': 'Bearer %s' % secret}
+        self.assertEqual(self.client.get('/events?service_guid=a,public', headers=headers).status_code, 200)
+        self.assertEqual(self.client.get('/events?service_guid=a,b', headers=headers).status_code, 401)
+        self.assertEqual(self.client.get('/events', headers=headers).status_code, 200)
+
+    def test_not_multi_service(self):
+        # a route without service guid that didn't opt in for multiple services is refused
+        secret = user_jwt.create({'service_guid': 'a'})
+        for token in ['bogus', secret]:
+            resp = self.client.get('/services/other', headers={'ZrobotSecret': 'Bearer %s' % token})
+            self.assertEqual(resp.status_code, 401)
@@ -0,0 +1,124 @@
+import unittest
+
+import gevent
+from gevent.event import Event
+
+from zerorobot.blueprint_jobs import (ACTION_STATE_SCHEDULED, JOB_STATE_ERROR,
+                                      JOB_STATE_OK, JOB_STATE_PENDING,
+                                      JOB_STATE_RUNNING, SERVICE_STATE_CREATED,
+                                      BlueprintJob, JobManager,
+                                      TooManyJobsError)
+
+actions = [{'action': 'start', 'service': 'node1'}]
+services = [{'template': 'node', 'service': 'node1', 'data': {}}]
+
+
+class TestBlueprintJobs(unittest.TestCase):
+
+    def test_progress(self):
+        mgr = JobManager()
+        release = Event()
+
+        def execute(actions, services, job=None):
+            job.service_progress(0, SERVICE_STATE_CREATED, 'guid1')
+            release.wait()
+            job.action_progress(0, ACTION_STATE_SCHEDULED, ['task1'])
+            return {'services': [], 'tasks': []}, None, None
+
+        job = mgr.submit(BlueprintJob(actions, services), execute, actions, services)
+        self.assertEqual(job.state, JOB_STATE_PENDING)
+        self.assertEqual(mgr.get(job.id), job)
+
+        gevent.sleep(0.01)
+        view = job.view()
+        self.assertEqual(view['state'], JOB_STATE_RUNNING)
+        self.assertEqual(view['services'][0]['state'], SERVICE_STATE_CREATED)
+        self.assertEqual(view['services'][0]['guid'], 'guid1')
+        self.assertEqual(view['actions'][0]['tasks'], [])
+        self.assertFalse(job.wait(timeout=0.01))
+
+        release.set()
+        self.assertTrue(job.wait(timeout=1))
+        view = job.view()
+        self.assertEqual(view['state'], JOB_STATE_OK)
+        self.assertEqual(view['actions'][0]['state'], ACTION_STATE_SCHEDULED)
+        self.assertEqual(view['actions'][0]['tasks'], ['task1'])
+        self.assertEqual(view['result'], {'services': [], 'tasks': []})
+        self.assertNotIn('error', view)
+
+    def test_error(self):
+        mgr = JobManager()
+
+        def fail(job=None):
+            return None, 400, 'bad blueprint'
+
+        def crash(job=None):
+            raise RuntimeError('boom')
+
+        job = mgr.submit(BlueprintJob([], []), fail)
+        job.wait(timeout=1)
+        self.assertEqual(job.state, JOB_STATE_ERROR)
+        self.assertEqual(job.view()['error'], {'code': 400, 'message': 'bad blueprint'})
+
+        job = mgr.submit(BlueprintJob([], []), crash)
+        job.wait(timeout=1)
+        self.assertEqual(job.view()['error'], {'code': 500, 'message': 'boom'})
+
+    def test_concurrency(self):
+        mgr = JobManager(max_running=1, max_pending=1)
+        release = Event()
+
+        def execute(job=None):
+            release.wait()
+            return {}, None, None
+
+        job1 = mgr.submit(BlueprintJob([], []), execute)
+        gevent.sleep(0.01)
+        job2 = mgr.submit(BlueprintJob([], []), execute)
+        gevent.sleep(0.01)
+        self.assertEqual(job1.state, JOB_STATE_RUNNING)
+        self.assertEqual(job2.state, JOB_STATE_PENDING, "only one job should run at a time")
+
+        with self.assertRaises(TooManyJobsError):
+            mgr.submit(BlueprintJob([], []), execute)
+
+        release.set()
+        self.assertTrue(job1.wait(timeout=1))
+        self.assertTrue(job2.wait(timeout=1))
+
+    def test_evict(self):
+        mgr = JobManager(size=2)
+
+        def execute(job=None):
+            return {}, None, None
+
+        jobs = [mgr.submit(BlueprintJob([], []), execute) for _ in range(2)]
+        for job in jobs:
+            job.wait(timeout=1)
+        mgr.submit(BlueprintJob([], []), execute)
+
+        with self.assertRaises(KeyError):
+            mgr.get(jobs[0].id)
+        mgr.get(jobs[1].id)
+
+    def test_secrets(self):
+        mgr = JobManager()
+        created = {'guid': 'guid1', 'name': 'node1', 'secret': 'secret1', 'owner_secret': 'owner_secret1'}
+
+        def execute(job=None):
+            return {'services': [created], 'tasks': []}, None, None
+
+        job = mgr.submit(BlueprintJob([], [], owner='owner'), execute)
+        job.wait(timeout=1)
+        self.assertEqual(job.view('owner')['result']['services'], [created])
+        for owner in [None, 'other']:
+            self.assertEqual(job.view(owner)['result']['services'], [{'guid': 'guid1', 'name': 'node1'}],
+                             "secrets should only be returned to the owner of the job")
+        self.assertEqual(job.result['services'], [created])
+
+    def test_configure(self):
+        mgr = JobManager()
+        with self.assertRaises(ValueError):
+            mgr.configure(max_running=0)
+        mgr.configure(max_running=3)
+        self.assertEqual(mgr._running.counter, 3)
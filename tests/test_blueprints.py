@@ -2,12 +2,16 @@ import os
 import shutil
 import tempfile
 import unittest
+from unittest import mock
 
+from js9 import j
 from zerorobot import service_collection as scol
 from zerorobot import template_collection as tcol
 from zerorobot import blueprint
 from zerorobot import config
+from zerorobot.server.handlers.DiffBlueprintHandler import diff_blueprint
 from zerorobot.server.handlers.ExecuteBlueprintHandler import (_schedule_action,
+                                                               _waves,
                                                                instantiate_services)
 
 
@@ -123,6 +127,43 @@ class TestBlueprintExecution(unittest.TestCase):
         self.assertEqual(len(scol.list_services()), 1)
         self.assertEqual(len(scol.find(template_uid='github.com/zero-os/0-robot/node/0.0.1')), 1)
 
+    def test_instantiate_service_owner(self):
+        services = [{'template': 'node', 'service': 'node1', 'data': {}}]
+        service_created, err_code, err_msg = instantiate_services(services, owner='owner')
+        self.assertIsNone(err_code)
+
+        service = scol.get_by_guid(service_created[0]['guid'])
+        info = j.data.serializer.yaml.load(os.path.join(service._path, 'service.yaml'))
+        self.assertEqual(info['owner'], 'owner', "the owner should be saved with the service")
+
+    def test_diff_blueprint(self):
+        node = tcol.get('github.com/zero-os/0-robot/node/0.0.1')
+        existing = tcol.instantiate_service(node, 'node1', {'ip': '127.0.0.1'})
+
+        services = [
+            {'template': 'github.com/zero-os/0-robot/node/0.0.1', 'service': 'node1', 'data': {'ip': '127.0.0.1'}},
+            {'template': 'github.com/zero-os/0-robot/node/0.0.1', 'service': 'node2', 'data': {'ip': '10.0.0.1'}},
+            {'template': 'github.com/zero-os/0-robot/node/0.0.1', 'service': 'node2', 'data': {'ip': '10.0.0.2'}},
+        ]
+        actions = [{'action': 'start', 'template': 'github.com/zero-os/0-robot/node/0.0.1'}]
+        result = diff_blueprint(actions, services)
+
+        self.assertEqual(result['services'], [
+            {'template': 'github.com/zero-os/0-robot/node/0.0.1', 'service': 'node1', 'guid': existing.guid, 'change': 'none'},
+            {'template': 'github.com/zero-os/0-robot/node/0.0.1', 'service': 'node2', 'change': 'create', 'data': {'ip': '10.0.0.1'}},
+            {'template': 'github.com/zero-os/0-robot/node/0.0.1', 'service': 'node2', 'change': 'update', 'data': {'ip': '10.0.0.2'}},
+        ])
+        self.assertEqual(result['actions'], [
+            {'action': 'start', 'template': 'github.com/zero-os/0-robot/node/0.0.1', 'services': [existing.guid]},
+        ])
+        self.assertEqual(len(scol.list_services()), 1, "diff should not create any service")
+        self.assertEqual(len(existing.task_list.list_tasks()), 0, "diff should not schedule any task")
+
+        services[0]['data'] = {'ip': '10.0.0.3'}
+        result = diff_blueprint([], services)
+        self.assertEqual(result['services'][0]['change'], 'update')
+        self.assertEqual(result['services'][0]['data'], {'ip': '10.0.0.3'})
+
     def test_instantiate_service_error(self):
         services = [
             {
@@ -144,6 +185,57 @@ class TestBlueprintExecution(unittest.TestCase):
 
         assert len(scol.list_services()) == 0, "service created during a failed blueprint, should be deleted"
 
+    def test_instantiate_waves(self):
+        services = [
+            {'template': 'node', 'service': 'node1', 'data': {}},
+            {'template': 'node', 'service': 'node2', 'data': None},
+            {'template': 'vm', 'service': 'vm1', 'data': {'node': 'node1'}},
+            {'template': 'vm', 'service': 'vm2', 'data': {'disks': [{'node': 'node2'}]}},
+            {'template': 'node', 'service': 'node1', 'data': {'foo': 'bar'}},
+            {'template': 'vm', 'service': 'vm3', 'data': {'node': 'unknown'}},
+        ]
+        # services only depend on services declared before them
+        self.assertEqual(_waves(services), [[0, 1, 5], [2, 3, 4]])
+        self.assertEqual(_waves([]), [])
+
+    def test_instantiate_waves_rollback(self):
+        services = [
+            {'template': 'node', 'service': 'node1', 'data': {}},
+            {'template': 'node', 'service': 'node2', 'data': {}},
+            {'template': 'validate', 'service': 'validate1', 'data': {'node': 'node1'}},
+        ]
+        self.assertEqual(_waves(services), [[0, 1], [2]])
+
+        # the failure in the second wave deletes the services created by the first one
+        config.blueprint_concurrency = 25
+        try:
+            service_created, err_code, err_msg = instantiate_services(services)
+        finally:
+            config.blueprint_concurrency = 1
+        self.assertEqual(err_code, 500)
+        self.assertEqual(err_msg, 'required need to be specified in the data')
+        self.assertEqual(len(service_created), 2)
+        self.assertEqual(len(scol.list_services()), 0, "services created by the first wave should be deleted")
+
+    def test_instantiate_sequential(self):
+        services = [
+            {'template': 'validate', 'service': 'validate1', 'data': {}},
+            {'template': 'node', 'service': 'node1', 'data': {}},
+        ]
+        instantiated = []
+        original = tcol.instantiate_service
+
+        def instantiate_service(template, name, data):
+            instantiated.append(name)
+            return original(template, name, data)
+
+        # services are instantiated one by one by default
+        with mock.patch.object(tcol, 'instantiate_service', instantiate_service):
+            service_created, err_code, err_msg = instantiate_services(services)
+        self.assertEqual(err_code, 500)
+        self.assertEqual(instantiated, ['validate1'], "services after the failing one should not be instantiated")
+        self.assertEqual(len(scol.list_services()), 0)
+
     def test_schedule_actions(self):
         services = [
             {
@@ -0,0 +1,65 @@
+import gzip
+import json
+import unittest
+
+from flask import Flask
+
+from zerorobot.server.conditional import (compress, etag, etag_header,
+                                          not_modified)
+
+
+class TestConditional(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.after_request(compress)
+        self.revision = 0
+        self.serialized = 0
+
+        @self.app.route('/items')
+        def items():
+            tag = etag('items', self.revision)
+            resp = not_modified(tag)
+            if resp is not None:
+                return resp
+            self.serialized += 1
+            headers = {"Content-type": 'application/json'}
+            headers.update(etag_header(tag))
+            return json.dumps([{'name': 'item%d' % i} for i in range(100)]), 200, headers
+
+        @self.app.route('/small')
+        def small():
+            return 'ok'
+
+        self.client = self.app.test_client()
+
+    def test_not_modified(self):
+        resp = self.client.get('/items')
+        self.assertEqual(resp.status_code, 200)
+        tag = resp.headers['ETag']
+
+        resp = self.client.get('/items', headers={'If-None-Match': tag})
+        self.assertEqual(resp.status_code, 304)
+        self.assertEqual(resp.data, b'')
+        self.assertEqual(resp.headers['ETag'], tag)
+        self.assertEqual(self.serialized, 1, "a not modified resource should not be serialized")
+
+        self.revision += 1
+        resp = self.client.get('/items', headers={'If-None-Match': tag})
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp.headers['ETag'], tag)
+
+    def test_compress(self):
+        resp = self.client.get('/items', headers={'Accept-Encoding': 'gzip, deflate'})
+        self.assertEqual(resp.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', resp.headers['Vary'])
+        self.assertEqual(len(json.loads(gzip.decompress(resp.data).decode())), 100)
+
+        resp = self.client.get('/items')
+        self.assertNotIn('Content-Encoding', resp.headers)
+        self.assertEqual(len(resp.json), 100)
+
+    def test_compress_small(self):
+        resp = self.client.get('/small', headers={'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', resp.headers)
+        self.assertEqual(resp.data, b'ok')
@@ -0,0 +1,162 @@
+import gc
+import sys
+import time
+import unittest
+import weakref
+from unittest import mock
+
+import gevent
+
+from zerorobot.task.eco_aggregator import EcoAggregator
+
+
+class FakeTask:
+
+    def __init__(self, action_name='foo'):
+        self.service = None
+        self.action_name = action_name
+        self._args = {}
+        self.eco = None
+
+
+def error_a(msg='a'):
+    raise RuntimeError(msg)
+
+
+def error_b():
+    raise ValueError('b')
+
+
+def _action(message):
+    """
+    return the action of the summary message of an error
+    """
+    return message.rsplit('Action: ', 1)[1]
+
+
+def capture(func, *args):
+    try:
+        func(*args)
+    except:
+        return sys.exc_info()
+
+
+class TestEcoAggregator(unittest.TestCase):
+
+    def setUp(self):
+        self.aggregator = EcoAggregator(interval=0.2, size=10)
+        # (action name, occurrences) of the errors and summaries reported
+        self.emitted = []
+        patcher = mock.patch.multiple(
+            self.aggregator,
+            _emit=lambda task, exc_type, exc, tb, occurrences: self.emitted.append((task.action_name, occurrences)),
+            _emit_summary=lambda message, payload, occurrences: self.emitted.append((_action(message), occurrences)))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_fingerprint(self):
+        task = FakeTask()
+        exc_type, _, tb = capture(error_a, 'first message')
+        fp1 = self.aggregator.fingerprint(task, exc_type, tb)
+        exc_type, _, tb = capture(error_a, 'second message')
+        fp2 = self.aggregator.fingerprint(task, exc_type, tb)
+        self.assertEqual(fp1, fp2, "same error with different message should have the same fingerprint")
+
+        exc_type, _, tb = capture(error_b)
+        self.assertNotEqual(fp1, self.aggregator.fingerprint(task, exc_type, tb),
+                            "errors raised from different location should have different fingerprint")
+
+        exc_type, _, tb = capture(error_a)
+        self.assertNotEqual(fp1, self.aggregator.fingerprint(FakeTask('bar'), exc_type, tb),
+                            "errors raised from different action should have different fingerprint")
+
+    def test_dedup(self):
+        task = FakeTask()
+        for _ in range(100):
+            self.aggregator.report(task, *capture(error_a))
+        self.aggregator.report(task, *capture(error_b))
+
+        self.assertEqual(len(self.emitted), 2, "only the first occurrence of each error should be reported")
+        self.assertEqual(len(self.aggregator._entries), 2)
+
+    def test_flush(self):
+        task = FakeTask()
+        for _ in range(10):
+            self.aggregator.report(task, *capture(error_a))
+        self.assertEqual(len(self.emitted), 1)
+
+        self.aggregator.flush()
+        self.assertEqual(len(self.emitted), 1, "summary should not be sent before the end of the interval")
+
+        time.sleep(0.25)
+        self.aggregator.flush()
+        self.assertEqual(len(self.emitted), 2, "summary should be sent after the interval")
+        occurrences = self.emitted[-1][1]
+        self.assertEqual(occurrences, 9, "summary should contain the number of occurrences not reported yet")
+
+        self.aggregator.flush()
+        self.assertEqual(len(self.emitted), 2, "no summary should be sent when no new error happened")
+
+    def test_report_after_interval(self):
+        task = FakeTask()
+        for _ in range(3):
+            self.aggregator.report(task, *capture(error_a))
+        time.sleep(0.25)
+        self.aggregator.report(task, *capture(error_a))
+
+        self.assertEqual(len(self.emitted), 2)
+        occurrences = self.emitted[-1][1]
+        self.assertEqual(occurrences, 3, "report should include the occurrences not reported yet")
+
+    def test_lru(self):
+        self.aggregator.size = 2
+        fp_a = self.aggregator.report(FakeTask('a'), *capture(error_a))
+        fp_b = self.aggregator.report(FakeTask('b'), *capture(error_a))
+        # touch a, so b is the least recently seen
+        self.aggregator.report(FakeTask('a'), *capture(error_a))
+        fp_c = self.aggregator.report(FakeTask('c'), *capture(error_a))
+
+        self.assertEqual(list(self.aggregator._entries.keys()), [fp_a, fp_c])
+
+    def test_lru_summary(self):
+        self.aggregator.size = 1
+        for _ in range(3):
+            self.aggregator.report(FakeTask('a'), *capture(error_a))
+        self.aggregator.report(FakeTask('b'), *capture(error_a))
+
+        self.assertEqual(len(self.emitted), 3, "summary of the evicted error should be sent")
+        self.assertEqual(self.emitted[1], ('a', 2))
+
+    def test_window_per_error(self):
+        self.aggregator.start()
+        self.addCleanup(self.aggregator.stop)
+
+        for _ in range(2):
+            self.aggregator.report(FakeTask('a'), *capture(error_a))
+        gevent.sleep(0.1)
+        for _ in range(2):
+            self.aggregator.report(FakeTask('b'), *capture(error_a))
+        self.assertEqual(len(self.emitted), 2)
+
+        # the interval of a is over, not the one of b
+        gevent.sleep(0.15)
+        self.assertEqual(len(self.emitted), 3, "summary should be sent at the end of the interval of the error")
+        self.assertEqual(self.emitted[-1][0], 'a')
+
+        gevent.sleep(0.1)
+        self.assertEqual(len(self.emitted), 4)
+        self.assertEqual(self.emitted[-1][0], 'b')
+
+    def test_no_reference(self):
+        task = FakeTask()
+        ref = weakref.ref(task)
+        for _ in range(3):
+            self.aggregator.report(task, *capture(error_a))
+        del task
+        gc.collect()
+        self.assertIsNone(ref(), "pending errors should not keep their task alive")
+
+        entry = list(self.aggregator._entries.values())[0]
+        self.assertEqual(entry.suppressed, 2)
+        self.assertIsInstance(entry.message, str)
+        self.assertIsNone(entry.payload, "a task without service or eco has no web hook payload")
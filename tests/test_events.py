@@ -0,0 +1,82 @@
+import json
+import unittest
+
+from zerorobot.events import (EVENT_STATE_SET, EVENT_TASK_CREATED, EventBus)
+from zerorobot.template_uid import TemplateUID
+
+
+class FakeService:
+
+    def __init__(self, guid, template_uid):
+        self.guid = guid
+        self.name = guid
+        self.template_uid = TemplateUID.parse(template_uid)
+
+
+class TestEventBus(unittest.TestCase):
+
+    def setUp(self):
+        self.bus = EventBus()
+        self.node = FakeService('node1', 'github.com/zero-os/0-robot/node/0.0.1')
+        self.vm = FakeService('vm1', 'github.com/zero-os/0-robot/vm/0.0.1')
+
+    def test_publish_without_subscriber(self):
+        # should be a no-op
+        self.bus.publish(EVENT_TASK_CREATED, self.node, task_guid='abc')
+
+    def test_subscribe(self):
+        sub = self.bus.subscribe()
+        self.bus.publish(EVENT_TASK_CREATED, self.node, task_guid='abc', action_name='start')
+
+        event = sub.get(timeout=1)
+        self.assertEqual(event.kind, EVENT_TASK_CREATED)
+        payload = json.loads(event.payload)
+        self.assertEqual(payload['service_guid'], 'node1')
+        self.assertEqual(payload['template_uid'], 'github.com/zero-os/0-robot/node/0.0.1')
+        self.assertEqual(payload['data'], {'task_guid': 'abc', 'action_name': 'start'})
+
+        self.assertIsNone(sub.get(timeout=0.1), "no more event should be received")
+
+        sub.close()
+        self.assertEqual(len(self.bus._subscriptions), 0)
+
+    def test_filters(self):
+        by_guid = self.bus.subscribe(service_guids=['vm1'])
+        by_uid = self.bus.subscribe(templates=['github.com/zero-os/0-robot/node/0.0.1'])
+        by_name = self.bus.subscribe(templates=['vm'])
+
+        self.bus.publish(EVENT_STATE_SET, self.node, category='actions', tag='install', state='ok')
+        self.bus.publish(EVENT_STATE_SET, self.vm, category='actions', tag='install', state='ok')
+
+        self.assertEqual(by_guid.get(timeout=0.1).service_guid, 'vm1')
+        self.assertIsNone(by_guid.get(timeout=0.1))
+        self.assertEqual(by_uid.get(timeout=0.1).service_guid, 'node1')
+        self.assertIsNone(by_uid.get(timeout=0.1))
+        self.assertEqual(by_name.get(timeout=0.1).service_guid, 'vm1')
+        self.assertIsNone(by_name.get(timeout=0.1))
+
+    def test_slow_subscriber(self):
+        sub = self.bus.subscribe(queue_size=2)
+        for i in range(5):
+            # a full queue should never block the publisher
+            self.bus.publish(EVENT_TASK_CREATED, self.node, task_guid=str(i))
+
+        received = [json.loads(sub.get(timeout=0.1).payload)['data']['task_guid'] for _ in range(2)]
+        self.assertEqual(received, ['0', '1'])
+        self.assertIsNone(sub.get(timeout=0.1))
+
+    def test_allow(self):
+        allowed = {'node1'}
+        sub = self.bus.subscribe(allow=lambda guid: guid in allowed)
+
+        self.bus.publish(EVENT_TASK_CREATED, self.vm, task_guid='1')
+        self.bus.publish(EVENT_TASK_CREATED, self.node, task_guid='2')
+        self.assertEqual(sub.get(timeout=0.1).service_guid, 'node1', "events of services not allowed should be skipped")
+
+        # access is checked when the event is sent, not when it is published
+        self.bus.publish(EVENT_TASK_CREATED, self.vm, task_guid='3')
+        allowed.add('vm1')
+        self.assertEqual(sub.get(timeout=0.1).service_guid, 'vm1')
+        allowed.clear()
+        self.bus.publish(EVENT_TASK_CREATED, self.node, task_guid='4')
+        self.assertIsNone(sub.get(timeout=0.1))
@@ -0,0 +1,128 @@
+import unittest
+from collections import deque
+
+import gevent
+from gevent.queue import Empty
+
+from zerorobot import config
+from zerorobot.executor import Executor
+
+
+class FakeTaskList:
+
+    def __init__(self, tasks):
+        self.tasks = deque(tasks)
+
+    def get(self, block=True):
+        if not self.tasks:
+            raise Empty()
+        return self.tasks.popleft()
+
+    def empty(self):
+        return len(self.tasks) == 0
+
+
+class FakeService:
+
+    def __init__(self, name, tasks, executed, duration=0):
+        self.name = name
+        self.task_list = FakeTaskList(tasks)
+        self.executed = executed
+        self.duration = duration
+        self.running = 0
+        self.max_running = 0
+
+    def _execute(self, task):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        gevent.sleep(self.duration)
+        self.executed.append((self.name, task))
+        self.running -= 1
+
+
+class TestExecutor(unittest.TestCase):
+
+    def setUp(self):
+        config.SERVICE_LOADED.set()
+
+    def tearDown(self):
+        config.SERVICE_LOADED.clear()
+
+    def run_all(self, executor, services):
+        for service in services:
+            executor.notify(service)
+        while executor._active:
+            gevent.sleep(0.01)
+        executor.stop()
+
+    def test_fairness(self):
+        executed = []
+        a = FakeService('a', [1, 2, 3], executed)
+        b = FakeService('b', [1, 2], executed)
+        self.run_all(Executor(1), [a, b])
+        self.assertEqual(executed, [('a', 1), ('b', 1), ('a', 2), ('b', 2), ('a', 3)],
+                         "services should take turns and their tasks should be executed in order")
+
+    def test_one_task_per_service(self):
+        executed = []
+        services = [FakeService(str(i), list(range(5)), executed, duration=0.01) for i in range(3)]
+        # more workers than services, a service should still never run 2 tasks at once
+        self.run_all(Executor(10), services)
+        self.assertEqual(len(executed), 15)
+        for service in services:
+            self.assertEqual(service.max_running, 1)
+            self.assertEqual([t for name, t in executed if name == service.name], list(range(5)))
+
+    def test_concurrency(self):
+        running = []
+        peak = [0]
+
+        class CountingService(FakeService):
+
+            def _execute(self, task):
+                running.append(task)
+                peak[0] = max(peak[0], len(running))
+                gevent.sleep(0.01)
+                running.remove(task)
+
+        services = [CountingService(str(i), [i], []) for i in range(10)]
+        self.run_all(Executor(3), services)
+        self.assertEqual(peak[0], 3, "at most 3 tasks should run at the same time")
+
+    def test_paused(self):
+        executed = []
+        service = FakeService('a', [1, 2], executed)
+        service._paused = True
+        executor = Executor(2)
+        self.run_all(executor, [service])
+        self.assertEqual(executed, [], "paused service should not execute its tasks")
+
+        service._paused = False
+        self.run_all(executor, [service])
+        self.assertEqual(executed, [('a', 1), ('a', 2)])
+
+    def test_not_shared(self):
+        executor = Executor(0)
+        self.assertFalse(executor.shared)
+        executor.notify(FakeService('a', [1], []))
+        self.assertEqual(len(executor._active), 0)
+        self.assertEqual(executor._workers, [])
+
+        with self.assertRaises(ValueError):
+            executor.configure(-1)
+
+    def test_stop(self):
+        config.SERVICE_LOADED.clear()
+        executor = Executor(2)
+        service = FakeService('a', [1], [])
+        executor.notify(service)
+        self.assertIn(service, executor._active)
+
+        executor.stop()
+        self.assertEqual(len(executor._active), 0, "stop should forget the queued services")
+        self.assertEqual(executor._ready.qsize(), 0)
+
+        # once notified again, the service is executed by the new workers
+        config.SERVICE_LOADED.set()
+        self.run_all(executor, [service])
+        self.assertEqual(service.executed, [('a', 1)])
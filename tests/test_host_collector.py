@@ -0,0 +1,68 @@
+import unittest
+from unittest import mock
+
+import psutil
+from prometheus_client import CollectorRegistry, Gauge, generate_latest
+
+from zerorobot.prometheus.host.collector import HostCollector
+
+
+def _legacy_registry():
+    """
+    registry where every host gauge re-reads its source,
+    like the host metrics used to be exposed
+    """
+    registry = CollectorRegistry()
+    for name in ['total', 'cached', 'inactive', 'active', 'buffers', 'free', 'used']:
+        g = Gauge('host_memory_%s_bytes' % name, '', registry=registry)
+        g.set_function(lambda name=name: getattr(psutil.virtual_memory(), name))
+    for name in ['bytes_sent', 'bytes_recv', 'packets_sent', 'packets_recv', 'errin', 'errout', 'dropin', 'dropout']:
+        g = Gauge('network_%s' % name, '', registry=registry)
+        g.set_function(lambda name=name: getattr(psutil.net_io_counters(), name))
+    for name in ['total', 'free', 'used', 'percent']:
+        g = Gauge('host_disk_%s' % name, '', registry=registry)
+        g.set_function(lambda name=name: getattr(psutil.disk_usage('/'), name))
+    return registry
+
+
+def _scrape_reads(registry):
+    """
+    return the number of reads of the host sources done by a scrape of registry
+    """
+    with mock.patch('psutil.virtual_memory', wraps=psutil.virtual_memory) as virtual_memory, \
+            mock.patch('psutil.net_io_counters', wraps=psutil.net_io_counters) as net_io_counters, \
+            mock.patch('psutil.disk_usage', wraps=psutil.disk_usage) as disk_usage:
+        generate_latest(registry)
+    return virtual_memory.call_count + net_io_counters.call_count + disk_usage.call_count
+
+
+class TestHostCollector(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = CollectorRegistry()
+        self.registry.register(HostCollector())
+
+    def test_single_read_per_scrape(self):
+        with mock.patch('psutil.virtual_memory', wraps=psutil.virtual_memory) as virtual_memory, \
+                mock.patch('psutil.net_io_counters', wraps=psutil.net_io_counters) as net_io_counters, \
+                mock.patch('psutil.disk_usage', wraps=psutil.disk_usage) as disk_usage:
+            generate_latest(self.registry)
+
+        self.assertEqual(virtual_memory.call_count, 1, "memory info should be read once per scrape")
+        self.assertEqual(net_io_counters.call_count, 1, "network counters should be read once per scrape")
+        self.assertEqual(disk_usage.call_count, 1, "disk usage should be read once per scrape")
+
+    def test_interface_labels(self):
+        pernic = psutil.net_io_counters(pernic=True)
+        for interface, counters in pernic.items():
+            value = self.registry.get_sample_value('network_bytes_sent_int', {'interface': interface})
+            self.assertIsNotNone(value, "interface %s should be exposed" % interface)
+            # counters keep increasing between two reads, a sample can only be smaller or equal
+            self.assertLessEqual(value, psutil.net_io_counters(pernic=True)[interface].bytes_sent)
+            self.assertGreaterEqual(value, counters.bytes_sent)
+
+    def test_benchmark_scrape(self):
+        legacy = _scrape_reads(_legacy_registry())
+        batched = _scrape_reads(self.registry)
+        self.assertEqual(legacy, 19, "the legacy gauges read their source once per gauge")
+        self.assertLess(batched, legacy, "batched collector should read the host sources less than one read per gauge")
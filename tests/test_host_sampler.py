@@ -0,0 +1,55 @@
+import unittest
+from unittest import mock
+
+import gevent
+from prometheus_client import CollectorRegistry, generate_latest
+
+from zerorobot.prometheus.host import monitor_host_metrics
+from zerorobot.prometheus.host.linux import cpu_stat
+from zerorobot.prometheus.host.sampler import HostSampler, host_sampler
+
+
+class TestHostSampler(unittest.TestCase):
+
+    def setUp(self):
+        self.sampler = HostSampler(interval=0.1)
+
+    def tearDown(self):
+        self.sampler.stop()
+        host_sampler.stop()
+
+    def test_start_stop(self):
+        self.assertFalse(self.sampler.is_running)
+        self.sampler.start()
+        self.assertTrue(self.sampler.is_running)
+        self.sampler.stop()
+        gevent.sleep(0)
+        self.assertFalse(self.sampler.is_running)
+
+    def test_rates(self):
+        self.sampler.start()
+        gevent.sleep(0.35)
+
+        percents = self.sampler.cpu_percents()
+        self.assertEqual(set(percents.keys()), set(cpu_stat.CPU_MODES))
+        for value in percents.values():
+            self.assertGreaterEqual(value, 0)
+            self.assertLessEqual(value, 100)
+        self.assertGreaterEqual(self.sampler.disk_reads_persec(), 0)
+        self.assertGreaterEqual(self.sampler.disk_writes_persec(), 0)
+
+    def test_cpu_percents_no_deltas(self):
+        percents = cpu_stat.cpu_percents_from_deltas([0] * len(cpu_stat.CPU_MODES))
+        self.assertEqual(percents, {mode: 0.0 for mode in cpu_stat.CPU_MODES})
+
+    def test_scrape_reads(self):
+        registry = CollectorRegistry()
+        monitor_host_metrics(registry=registry)
+
+        with mock.patch.object(host_sampler, 'sample', wraps=host_sampler.sample) as sample, \
+                mock.patch.object(cpu_stat, 'cpu_times', wraps=cpu_stat.cpu_times) as cpu_times:
+            generate_latest(registry)
+            generate_latest(registry)
+
+        self.assertEqual(sample.call_count, 0, "scrapes should use the rates of the last sample instead of sampling")
+        self.assertEqual(cpu_times.call_count, 0, "scrapes should not read the cpu counters")
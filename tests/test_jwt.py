@@ -1,7 +1,10 @@
+import time
 import unittest
+from unittest import mock
 
 from js9 import j
 from zerorobot.server.auth import user_jwt
+from zerorobot.server.auth.token_cache import TokenCache
 
 
 class TestJWT(unittest.TestCase):
@@ -25,3 +28,66 @@ class TestJWT(unittest.TestCase):
         assert not user_jwt.verify('0000', token), "wrong service guid should return False"
         assert not user_jwt.verify('12345', None), "no token should return false"
         assert not user_jwt.verify('12345', ''), "no token should return false"
+
+    def test_verify_cached(self):
+        token = user_jwt.create({"service_guid": "12345"})
+        user_jwt._verified.clear()
+
+        assert user_jwt.verify('12345', token)
+        assert len(user_jwt._verified) == 1, "verified token should be cached"
+
+        with mock.patch.object(user_jwt.jwt, 'decode', wraps=user_jwt.jwt.decode) as decode:
+            for _ in range(10):
+                assert user_jwt.verify('12345', token)
+            assert not user_jwt.verify('0000', token), "cached token should still be checked against the service guid"
+        assert decode.call_count == 0, "verifying a cached token should not decode it again"
+
+    def test_key_change(self):
+        token = user_jwt.create({"service_guid": "12345"})
+        assert user_jwt.verify('12345', token)
+
+        # simulate a change of the signing key
+        user_jwt._key_stat = None
+        user_jwt._get_key()
+        assert len(user_jwt._verified) == 0, "cache should be cleared when the key changes"
+
+    def test_owner_secret_expiration(self):
+        secret, owner_secret = user_jwt.create_service_secrets('12345', 'owner')
+        assert user_jwt.verify('12345', secret)
+        assert user_jwt.verify_owner('owner', owner_secret)
+        assert 'exp' not in user_jwt.decode(secret), "service secret should not expire"
+        assert user_jwt.decode(owner_secret)['exp'] > time.time()
+
+        ttl = user_jwt.owner_secret_ttl
+        user_jwt.owner_secret_ttl = -1
+        try:
+            _, expired = user_jwt.create_service_secrets('12345', 'owner')
+        finally:
+            user_jwt.owner_secret_ttl = ttl
+        assert not user_jwt.verify_owner('owner', expired), "expired owner secret should be refused"
+
+
+class TestTokenCache(unittest.TestCase):
+
+    def test_expiration(self):
+        cache = TokenCache()
+        cache.set('valid', {'exp': time.time() + 60, 'scope': ['foo']})
+        cache.set('expired', {'exp': time.time() - 1})
+        cache.set('noexp', {'service_guid': '1234'})
+
+        assert cache.get('valid')['scope'] == ['foo']
+        assert cache.get('expired') is None, "expired token should not be returned"
+        assert cache.get('noexp') == {'service_guid': '1234'}
+        assert cache.get('unknown') is None
+
+    def test_lru(self):
+        cache = TokenCache(size=2)
+        cache.set('a', {})
+        cache.set('b', {})
+        cache.get('a')
+        cache.set('c', {})
+
+        assert len(cache) == 2
+        assert cache.get('b') is None, "least recently used token should be evicted"
+        assert cache.get('a') is not None
+        assert cache.get('c') is not None
@@ -0,0 +1,63 @@
+import unittest
+import uuid
+
+from flask import Flask
+from prometheus_client import CollectorRegistry
+
+from zerorobot.prometheus.flask import (OTHER_ENDPOINT, UNMATCHED_ENDPOINT,
+                                        monitor_http_requests)
+
+
+def _series(registry):
+    return [(metric.name, sample[1]) for metric in registry.collect() for sample in metric.samples]
+
+
+class TestHTTPMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+
+        @self.app.route('/services/<service_guid>/task_list/<task_guid>')
+        def get_task(service_guid, task_guid):
+            return 'ok'
+
+        @self.app.route('/templates')
+        def list_templates():
+            return 'ok'
+
+        self.registry = CollectorRegistry()
+        self.client = self.app.test_client()
+
+    def test_constant_cardinality(self):
+        monitor_http_requests(self.app, registry=self.registry)
+
+        self.client.get('/services/%s/task_list/%s' % (uuid.uuid4(), uuid.uuid4()))
+        nr_series = len(_series(self.registry))
+
+        for _ in range(10000):
+            self.client.get('/services/%s/task_list/%s' % (uuid.uuid4(), uuid.uuid4()))
+        self.assertEqual(len(_series(self.registry)), nr_series)
+
+        endpoints = {labels['endpoint'] for name, labels in _series(self.registry) if 'endpoint' in labels}
+        self.assertEqual(endpoints, {'/services/<service_guid>/task_list/<task_guid>'})
+
+    def test_unmatched(self):
+        monitor_http_requests(self.app, registry=self.registry)
+
+        for _ in range(100):
+            self.client.get('/%s' % uuid.uuid4())
+        self.client.open('/templates', method='FOO')
+
+        labels = [labels for name, labels in _series(self.registry) if name == 'http_request_count']
+        self.assertEqual(
+            {(l['method'], l['endpoint'], l['http_status']) for l in labels},
+            {('GET', UNMATCHED_ENDPOINT, '404'), ('other', UNMATCHED_ENDPOINT, '405')})
+
+    def test_max_endpoints(self):
+        monitor_http_requests(self.app, registry=self.registry, max_endpoints=1)
+
+        self.client.get('/templates')
+        self.client.get('/services/a/task_list/b')
+
+        endpoints = {labels['endpoint'] for name, labels in _series(self.registry) if name == 'http_request_count'}
+        self.assertEqual(endpoints, {'/templates', OTHER_ENDPOINT})
@@ -77,6 +77,26 @@ class TestServiceCollection(unittest.TestCase):
         for s in results:
             self.assertIn(s.guid, guids)
 
+    def test_find_many(self):
+        s1 = FakeService('1111', 's1')
+        s2 = FakeService('2222', 's2')
+        s3 = FakeService2('3333', 's1')
+        scol.add(s1)
+        scol.add(s2)
+        scol.add(s3)
+
+        queries = [
+            {'name': 's1'},
+            {'name': 's1', 'template_name': 'other'},
+            {'name': 'nan'},
+            {'template_name': 'fakeservice'},
+            {},
+        ]
+        results = scol.find_many(queries)
+        self.assertEqual(len(results), len(queries))
+        for query, result in zip(queries, results):
+            self.assertEqual(sorted(s.guid for s in result), sorted(s.guid for s in scol.find(**query)))
+
     def test_set_service_public(self):
         s1 = FakeService('111', 's1')
         scol.add(s1)
@@ -0,0 +1,31 @@
+import unittest
+
+from zerorobot.template.data import diff
+
+
+class TestServiceDataDiff(unittest.TestCase):
+
+    def test_diff_identical(self):
+        current = {'ip': '127.0.0.1', 'port': 80, 'list': [1, 2], 'sub': {'foo': 'bar'}}
+        self.assertEqual(diff(current, dict(current)), {})
+        self.assertEqual(diff(current, {}), {}, "keys missing from the new data are not changes")
+        self.assertEqual(diff(current, {'port': 80}), {})
+
+    def test_diff_changed(self):
+        current = {'ip': '127.0.0.1', 'port': 80, 'list': [1, 2]}
+        self.assertEqual(diff(current, {'ip': '10.0.0.1', 'port': 80}), {'ip': '10.0.0.1'})
+        self.assertEqual(diff(current, {'list': [2, 1]}), {'list': [2, 1]})
+        self.assertEqual(diff(current, {'new': 'value'}), {'new': 'value'})
+
+    def test_diff_nested(self):
+        current = {'sub': {'foo': 'bar', 'nested': {'a': 1, 'b': 2}}}
+        self.assertEqual(diff(current, {'sub': {'foo': 'bar', 'nested': {'a': 1, 'b': 2}}}), {})
+        self.assertEqual(
+            diff(current, {'sub': {'foo': 'bar', 'nested': {'a': 1, 'b': 3}}}),
+            {'sub': {'nested': {'b': 3}}},
+            "only the nested values that changed should be reported")
+        self.assertEqual(
+            diff(current, {'sub': {'foo': 'bar'}}),
+            {'sub': {'foo': 'bar'}},
+            "a nested dict with keys removed should be reported as a whole")
+        self.assertEqual(diff(current, {'sub': 'string'}), {'sub': 'string'})
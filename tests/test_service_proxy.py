@@ -6,7 +6,9 @@ import os
 import shutil
 import unittest
 import uuid
+from unittest import mock
 
+import gevent
 
 from js9 import j
 from JumpScale9.errorhandling.ErrorConditionObject import ErrorConditionObject
@@ -15,8 +17,34 @@ from zerorobot import template_collection as tcol
 from zerorobot import config
 from zerorobot.dsl.ZeroRobotManager import ZeroRobotManager
 from zerorobot.robot import Robot
-from zerorobot.service_proxy import ServiceProxy
-from zerorobot.task.task import TASK_STATE_ERROR, TASK_STATE_OK
+from zerorobot.service_proxy import ServiceProxy, TaskProxy
+from zerorobot.task.task import TASK_STATE_ERROR, TASK_STATE_OK, TASK_STATE_RUNNING
+
+
+class TestTaskProxyWait(unittest.TestCase):
+
+    def test_wait_ignored(self):
+        # an older robot ignores wait and returns the state of the task right away
+        states = [TASK_STATE_RUNNING, TASK_STATE_RUNNING, TASK_STATE_OK]
+        calls = []
+
+        def get_task(task_guid, service_guid, query_params=None):
+            calls.append(query_params)
+            task = mock.MagicMock(duration=None, result=None, eco=None)
+            task.state.value = states[len(calls) - 1]
+            return task, None
+
+        service = mock.MagicMock(guid='service')
+        service._zrobot_client.api.services.GetTask = get_task
+        task = TaskProxy('task', service, 'start', {}, 0)
+        with mock.patch('zerorobot.service_proxy.gevent.sleep') as sleep:
+            task.wait(timeout=10)
+
+        self.assertEqual(task.state, TASK_STATE_OK)
+        self.assertEqual(len(calls), 3)
+        self.assertIn('wait', calls[0])
+        self.assertEqual(sleep.call_args_list, [mock.call(0.5)] * 2,
+                         "should back off between the requests answered before the end of the wait")
 
 
 class TestServiceProxy(unittest.TestCase):
@@ -106,6 +134,39 @@ class TestServiceProxy(unittest.TestCase):
         with self.assertRaises(ErrorConditionObject, message='task.wait should raise if state is error and die is True'):
             proxy_task.wait(die=True)
 
+    def test_task_wait_long_poll(self):
+        proxy, service = self._create_proxy()
+
+        def slow():
+            gevent.sleep(1)
+
+        service.slow = slow
+        services_api = proxy._zrobot_client.api.services
+        get_task = services_api.GetTask
+        calls = []
+
+        def counting_get_task(*args, **kwargs):
+            calls.append(kwargs.get('query_params'))
+            return get_task(*args, **kwargs)
+
+        services_api.GetTask = counting_get_task
+        try:
+            task = service.schedule_action('slow')
+            proxy_task = proxy.task_list.get_task_by_guid(task.guid)
+            del calls[:]
+            proxy_task.wait(timeout=10)
+        finally:
+            services_api.GetTask = get_task
+
+        self.assertEqual(proxy_task.state, TASK_STATE_OK)
+        self.assertEqual(len(calls), 1, "waiting on a task should be done with a single long-poll request")
+        self.assertIn('wait', calls[0])
+
+        task = service.schedule_action('slow')
+        proxy_task = proxy.task_list.get_task_by_guid(task.guid)
+        with self.assertRaises(TimeoutError):
+            proxy_task.wait(timeout=0.2)
+
     def test_delete(self):
         proxy, service = self._create_proxy()
         proxy.delete()
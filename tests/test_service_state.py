@@ -101,3 +101,21 @@ class TestServiceState(unittest.TestCase):
         state.set('network', 'tcp-80', 'ok')
         state.delete('noexsits')
         state.delete('network', 'noexists')
+
+    def test_on_change(self):
+        changes = []
+        state = ServiceState(on_change=lambda *args: changes.append(args))
+        state.set('network', 'tcp-80', 'ok')
+        state.set('network', 'tcp-80', 'ok')
+        state.set('network', 'tcp-80', 'error')
+        state.set('network', 'tcp-81', 'ok')
+        state.delete('network', 'tcp-80')
+        state.delete('network')
+
+        self.assertEqual(changes, [
+            ('network', 'tcp-80', 'ok'),
+            ('network', 'tcp-80', 'error'),
+            ('network', 'tcp-81', 'ok'),
+            ('network', 'tcp-80', None),
+            ('network', 'tcp-81', None),
+        ], "only actual changes should be notified")
@@ -2,18 +2,26 @@
 from gevent import monkey
 monkey.patch_all(subprocess=False)
 
+import gc
 import glob
 import os
 import shutil
 import tempfile
+import time
+import tracemalloc
 import unittest
 
+import gevent
+
 
 from js9 import j
 from zerorobot import service_collection as scol
 from zerorobot import template_collection as tcol
 from zerorobot import config
+from zerorobot.executor import executor
 from zerorobot.service_collection import BadTemplateError
+from zerorobot.task import TASK_STATE_NEW
+from zerorobot.task.storage import sqlite as task_storage
 from zerorobot.template.base import (ActionNotFoundError,
                                      BadActionArgumentError, TemplateBase)
 from zerorobot.template_collection import _load_template
@@ -187,6 +195,19 @@ class TestServiceTemplate(unittest.TestCase):
         # should be a noop and not fail if data is None
         srv.data.update_secure(None)
 
+    def test_update_secure_same_data(self):
+        Node = self.load_template('node_updatedata')
+        srv = tcol.instantiate_service(Node, 'testnode', {'ip': '127.0.0.1'})
+
+        self.assertIsNone(srv.data.update_secure(data={'ip': '127.0.0.1'}),
+                          "should not schedule update_data if the data doesn't change")
+        self.assertEqual(srv.data.diff({'ip': '127.0.0.1', 'port': 80}), {'port': 80})
+
+        task = srv.data.update_secure(data={'ip': '127.0.0.1', 'port': 80})
+        task.wait()
+        self.assertEqual(task.action_name, 'update_data')
+        self.assertEqual(srv.data['port'], 80)
+
     def test_update_secure_overwrite(self):
         Node = self.load_template('node_updatedata')
         srv = tcol.instantiate_service(Node, 'testnode')
@@ -206,6 +227,164 @@ class TestServiceTemplate(unittest.TestCase):
         gl = srv.gl_mgr.get('recurring_monitor')
         self.assertTrue(gl.started)
 
+    def test_hibernate(self):
+        config.SERVICE_LOADED.set()
+        try:
+            Node = self.load_template('node')
+            srv = tcol.instantiate_service(Node, 'testnode', {'ip': '127.0.0.1'})
+            srv.state.set('actions', 'install', 'ok')
+            gevent.sleep(0.1)  # let the first recurring save run
+
+            self.assertEqual(scol.hibernate_idle(3600), 0, "service has just been created, it is not idle")
+            self.assertEqual(scol.hibernate_idle(0), 1)
+            self.assertEqual(scol.count_hibernated(), 1)
+            self.assertEqual(scol.list_services(hibernated=False), [])
+
+            stub = scol.list_services()[0]
+            self.assertIsInstance(stub, scol.ServiceStub)
+            self.assertEqual(stub.name, 'testnode')
+            self.assertTrue(stub.state.check('actions', 'install', 'ok'))
+            self.assertFalse(scol.is_service_public(srv.guid))
+            self.assertIs(scol.find(wake=False, name='testnode')[0], stub, "listing should not rehydrate the service")
+            self.assertIs(scol.get_by_guid(srv.guid, wake=False), stub)
+            self.assertIsNone(scol.get_service_owner(srv.guid))
+            self.assertEqual(scol.count_hibernated(), 1, "reading the owner or the public flag should not rehydrate the service")
+
+            # lookup rehydrates the service
+            woken = scol.get_by_guid(srv.guid)
+            self.assertIsInstance(woken, Node)
+            self.assertIsNot(woken, srv)
+            self.assertEqual(woken.data['ip'], '127.0.0.1')
+            self.assertTrue(woken.state.check('actions', 'install', 'ok'))
+            self.assertEqual(scol.count_hibernated(), 0)
+
+            # scheduling an action on a stale reference rehydrates the service
+            gevent.sleep(0.1)
+            self.assertTrue(scol.hibernate(woken))
+            task = srv.schedule_action('foo', args={'bar': 'foo'})
+            task.wait()
+            self.assertEqual(task.result, 'result')
+            self.assertEqual(scol.count_hibernated(), 0)
+
+            # changing the state of a stub rehydrates the service
+            gevent.sleep(0.1)
+            self.assertTrue(scol.hibernate(scol.get_by_guid(srv.guid)))
+            scol.list_services()[0].state.set('actions', 'start', 'ok')
+            self.assertTrue(scol.get_by_guid(srv.guid).state.check('actions', 'start', 'ok'))
+
+            # changes made through a reference on a hibernated instance go to the rehydrated service
+            gevent.sleep(0.1)
+            live = scol.get_by_guid(srv.guid)
+            categories = live.state.categories
+            self.assertTrue(scol.hibernate(live))
+            stub = scol.list_services()[0]
+            self.assertIsNot(stub.state.categories, categories, "stub should not share the state of the hibernated instance")
+            self.assertEqual(stub.state.categories, categories)
+            live.state.set('actions', 'stop', 'ok')
+            live.data['ip'] = '10.0.0.1'
+            woken = scol.get_by_guid(srv.guid)
+            self.assertIsNot(woken, live)
+            self.assertTrue(woken.state.check('actions', 'stop', 'ok'))
+            self.assertEqual(woken.data['ip'], '10.0.0.1')
+            with self.assertRaises(AttributeError):
+                live.nonexistent
+
+            # upgrading a hibernated service rehydrates it
+            gevent.sleep(0.1)
+            self.assertTrue(scol.hibernate(woken))
+            upgraded = scol.upgrade(scol.list_services()[0], Node, force=True)
+            self.assertIsInstance(upgraded, Node)
+            self.assertEqual(upgraded.data['ip'], '10.0.0.1')
+            self.assertEqual(scol.count_hibernated(), 0)
+        finally:
+            for service in scol.list_services(hibernated=False):
+                service.gl_mgr.stop_all()
+            config.SERVICE_LOADED.clear()
+
+    def test_trim_hibernated_tasks(self):
+        config.SERVICE_LOADED.set()
+        try:
+            Node = self.load_template('node')
+            srv = tcol.instantiate_service(Node, 'testnode')
+            srv.schedule_action('start').wait()
+            gevent.sleep(0.1)
+            self.assertEqual(srv.task_list._done.count(), 1)
+            self.assertTrue(scol.hibernate(srv))
+
+            task_storage.delete_until(scol.list_services()[0]._path, time.time() + 1)
+            self.assertEqual(scol.get_by_guid(srv.guid).task_list._done.count(), 0)
+        finally:
+            for service in scol.list_services(hibernated=False):
+                service.gl_mgr.stop_all()
+            config.SERVICE_LOADED.clear()
+
+    def test_hibernate_busy(self):
+        config.SERVICE_LOADED.set()
+        try:
+            tmpl = self.load_template('recurring')
+            srv = tcol.instantiate_service(tmpl, 'foo')
+            self.assertFalse(scol.can_hibernate(srv), "service with recurring actions should not be hibernated")
+
+            Node = self.load_template('node')
+            srv = tcol.instantiate_service(Node, 'testnode')
+            srv.gl_mgr.stop('executor')
+            srv.schedule_action('start')
+            self.assertFalse(scol.hibernate(srv), "service with tasks waiting should not be hibernated")
+        finally:
+            for service in scol.list_services(hibernated=False):
+                service.gl_mgr.stop_all()
+            config.SERVICE_LOADED.clear()
+
+    def test_benchmark_hibernate_memory(self):
+        config.SERVICE_LOADED.set()
+        count = 100
+        try:
+            Node = self.load_template('node')
+            tracemalloc.start()
+            gc.collect()
+            start = tracemalloc.get_traced_memory()[0]
+            for i in range(count):
+                tcol.instantiate_service(Node, 'node%d' % i)
+            gevent.sleep(0.1)
+            gc.collect()
+            live = tracemalloc.get_traced_memory()[0] - start
+
+            self.assertEqual(scol.hibernate_idle(0), count)
+            gc.collect()
+            hibernated = tracemalloc.get_traced_memory()[0] - start
+        finally:
+            tracemalloc.stop()
+            config.SERVICE_LOADED.clear()
+
+        self.assertLess(hibernated, live / 2, "hibernated services should use less than half the memory of live ones")
+
+    def test_shared_executor(self):
+        config.SERVICE_LOADED.set()
+        executor.configure(2)
+        try:
+            Node = self.load_template('node')
+            srv = tcol.instantiate_service(Node, 'testnode')
+            self.assertNotIn('executor', srv.gl_mgr.gls, "service should not have its own executor greenlet")
+
+            tasks = [srv.schedule_action('test_return', args={'return_val': i}) for i in range(5)]
+            for task in tasks:
+                task.wait()
+            self.assertEqual([t.result for t in tasks], list(range(5)))
+
+            # a paused service doesn't execute its tasks
+            srv._stop_executor()
+            task = srv.schedule_action('start')
+            gevent.sleep(0.1)
+            self.assertEqual(task.state, TASK_STATE_NEW)
+            srv._start_executor()
+            task.wait()
+            self.assertEqual(task.result, 'result')
+        finally:
+            for service in scol.list_services(hibernated=False):
+                service.gl_mgr.stop_all()
+            executor.configure(0)
+            config.SERVICE_LOADED.clear()
+
     def test_cleanup_actions(self):
         Tmpl = self.load_template('cleanup')
         srv = tcol.instantiate_service(Tmpl)
@@ -0,0 +1,77 @@
+import unittest
+from functools import wraps
+
+from zerorobot.template import actions
+
+
+def decorator(f):
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        return f(*args, **kwargs)
+    return wrapper
+
+
+class Template:
+
+    version = '0.0.1'
+
+    def start(self):
+        pass
+
+    def foo(self, bar, bor=None):
+        pass
+
+    def fookwargs(self, bar, **kwargs):
+        pass
+
+    @decorator
+    def wrapped(self, name):
+        pass
+
+    @staticmethod
+    def static(value):
+        pass
+
+    @property
+    def prop(self):
+        raise RuntimeError("properties should never be called")
+
+    def save(self):
+        pass
+
+    def _private(self):
+        pass
+
+
+class TestActionsCatalog(unittest.TestCase):
+
+    def setUp(self):
+        actions.invalidate(Template)
+
+    def test_catalog(self):
+        catalog = actions.get(Template)
+        self.assertEqual(sorted(catalog.actions.keys()), ['foo', 'fookwargs', 'prop', 'start', 'static', 'wrapped'])
+
+        self.assertEqual(catalog.get('start').arguments, [])
+        self.assertEqual(catalog.get('foo').arguments, ['bar', 'bor'])
+        self.assertEqual(catalog.get('foo').defaults, {'bor': None})
+        self.assertEqual(catalog.get('wrapped').arguments, ['name'], "signature of wrapped function should be used")
+        self.assertEqual(catalog.get('static').arguments, ['value'])
+        self.assertTrue(catalog.get('prop').is_property)
+        self.assertIsNone(catalog.get('save'))
+
+    def test_check_args(self):
+        catalog = actions.get(Template)
+        self.assertIsNone(catalog.get('start').check_args(None))
+        self.assertIsNone(catalog.get('foo').check_args({'bar': 1}))
+        self.assertIsNone(catalog.get('foo').check_args({'bar': 1, 'bor': 2}))
+        self.assertIsNotNone(catalog.get('foo').check_args(None), "missing mandatory argument should be detected")
+        self.assertIsNotNone(catalog.get('foo').check_args({'bar': 1, 'other': 2}), "unknown argument should be detected")
+        self.assertIsNotNone(catalog.get('start').check_args({'other': 2}), "unknown argument should be detected")
+        self.assertIsNone(catalog.get('fookwargs').check_args({'bar': 1, 'other': 2}))
+
+    def test_cached(self):
+        catalog = actions.get(Template)
+        self.assertIs(actions.get(Template), catalog, "catalog should be computed once per template")
+        actions.invalidate(Template)
+        self.assertIsNot(actions.get(Template), catalog, "catalog should be computed again after invalidation")
@@ -1,8 +1,11 @@
 import os
+import shutil
+import tempfile
 import unittest
 
 from zerorobot import template_collection as tcol
 from zerorobot.git import url as giturl
+from zerorobot.robot import loader
 from zerorobot.template_collection import TemplateNotFoundError
 from zerorobot.template_uid import TemplateUID
 
@@ -218,3 +221,200 @@ class TestTemplateCollection(unittest.TestCase):
         found = tcol.find(host='github.com', account='zero-os', repo='0-robot', name='node', version='0.0.1')
         assert len(found) == 1
         assert str(found[0].template_uid) == 'github.com/zero-os/0-robot/node/0.0.1'
+
+    def test_reload_changed_templates(self):
+        repo_dir = tempfile.mkdtemp(prefix='0robottest')
+        self.addCleanup(shutil.rmtree, repo_dir)
+        fixtures = os.path.join(os.path.dirname(__file__), 'fixtures/templates')
+        for name in ['node', 'vm']:
+            shutil.copytree(os.path.join(fixtures, name), os.path.join(repo_dir, 'templates', name),
+                            ignore=shutil.ignore_patterns('__pycache__'))
+        url = "https://github.com/zero-os/0-robot"
+
+        report = tcol._load_repo(url, repo_dir)
+        self.assertEqual(sorted(report.view()['added']), ['github.com/zero-os/0-robot/node/0.0.1',
+                                                          'github.com/zero-os/0-robot/vm/0.0.1'])
+        node = tcol.get('node')
+        vm = tcol.get('vm')
+
+        report = tcol._load_repo(url, repo_dir)
+        self.assertEqual(report.changed, [], "templates should not be reloaded if their files didn't change")
+        self.assertEqual(len(report.unchanged), 2)
+        self.assertIs(tcol.get('node'), node)
+
+        # change the schema and add a helper module to the node template
+        with open(os.path.join(repo_dir, 'templates', 'node', 'schema.capnp'), 'a') as f:
+            f.write('\n')
+        report = tcol._load_repo(url, repo_dir)
+        self.assertEqual(report.view(), {'added': [],
+                                         'updated': ['github.com/zero-os/0-robot/node/0.0.1'],
+                                         'unchanged': ['github.com/zero-os/0-robot/vm/0.0.1']})
+        self.assertIsNot(tcol.get('node'), node)
+        self.assertIs(tcol.get('vm'), vm)
+
+        with open(os.path.join(repo_dir, 'templates', 'vm', 'helper.py'), 'w') as f:
+            f.write('FOO = 1\n')
+        report = tcol._load_repo(url, repo_dir)
+        self.assertEqual(report.view()['updated'], ['github.com/zero-os/0-robot/vm/0.0.1'])
+
+        # templates dropped from the collection are loaded again
+        tcol._templates = {}
+        report = tcol._load_repo(url, repo_dir)
+        self.assertEqual(len(report.changed), 2)
+
+    def test_restore_templates(self):
+        repo_dir = tempfile.mkdtemp(prefix='0robottest')
+        self.addCleanup(shutil.rmtree, repo_dir)
+        fixtures = os.path.join(os.path.dirname(__file__), 'fixtures/templates')
+        shutil.copytree(os.path.join(fixtures, 'node'), os.path.join(repo_dir, 'templates', 'node'),
+                        ignore=shutil.ignore_patterns('__pycache__'))
+        url = "https://github.com/zero-os/0-robot"
+
+        tcol._load_repo(url, repo_dir)
+        node = tcol.get('node')
+        previous = {uid: (template, None) for uid, template in tcol._templates.items()}
+
+        with open(os.path.join(repo_dir, 'templates', 'node', 'schema.capnp'), 'a') as f:
+            f.write('\n')
+        report = tcol._load_repo(url, repo_dir)
+        self.assertIsNot(tcol.get('node'), node)
+
+        # what a halted upgrade does
+        tcol._restore_templates(report.updated, previous)
+        self.assertIs(tcol.get('node'), node, "previous version of the template should be registered again")
+
+        report = tcol._load_repo(url, repo_dir)
+        self.assertEqual(len(report.updated), 1, "the restored template should be upgraded again on the next checkout")
+
+    def test_fingerprint(self):
+        dir_path = os.path.join(os.path.dirname(__file__), 'fixtures/templates/node')
+        self.assertEqual(tcol._fingerprint(dir_path), tcol._fingerprint(dir_path))
+        self.assertNotEqual(tcol._fingerprint(dir_path),
+                            tcol._fingerprint(os.path.join(os.path.dirname(__file__), 'fixtures/templates/vm')))
+
+    def test_lazy_load(self):
+        repo_dir = tempfile.mkdtemp(prefix='0robottest')
+        self.addCleanup(shutil.rmtree, repo_dir)
+        fixtures = os.path.join(os.path.dirname(__file__), 'fixtures/templates')
+        for name in ['node', 'vm']:
+            shutil.copytree(os.path.join(fixtures, name), os.path.join(repo_dir, 'templates', name),
+                            ignore=shutil.ignore_patterns('__pycache__'))
+        url = "https://github.com/zero-os/0-robot"
+
+        report = tcol._load_repo(url, repo_dir, lazy=True)
+        self.assertEqual(len(report.added), 2)
+        self.assertTrue(all(isinstance(t, tcol.TemplateStub) for t in tcol.list_templates(load=False)),
+                        "templates should only be registered")
+        self.assertEqual(sorted(str(t.template_uid) for t in tcol.list_templates(load=False)),
+                         ['github.com/zero-os/0-robot/node/0.0.1', 'github.com/zero-os/0-robot/vm/0.0.1'])
+        self.assertEqual(tcol.stats()['imported'], 0)
+
+        node = tcol.get('github.com/zero-os/0-robot/node/0.0.1')
+        self.assertFalse(isinstance(node, tcol.TemplateStub), "get should import the template")
+        self.assertEqual(str(node.template_uid), 'github.com/zero-os/0-robot/node/0.0.1')
+        self.assertIs(tcol.get('node'), node)
+        self.assertEqual(tcol.stats()['imported'], 1)
+
+        vm = tcol.find(name='vm')[0]
+        self.assertFalse(isinstance(vm, tcol.TemplateStub), "find should import the templates")
+        self.assertEqual(tcol.stats()['imported'], 2)
+
+        # the templates imported are not imported again if their files didn't change
+        report = tcol._load_repo(url, repo_dir, lazy=True)
+        self.assertEqual(len(report.unchanged), 2)
+        self.assertIs(tcol.get('node'), node)
+
+    def test_lazy_load_dynamic_version(self):
+        repo_dir = tempfile.mkdtemp(prefix='0robottest')
+        self.addCleanup(shutil.rmtree, repo_dir)
+        template_dir = os.path.join(repo_dir, 'templates', 'dynamic')
+        os.makedirs(template_dir)
+        with open(os.path.join(template_dir, 'dynamic.py'), 'w') as f:
+            f.write("from zerorobot.template.base import TemplateBase\n\n\n"
+                    "class Dynamic(TemplateBase):\n"
+                    "    version = '.'.join(['0', '0', '1'])\n")
+
+        report = tcol._load_repo("https://github.com/zero-os/0-robot", repo_dir, lazy=True)
+        self.assertFalse(isinstance(report.added[0], tcol.TemplateStub),
+                         "template should be imported if its version can't be read statically")
+        self.assertEqual(str(report.added[0].template_uid), 'github.com/zero-os/0-robot/dynamic/0.0.1')
+
+    def test_find_index(self):
+        for uid in ['github.com/zero-os/0-robot/node/0.0.1',
+                    'github.com/zero-os/0-robot/node/0.0.2',
+                    'github.com/zero-os/0-templates/node/0.0.1',
+                    'github.com/zero-os/0-robot/vm/0.0.1']:
+            tcol._add(TemplateUID.parse(uid), type('Template', (), {'template_uid': TemplateUID.parse(uid)}))
+
+        self.assertEqual(len(tcol.find(name='node')), 3)
+        self.assertEqual(len(tcol.find(host='github.com', account='zero-os', repo='0-robot', name='node')), 2)
+        self.assertEqual(len(tcol.find(host='github.com', account='zero-os', repo='0-robot', name='node', version='0.0.2')), 1)
+        self.assertEqual(len(tcol.find(account='zero-os')), 4)
+        self.assertEqual(tcol.find(name='nonexisting'), [])
+
+        tcol._remove(TemplateUID.parse('github.com/zero-os/0-robot/node/0.0.2'))
+        self.assertEqual(len(tcol.find(host='github.com', account='zero-os', repo='0-robot', name='node')), 1)
+
+        # the indexes don't return the templates dropped from the collection
+        tcol._templates = {}
+        self.assertEqual(tcol.find(name='node'), [])
+
+    def test_benchmark_load_services(self):
+        nr_templates = 200
+        nr_services = 5000
+        for i in range(nr_templates):
+            uid = TemplateUID.parse('github.com/zero-os/repo%d/template%d/1.0.0' % (i % 10, i))
+            tcol._add(uid, type('Template%d' % i, (), {'template_uid': uid}))
+        tcol._templates = _CountingDict(tcol._templates)
+
+        # one service out of ten uses a version of the template that is not loaded anymore
+        infos = [{'template': 'github.com/zero-os/repo%d/template%d/%s' % (i % 10, i % nr_templates, '0.9.0' if i % 10 == 0 else '1.0.0')}
+                 for i in range(nr_services)]
+
+        legacy = [_legacy_template_of(info) for info in infos]
+        legacy_visited, tcol._templates.visited = tcol._templates.visited, 0
+
+        indexed = [loader._template_of(info) for info in infos]
+        indexed_visited = tcol._templates.visited
+
+        self.assertEqual(legacy, indexed)
+        # the linear scans go through all the templates for each service using another version
+        self.assertGreaterEqual(legacy_visited, nr_services // 10 * nr_templates)
+        self.assertLessEqual(indexed_visited, nr_services, "indexed lookups should read a single template per service")
+
+
+class _CountingDict(dict):
+    """
+    dict counting the entries read, to compare the cost of the template lookups
+    """
+    visited = 0
+
+    def get(self, key, default=None):
+        self.visited += 1
+        return super().get(key, default)
+
+    def __getitem__(self, key):
+        self.visited += 1
+        return super().__getitem__(key)
+
+    def items(self):
+        for item in super().items():
+            self.visited += 1
+            yield item
+
+
+def _legacy_template_of(service_info):
+    """
+    lookup of the template of a service as done before the indexes: parse on each call and linear scan
+    """
+    tmpl_uid = TemplateUID._parse(service_info['template'])
+    uid = TemplateUID._parse(str(tmpl_uid))
+    if uid in tcol._templates:
+        return tcol._templates[uid]
+    match = []
+    for uid, template in tcol._templates.items():
+        if uid.host != tmpl_uid.host or uid.account != tmpl_uid.account or \
+                uid.repo != tmpl_uid.repo or uid.name != tmpl_uid.name:
+            continue
+        match.append(template)
+    return match[0]
@@ -0,0 +1,110 @@
+import copy
+import unittest
+from unittest import mock
+
+from zerorobot import template_uid
+from zerorobot.template_uid import TemplateUID
+
+
+class TestTemplateUID(unittest.TestCase):
+
+    def test_parse(self):
+        uid = TemplateUID.parse('github.com/zero-os/0-robot/node/0.0.1')
+        self.assertEqual(uid.host, 'github.com')
+        self.assertEqual(uid.account, 'zero-os')
+        self.assertEqual(uid.repo, '0-robot')
+        self.assertEqual(uid.name, 'node')
+        self.assertEqual(uid.version, '0.0.1')
+
+        uid = TemplateUID.parse('github.com/zero-os/0-robot/node')
+        self.assertIsNone(uid.version)
+
+        for invalid in ['node', 'github.com/zero-os/0-robot/no-de/0.0.1', 'github.com/zero-os/0-robot/node/version']:
+            with self.assertRaises(ValueError):
+                TemplateUID.parse(invalid)
+
+    def test_interned(self):
+        uid = TemplateUID.parse('github.com/zero-os/0-robot/node/0.0.1')
+        self.assertIs(TemplateUID.parse('github.com/zero-os/0-robot/node/0.0.1'), uid)
+        self.assertIs(TemplateUID.parse('/github.com/zero-os/0-robot/node/0.0.1/'), uid,
+                      "equal uids parsed from different strings should be the same object")
+
+    def test_cache_size(self):
+        size = template_uid._CACHE_SIZE
+        template_uid._CACHE_SIZE = 10
+        template_uid._parsed.clear()
+        template_uid._interned.clear()
+        try:
+            for i in range(25):
+                TemplateUID.parse('github.com/zero-os/0-robot/node/0.0.%d' % i)
+            self.assertLessEqual(len(template_uid._parsed), 10)
+            self.assertLessEqual(len(template_uid._interned), 10)
+        finally:
+            template_uid._CACHE_SIZE = size
+
+    def test_compare(self):
+        uid1 = TemplateUID.parse('github.com/zero-os/0-robot/node/0.0.9')
+        uid2 = TemplateUID.parse('github.com/zero-os/0-robot/node/0.0.10')
+        self.assertLess(uid1, uid2, "versions should be compared numerically")
+        self.assertGreater(uid2, uid1)
+        self.assertLessEqual(uid1, uid1)
+        self.assertGreaterEqual(uid2, uid1)
+        self.assertEqual(sorted([uid2, uid1]), [uid1, uid2])
+
+        self.assertEqual(uid1, 'github.com/zero-os/0-robot/node/0.0.9')
+        self.assertNotEqual(uid1, uid2)
+        self.assertEqual(hash(uid1), hash(TemplateUID('github.com', 'zero-os', '0-robot', 'node', '0.0.9')))
+
+        with self.assertRaises(ValueError):
+            uid1 < TemplateUID.parse('github.com/zero-os/0-robot/vm/0.0.10')
+
+    def test_compare_pre_release(self):
+        rc1 = TemplateUID.parse('github.com/zero-os/0-robot/node/1.0.0-rc1')
+        rc2 = TemplateUID.parse('github.com/zero-os/0-robot/node/1.0.0-rc2')
+        release = TemplateUID.parse('github.com/zero-os/0-robot/node/1.0.0')
+        patch = TemplateUID.parse('github.com/zero-os/0-robot/node/1.0.1')
+        previous = TemplateUID.parse('github.com/zero-os/0-robot/node/0.9.10')
+        self.assertEqual(sorted([patch, release, rc2, previous, rc1]), [previous, rc1, rc2, release, patch],
+                         "pre-releases should be lower than their release")
+        self.assertNotEqual(rc1, release)
+
+    def test_compare_non_numeric(self):
+        master = TemplateUID('github.com', 'zero-os', '0-robot', 'node', 'master')
+        dev = TemplateUID('github.com', 'zero-os', '0-robot', 'node', 'dev')
+        numeric = TemplateUID.parse('github.com/zero-os/0-robot/node/0.0.1')
+        self.assertLess(master, numeric, "non-numeric versions should be lower than numeric ones")
+        self.assertGreater(numeric, master)
+        self.assertLess(dev, master)
+        self.assertLessEqual(master, master)
+
+    def test_compare_missing_version(self):
+        unversioned = TemplateUID.parse('github.com/zero-os/0-robot/node')
+        numeric = TemplateUID.parse('github.com/zero-os/0-robot/node/0.0.1')
+        master = TemplateUID('github.com', 'zero-os', '0-robot', 'node', 'master')
+        self.assertLess(unversioned, numeric, "no version should be lower than any version")
+        self.assertLess(unversioned, master)
+        self.assertGreaterEqual(unversioned, TemplateUID.parse('github.com/zero-os/0-robot/node'))
+
+        with self.assertRaises(ValueError):
+            unversioned < TemplateUID.parse('github.com/zero-os/0-robot/vm')
+
+    def test_immutable(self):
+        uid = TemplateUID.parse('github.com/zero-os/0-robot/node/0.0.1')
+        with self.assertRaises(AttributeError):
+            uid.version = '0.0.2'
+        self.assertEqual(str(uid), 'github.com/zero-os/0-robot/node/0.0.1')
+
+        cp = copy.deepcopy(uid)
+        self.assertEqual(cp, uid)
+        self.assertEqual(cp.tuple(), uid.tuple())
+
+    def test_benchmark_compare(self):
+        uids = ['github.com/zero-os/0-robot/node/0.0.%d' % i for i in range(100)]
+        for uid in uids:
+            TemplateUID.parse(uid)
+
+        with mock.patch.object(TemplateUID, '_parse', wraps=TemplateUID._parse) as parse:
+            for _ in range(10):
+                for i in range(1, len(uids)):
+                    self.assertTrue(TemplateUID.parse(uids[i]) > TemplateUID.parse(uids[i - 1]))
+        self.assertEqual(parse.call_count, 0, "uids already parsed should not be parsed again")
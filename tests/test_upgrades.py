@@ -0,0 +1,150 @@
+import unittest
+from unittest import mock
+
+import gevent
+
+from zerorobot import service_collection as scol
+from zerorobot.upgrades import (UPGRADE_STATE_HALTED, UPGRADE_STATE_OK,
+                                UPGRADE_STATE_PENDING, UpgradeManager)
+
+
+class FakeService:
+
+    def __init__(self, guid, healthy=True):
+        self.guid = guid
+        self.name = guid
+        self.healthy = healthy
+        scol._guid_index[guid] = self
+
+    def validate(self):
+        if not self.healthy:
+            raise RuntimeError('unhealthy')
+
+
+def upgrade(service, template, force=False):
+    if service.guid.startswith('broken'):
+        raise RuntimeError("can't load service")
+    return service
+
+
+@mock.patch('zerorobot.upgrades.scol.upgrade', side_effect=upgrade)
+class TestUpgrades(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.dict(scol._guid_index, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_batches(self, _):
+        mgr = UpgradeManager(canary_size=2, batch_size=3)
+        plan = [(FakeService('s%d' % i), 'template') for i in range(10)]
+        upgrade = mgr.plan(plan, 'http://github.com/account/repo', 'master')
+
+        self.assertEqual([len(b.plan) for b in upgrade.batches], [2, 3, 3, 2])
+        self.assertTrue(upgrade.batches[0].canary)
+        self.assertFalse(any(b.canary for b in upgrade.batches[1:]))
+
+        mgr.run(upgrade)
+        view = upgrade.view()
+        self.assertEqual(view['state'], UPGRADE_STATE_OK)
+        self.assertEqual(view['total'], 10)
+        self.assertEqual(view['upgraded'], 10)
+        self.assertEqual(view['failed'], 0)
+        self.assertEqual(view['url'], 'http://github.com/account/repo')
+        self.assertNotIn('error', view)
+        for batch in view['batches']:
+            self.assertIn('duration', batch)
+            self.assertIn('finished', batch)
+        self.assertEqual(mgr.get(upgrade.id), upgrade)
+
+    def test_no_services(self, _):
+        mgr = UpgradeManager()
+        upgrade = mgr.run(mgr.plan([]))
+        self.assertEqual(upgrade.state, UPGRADE_STATE_OK)
+        self.assertEqual(upgrade.batches, [])
+
+    def test_canary_failure(self, scol_upgrade):
+        mgr = UpgradeManager(canary_size=1, batch_size=2)
+        plan = [(FakeService('s0', healthy=False), 'template')] + \
+               [(FakeService('s%d' % i), 'template') for i in range(1, 5)]
+        upgrade = mgr.run(mgr.plan(plan))
+
+        self.assertEqual(upgrade.state, UPGRADE_STATE_HALTED)
+        self.assertIn('canary', upgrade.error)
+        self.assertEqual(scol_upgrade.call_count, 1, "only the canary should have been upgraded")
+        self.assertEqual(upgrade.batches[0].errors, [{'guid': 's0', 'message': 'validation failed: unhealthy'}])
+        self.assertIsNone(upgrade.batches[1].started)
+
+    def test_error_rate(self, scol_upgrade):
+        mgr = UpgradeManager(canary_size=1, batch_size=4, max_error_rate=0.2)
+        plan = [(FakeService('s0'), 'template')] + \
+               [(FakeService('broken%d' % i), 'template') for i in range(2)] + \
+               [(FakeService('s%d' % i), 'template') for i in range(1, 10)]
+        upgrade = mgr.run(mgr.plan(plan))
+
+        self.assertEqual(upgrade.state, UPGRADE_STATE_HALTED)
+        self.assertIn('error rate', upgrade.error)
+        self.assertEqual(upgrade.upgraded, 3)
+        self.assertEqual(upgrade.failed, 2)
+        self.assertEqual(scol_upgrade.call_count, 5, "the upgrade should stop after the failing batch")
+        self.assertTrue(upgrade.batches[1].errors[0]['message'].startswith('upgrade failed'))
+
+    def test_concurrency(self, scol_upgrade):
+        running = 0
+        max_running = 0
+
+        def slow_upgrade(service, template, force=False):
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            gevent.sleep(0.01)
+            running -= 1
+            return service
+
+        scol_upgrade.side_effect = slow_upgrade
+        mgr = UpgradeManager(concurrency=2, canary_size=0, batch_size=10)
+        upgrade = mgr.run(mgr.plan([(FakeService('s%d' % i), 'template') for i in range(6)]))
+        self.assertEqual(upgrade.state, UPGRADE_STATE_OK)
+        self.assertEqual(max_running, 2)
+
+    def test_deleted_service(self, scol_upgrade):
+        mgr = UpgradeManager(canary_size=1, batch_size=2)
+        upgrade = mgr.plan([(FakeService('s%d' % i), 'template') for i in range(3)])
+        # s2 is deleted while its batch is waiting
+        del scol._guid_index['s2']
+
+        mgr.run(upgrade)
+        self.assertEqual(upgrade.state, UPGRADE_STATE_OK)
+        self.assertEqual(upgrade.upgraded, 2)
+        self.assertEqual(upgrade.failed, 0)
+        self.assertEqual([c[0][0].guid for c in scol_upgrade.call_args_list], ['s0', 's1'],
+                         "a deleted service should not be upgraded")
+        self.assertNotIn('s2', scol._guid_index)
+
+    def test_start(self, _):
+        mgr = UpgradeManager(canary_size=1, batch_size=2)
+        upgrade = mgr.start(mgr.plan([(FakeService('s%d' % i), 'template') for i in range(5)]))
+        self.assertEqual(upgrade.state, UPGRADE_STATE_PENDING, "start should return before the upgrade runs")
+
+        while not upgrade.is_done:
+            gevent.sleep(0.01)
+        self.assertEqual(upgrade.state, UPGRADE_STATE_OK)
+        self.assertEqual(upgrade.upgraded, 5)
+
+    def test_on_halt(self, _):
+        mgr = UpgradeManager(canary_size=1, batch_size=2)
+        halted = []
+        plan = [(FakeService('s0', healthy=False), 'template'), (FakeService('s1'), 'template')]
+        upgrade = mgr.run(mgr.plan(plan), on_halt=halted.append)
+        self.assertEqual(halted, [upgrade])
+
+        halted = []
+        mgr.run(mgr.plan([(FakeService('s0'), 'template')]), on_halt=halted.append)
+        self.assertEqual(halted, [], "on_halt should only be called when the upgrade is halted")
+
+    def test_configure(self, _):
+        mgr = UpgradeManager()
+        with self.assertRaises(ValueError):
+            mgr.configure(concurrency=0)
+        with self.assertRaises(ValueError):
+            mgr.configure(max_error_rate=2)
@@ -0,0 +1,52 @@
+import json
+import unittest
+
+from zerorobot.server.handlers import views
+from zerorobot.task import TASK_STATE_OK, Task
+
+
+def noop():
+    return 'foo'
+
+
+class FakeService:
+    template_name = 'node'
+    name = 'node1'
+    guid = '1234'
+
+
+class TestTaskViewCache(unittest.TestCase):
+
+    def setUp(self):
+        views._task_views.clear()
+        self.service = FakeService()
+
+    def test_pending_task_not_cached(self):
+        task = Task(noop, None)
+        view = json.loads(views.task_view_json(task, self.service).decode())
+        self.assertEqual(view['state'], 'new')
+        self.assertEqual(len(views._task_views), 0, "views of pending tasks should not be cached")
+
+    def test_finished_task_cached(self):
+        task = Task(noop, None)
+        task.execute()
+        self.assertEqual(task.state, TASK_STATE_OK)
+
+        encoded = views.task_view_json(task, self.service)
+        self.assertEqual(json.loads(encoded.decode()), views.task_view(task, self.service))
+        self.assertIs(views.task_view_json(task, self.service), encoded, "views of finished tasks should be served from the cache")
+        self.assertEqual(views._task_views.nbytes, len(encoded))
+
+        tasks = [task, Task(noop, None)]
+        listing = json.loads(views.tasks_view_json(tasks, self.service).decode())
+        self.assertEqual([t['guid'] for t in listing], [t.guid for t in tasks])
+
+    def test_lru(self):
+        cache = views.TaskViewCache(size=2)
+        cache.set('a', b'aa')
+        cache.set('b', b'bb')
+        cache.get('a')
+        cache.set('c', b'cc')
+        self.assertIsNone(cache.get('b'), "least recently used view should be evicted")
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.nbytes, 4)
@@ -1,8 +1,17 @@
+# need to patch sockets to make requests async
+from gevent import monkey
+monkey.patch_all(subprocess=False)
+
+import json
 import os
 import unittest
 
+import gevent
+from gevent.pywsgi import WSGIServer
+
 from js9 import j
 from zerorobot import webhooks
+from zerorobot.prometheus.robot import webhook_dropped
 
 
 class TestWebHooks(unittest.TestCase):
@@ -46,7 +55,7 @@ class TestWebHooks(unittest.TestCase):
         initial = []
         for i in range(10):
             url = 'http://webhooks%d.com' % i
-            wh = self.storage.add(url, 'eco')
+            wh = self.storage.add(url, 'eco', batch=i % 2 == 0)
             initial.append(wh)
 
         self.storage.save()
@@ -58,7 +67,164 @@ class TestWebHooks(unittest.TestCase):
                 if wha.id == whb.id:
                     assert wha.url == whb.url
                     assert wha.kind == whb.kind
+                    assert wha.batch == whb.batch
 
     def test_load_empty_file(self):
         os.truncate(self.storage._path, 0)
         self.storage.load()
+
+
+class WebHookServer:
+    """
+    local HTTP server that records the payloads posted to it
+    """
+
+    def __init__(self, fail=0, delay=0, fail_status='500 Internal Server Error'):
+        """
+        @param fail: number of requests to answer with an error before accepting payloads
+        @param delay: number of seconds to wait before answering
+        @param fail_status: status of the errors
+        """
+        self.fail = fail
+        self.delay = delay
+        self.fail_status = fail_status
+        self.hits = 0
+        self.requests = []
+        self._server = WSGIServer(('127.0.0.1', 0), self._app, log=None)
+
+    @property
+    def url(self):
+        return 'http://%s:%d/hook' % self._server.address
+
+    def start(self):
+        self._server.start()
+
+    def stop(self):
+        self._server.stop()
+
+    def _app(self, environ, start_response):
+        body = environ['wsgi.input'].read()
+        self.hits += 1
+        if self.delay:
+            gevent.sleep(self.delay)
+        if self.fail > 0:
+            self.fail -= 1
+            start_response(self.fail_status, [])
+            return [b'']
+        self.requests.append(json.loads(body.decode()))
+        start_response('200 OK', [])
+        return [b'']
+
+
+class TestDispatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.storage = webhooks.Storage(j.sal.fs.getTmpDirPath())
+        self.server = WebHookServer()
+        self.server.start()
+        self.storage.add(self.server.url, 'eco')
+        self.dispatcher = webhooks.Dispatcher(self.storage, batch_interval=0.2, timeout=1, backoff=0.1)
+
+    def tearDown(self):
+        self.dispatcher.stop()
+        self.server.stop()
+        if os.path.exists(self.storage._path):
+            os.remove(self.storage._path)
+
+    def _dropped(self, reason):
+        return webhook_dropped.labels(kind='eco', reason=reason)._value.get()
+
+    def test_single(self):
+        self.dispatcher.start()
+        for i in range(3):
+            assert self.dispatcher.send('eco', {'i': i})
+        gevent.sleep(0.5)
+
+        assert sorted(self.server.requests, key=lambda r: r['i']) == [{'i': i} for i in range(3)], \
+            "each payload should be sent in its own request by default"
+
+    def test_batch(self):
+        self.storage.add(self.server.url, 'eco', batch=True)
+        self.dispatcher.start()
+        for i in range(5):
+            assert self.dispatcher.send('eco', {'i': i})
+        gevent.sleep(0.5)
+
+        assert len(self.server.requests) == 1, "payloads sent within the batch interval should be sent in one request"
+        assert self.server.requests[0] == [{'i': i} for i in range(5)]
+
+    def test_batch_size(self):
+        self.storage.add(self.server.url, 'eco', batch=True)
+        self.dispatcher.batch_size = 2
+        self.dispatcher.start()
+        for i in range(5):
+            self.dispatcher.send('eco', {'i': i})
+        gevent.sleep(0.5)
+
+        assert [len(r) for r in self.server.requests] == [2, 2, 1]
+
+    def test_retry(self):
+        self.server.fail = 2
+        self.dispatcher.start()
+        self.dispatcher.send('eco', {'foo': 'bar'})
+        gevent.sleep(1)
+
+        assert self.server.requests == [{'foo': 'bar'}], "failed delivery should be retried"
+
+    def test_delivery_failed(self):
+        self.server.fail = 10
+        self.dispatcher.retries = 1
+        dropped = self._dropped('delivery_failed')
+        self.dispatcher.start()
+        self.dispatcher.send('eco', {'foo': 'bar'})
+        gevent.sleep(1)
+
+        assert self.server.requests == []
+        assert self._dropped('delivery_failed') == dropped + 1
+
+    def test_rejected(self):
+        self.server.fail = 10
+        self.server.fail_status = '400 Bad Request'
+        dropped = self._dropped('rejected')
+        self.dispatcher.start()
+        self.dispatcher.send('eco', {'foo': 'bar'})
+        gevent.sleep(0.5)
+
+        assert self.server.hits == 1, "payloads rejected with a 4xx should not be retried"
+        assert self._dropped('rejected') == dropped + 1
+
+    def test_slow_webhook(self):
+        slow = WebHookServer(delay=1)
+        slow.start()
+        try:
+            self.storage.add(slow.url, 'eco')
+            self.dispatcher.concurrency = 1
+            self.dispatcher.start()
+            for i in range(3):
+                self.dispatcher.send('eco', {'i': i})
+            gevent.sleep(0.5)
+
+            assert len(self.server.requests) == 3, "a slow web hook should not delay the others"
+            assert slow.requests == []
+        finally:
+            slow.stop()
+
+    def test_timeout(self):
+        self.server.delay = 2
+        self.dispatcher.timeout = 0.1
+        self.dispatcher.retries = 0
+        dropped = self._dropped('delivery_failed')
+        self.dispatcher.start()
+        self.dispatcher.send('eco', {'foo': 'bar'})
+        gevent.sleep(0.5)
+
+        assert self._dropped('delivery_failed') == dropped + 1, "slow web hook should time out"
+
+    def test_overloaded(self):
+        dispatcher = webhooks.Dispatcher(self.storage, queue_size=2)
+        dropped = self._dropped('overloaded')
+
+        assert dispatcher.send('eco', {'i': 1})
+        assert dispatcher.send('eco', {'i': 2})
+        assert not dispatcher.send('eco', {'i': 3}), "payload should be dropped when the queue is full"
+        assert self._dropped('overloaded') == dropped + 1
@@ -1,12 +1,19 @@
 
 import os
 import shutil
+import time
 import unittest
 import uuid
+from unittest import mock
 
+import gevent
 from gevent import monkey
+from jose import jwt
+from requests import Request
 
 from js9 import j
+from JumpScale9Zrobot.clients.zerorobot.ZeroRobotClient import (_SecretAuth,
+                                                               _SecretsIndex)
 from zerorobot import service_collection as scol
 from zerorobot.dsl.ZeroRobotManager import (TemplateNotFoundError,
                                             ZeroRobotManager)
@@ -67,3 +74,152 @@ class TestZRobotClient(unittest.TestCase):
         node = self.cl.services.create('github.com/zero-os/0-robot/node/0.0.1', data=data)
         self.assertEqual(type(node), ServiceProxy, 'service type should be ServiceProxy')
         self.assertEqual(node.name, node.guid, "service name should be equal to service guid when created without name")
+
+    def test_schedule_many(self):
+        data = {'ip': '127.0.0.1'}
+        node1 = self.cl.services.create('github.com/zero-os/0-robot/node/0.0.1', 'node1', data)
+        node2 = self.cl.services.create('github.com/zero-os/0-robot/node/0.0.1', 'node2', data)
+        self.cl.services.create('github.com/zero-os/0-robot/vm/0.0.1', 'vm1')
+
+        with self.assertRaises(ValueError, msg='an invalid action should prevent all the tasks to be scheduled'):
+            self.cl.services.schedule_many([
+                {'action_name': 'start', 'service_guid': node1.guid},
+                {'action_name': 'notexists', 'service_guid': node2.guid},
+            ])
+        self.assertTrue(scol.get_by_guid(node1.guid).task_list.empty(), "no task should have been scheduled")
+
+        with self.assertRaises(ValueError, msg='an empty filter should not select all the services'):
+            self.cl.services.schedule_many([{'action_name': 'start', 'filter': {}}])
+
+        tasks = self.cl.services.schedule_many([
+            {'action_name': 'start', 'service_guid': node1.guid},
+            {'action_name': 'test_return', 'args': {'return_val': 'hello'},
+             'filter': {'template_uid': 'github.com/zero-os/0-robot/node/0.0.1'}},
+        ])
+        self.assertEqual(len(tasks), 3, "filter should select the 2 node services")
+        self.assertEqual(sorted(t.service.guid for t in tasks), sorted([node1.guid, node1.guid, node2.guid]))
+
+        node1.task_list.wait_many(tasks, timeout=10, die=True)
+        for task in tasks:
+            self.assertEqual(task.state, 'ok')
+        self.assertEqual([t.result for t in tasks if t.action_name == 'test_return'], ['hello', 'hello'])
+
+    def test_subscribe_events(self):
+        node = self.cl.services.create('github.com/zero-os/0-robot/node/0.0.1', 'node1', {'ip': '127.0.0.1'})
+        events = []
+
+        def consume():
+            for event in self.cl._client.subscribe(service_guids=[node.guid]):
+                events.append(event)
+                if event['kind'] == 'task_finished':
+                    return
+
+        gl = gevent.spawn(consume)
+        gevent.sleep(0.5)  # let the subscription be created
+        node.schedule_action('start').wait(timeout=10)
+        gl.join(timeout=10)
+
+        kinds = [e['kind'] for e in events]
+        self.assertEqual(kinds[0], 'task_created')
+        self.assertIn('task_started', kinds)
+        self.assertEqual(kinds[-1], 'task_finished')
+        for event in events:
+            self.assertEqual(event['service_guid'], node.guid)
+
+    def test_secrets_selection(self):
+        node1 = self.cl.services.create('github.com/zero-os/0-robot/node/0.0.1', 'node1', {'ip': '127.0.0.1'})
+        node2 = self.cl.services.create('github.com/zero-os/0-robot/node/0.0.1', 'node2', {'ip': '127.0.0.1'})
+        client = self.cl._client
+        owner_secret = client.config.data['owner_secret_']
+        self.assertTrue(owner_secret, "owner secret should be saved when creating a service")
+        self.assertEqual(len(client.config.data['secrets_']), 2)
+
+        index = client._secrets_index()
+        secret1 = index.by_guid[node1.guid]
+        self.assertEqual(index.header(node1.guid), 'Bearer %s' % secret1, "only the secret of the service should be sent")
+        self.assertEqual(index.header(), 'Bearer %s' % owner_secret, "the owner secret covers all the services")
+
+        # both services are created under the same owner
+        self.assertEqual(scol.get_by_guid(node1.guid)._owner, scol.get_by_guid(node2.guid)._owner)
+        self.assertEqual(sorted(self.cl.services.guids.keys()), sorted([node1.guid, node2.guid]))
+        node2.schedule_action('start').wait(timeout=10, die=True)
+
+        # the owner secret alone gives access to the services
+        client.config.data_set('secrets_', [])
+        self.assertEqual(sorted(self.cl.services.guids.keys()), sorted([node1.guid, node2.guid]))
+        node1.schedule_action('start').wait(timeout=10, die=True)
+
+    def test_conditional_get(self):
+        node = self.cl.services.create('github.com/zero-os/0-robot/node/0.0.1', 'node1', {'ip': '127.0.0.1'})
+        api = self.cl._client.api
+
+        services, resp = api.services.listServices()
+        self.assertIn('ETag', resp.headers)
+
+        # the robot answers 304 and the cached body is returned
+        services_again, resp_again = api.services.listServices()
+        self.assertEqual(resp_again.status_code, 200)
+        self.assertEqual([s.guid for s in services_again], [s.guid for s in services])
+        self.assertEqual(resp_again.headers['ETag'], resp.headers['ETag'])
+
+        # a change in the collection invalidates the tag
+        node.delete()
+        services, resp = api.services.listServices()
+        self.assertEqual(services, [])
+        self.assertNotEqual(resp.headers['ETag'], resp_again.headers['ETag'])
+
+
+def _token(**claims):
+    return jwt.encode(claims, 'key', algorithm='HS256')
+
+
+class TestSecretsIndex(unittest.TestCase):
+
+    def test_is_valid(self):
+        secrets = [_token(service_guid='a', owner='o'), _token(service_guid='b', owner='o')]
+        index = _SecretsIndex(secrets, '')
+        self.assertTrue(index.is_valid(list(secrets), ''))
+        self.assertFalse(index.is_valid([secrets[0], _token(service_guid='c', owner='o')], ''),
+                         "replacing a secret should invalidate the index even if the count doesn't change")
+        self.assertFalse(index.is_valid(secrets, _token(owner='o')))
+
+    def test_expired_owner_secret(self):
+        secrets = [_token(service_guid='a', owner='o')]
+        owner_secret = _token(owner='o', exp=int(time.time()) + 3600)
+        index = _SecretsIndex(secrets, owner_secret)
+        self.assertEqual(index.header(), 'Bearer %s' % owner_secret)
+        self.assertEqual(index.header('b'), 'Bearer %s' % owner_secret)
+
+        with mock.patch('time.time', return_value=time.time() + 7200):
+            self.assertFalse(index.is_valid(secrets, owner_secret), "index should be rebuilt once the owner secret expired")
+
+        expired = _token(owner='o', exp=int(time.time()) - 1)
+        index = _SecretsIndex(secrets, expired)
+        self.assertEqual(index.header(), 'Bearer %s' % secrets[0], "expired owner secret should not be sent")
+        self.assertIsNone(index.header('b'))
+
+
+class TestSecretAuth(unittest.TestCase):
+
+    class FakeClient:
+
+        def __init__(self, index):
+            self.index = index
+
+        def _secrets_index(self):
+            return self.index
+
+    def test_base_url(self):
+        secret = _token(service_guid='a', owner='o')
+        owner_secret = _token(owner='o')
+        client = self.FakeClient(_SecretsIndex([secret], owner_secret))
+
+        auth = _SecretAuth(client, 'https://example.com/zrobot/')
+        r = auth(Request('GET', 'https://example.com/zrobot/services/a/task_list').prepare())
+        self.assertEqual(r.headers['ZrobotSecret'], 'Bearer %s' % secret, "path should be matched relative to the base url")
+        r = auth(Request('GET', 'https://example.com/zrobot/services').prepare())
+        self.assertEqual(r.headers['ZrobotSecret'], 'Bearer %s' % owner_secret)
+
+        auth = _SecretAuth(client, 'http://localhost:6600')
+        r = auth(Request('GET', 'http://localhost:6600/services/a').prepare())
+        self.assertEqual(r.headers['ZrobotSecret'], 'Bearer %s' % secret)
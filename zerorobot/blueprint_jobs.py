@@ -0,0 +1,213 @@
+"""
+This module implements the execution of blueprints in the background.
+
+A job is created for each blueprint executed asynchronously. The job keeps track of the progress
+of each service and each action of the blueprint, and of the final result of the execution.
+The number of jobs running at the same time is capped, the other jobs wait for their turn.
+Finished jobs are kept in memory for a while so clients can retrieve their result.
+"""
+
+import time
+from collections import OrderedDict
+from uuid import uuid4
+
+import gevent
+from gevent.event import Event
+from gevent.lock import BoundedSemaphore
+
+from js9 import j
+
+logger = j.logger.get('zerorobot')
+
+JOB_STATE_PENDING = 'pending'
+JOB_STATE_RUNNING = 'running'
+JOB_STATE_OK = 'ok'
+JOB_STATE_ERROR = 'error'
+
+SERVICE_STATE_PENDING = 'pending'
+SERVICE_STATE_CREATED = 'created'
+SERVICE_STATE_UPDATED = 'updated'
+SERVICE_STATE_ERROR = 'error'
+SERVICE_STATE_DELETED = 'deleted'
+
+ACTION_STATE_PENDING = 'pending'
+ACTION_STATE_SCHEDULED = 'scheduled'
+ACTION_STATE_ERROR = 'error'
+
+
+class BlueprintJob:
+    """
+    BlueprintJob tracks the progress of the execution of a blueprint
+    """
+
+    def __init__(self, actions, services, owner=None):
+        """
+        @param actions: actions of the blueprint, as returned by blueprint.parse
+        @param services: services of the blueprint, as returned by blueprint.parse
+        @param owner: owner of the services created by the blueprint
+        """
+        self.id = str(uuid4())
+        self.owner = owner
+        self.state = JOB_STATE_PENDING
+        self.created = int(time.time())
+        self.finished = None
+        self.services = [{
+            'template': service['template'],
+            'service': service['service'],
+            'state': SERVICE_STATE_PENDING,
+        } for service in services]
+        self.actions = [{
+            'action': action['action'],
+            'template': action.get('template'),
+            'service': action.get('service'),
+            'state': ACTION_STATE_PENDING,
+            'tasks': [],
+        } for action in actions]
+        self.result = None
+        self.error = None
+        self._done = Event()
+
+    @property
+    def is_done(self):
+        return self._done.is_set()
+
+    def service_progress(self, index, state, guid=None):
+        """
+        report the progress of the index-th service of the blueprint
+        """
+        self.services[index]['state'] = state
+        if guid:
+            self.services[index]['guid'] = guid
+
+    def action_progress(self, index, state, tasks=None):
+        """
+        report the progress of the index-th action of the blueprint
+
+        @param tasks: guids of the tasks scheduled for this action
+        """
+        self.actions[index]['state'] = state
+        if tasks:
+            self.actions[index]['tasks'].extend(tasks)
+
+    def finish(self, result=None, err_code=None, err_msg=None):
+        """
+        mark the job as finished
+
+        @param result: result of the blueprint, same as the response of a synchronous execution
+        @param err_code: if set, the job failed with this error code
+        @param err_msg: message describing the error
+        """
+        if err_code or err_msg:
+            self.state = JOB_STATE_ERROR
+            self.error = {'code': err_code or 500, 'message': err_msg or ''}
+        else:
+            self.state = JOB_STATE_OK
+            self.result = result
+        self.finished = int(time.time())
+        self._done.set()
+
+    def wait(self, timeout=None):
+        """
+        wait for the job to be finished
+
+        @return: True if the job is finished, False if timeout expired
+        """
+        return self._done.wait(timeout=timeout)
+
+    def view(self, owner=None):
+        """
+        @param owner: owner of the requester, the secrets of the services created
+                      are only returned to the owner of the job
+        """
+        out = {
+            'id': self.id,
+            'state': self.state,
+            'created': self.created,
+            'services': self.services,
+            'actions': self.actions,
+        }
+        if self.finished is not None:
+            out['finished'] = self.finished
+        if self.result is not None:
+            out['result'] = self.result
+            if owner is None or owner != self.owner:
+                out['result'] = dict(self.result, services=[
+                    {k: v for k, v in service.items() if k not in ('secret', 'owner_secret')}
+                    for service in self.result.get('services', [])])
+        if self.error is not None:
+            out['error'] = self.error
+        return out
+
+
+class JobManager:
+    """
+    JobManager runs the blueprint jobs in the background
+    """
+
+    def __init__(self, max_running=2, max_pending=100, size=1000):
+        """
+        @param max_running: maximum number of jobs running at the same time
+        @param max_pending: maximum number of jobs waiting to be run, new jobs are refused above this limit
+        @param size: maximum number of jobs kept in memory, the oldest finished jobs are evicted first
+        """
+        self.max_pending = max_pending
+        self.size = size
+        self._running = BoundedSemaphore(max_running)
+        self._jobs = OrderedDict()
+
+    def configure(self, max_running=2):
+        """
+        set the number of jobs running at the same time
+        this needs to be called before any job is submitted
+        """
+        if max_running < 1:
+            raise ValueError("max_running must be at least 1")
+        self._running = BoundedSemaphore(max_running)
+
+    def submit(self, job, func, *args, **kwargs):
+        """
+        run func(*args, job=job, **kwargs) in the background
+
+        func must return a tuple (result, error code, error message)
+
+        @raise TooManyJobsError: if max_pending jobs are already waiting
+        """
+        pending = sum(1 for x in self._jobs.values() if x.state == JOB_STATE_PENDING)
+        if pending >= self.max_pending:
+            raise TooManyJobsError("too many blueprint jobs waiting to be executed")
+
+        self._jobs[job.id] = job
+        self._evict()
+        gevent.spawn(self._run, job, func, args, kwargs)
+        return job
+
+    def get(self, id):
+        """
+        @raise KeyError: if the job doesn't exist
+        """
+        return self._jobs[id]
+
+    def _run(self, job, func, args, kwargs):
+        with self._running:
+            job.state = JOB_STATE_RUNNING
+            try:
+                result, err_code, err_msg = func(*args, job=job, **kwargs)
+            except Exception as err:
+                logger.exception("error executing blueprint job %s" % job.id)
+                result, err_code, err_msg = None, 500, str(err)
+            job.finish(result, err_code, err_msg)
+
+    def _evict(self):
+        for id in list(self._jobs.keys()):
+            if len(self._jobs) <= self.size:
+                return
+            if self._jobs[id].is_done:
+                del self._jobs[id]
+
+
+class TooManyJobsError(Exception):
+    pass
+
+
+# jobs of the robot
+jobs = JobManager()
@@ -33,12 +33,7 @@ def execute(blueprint):
 
         # save secret of the service inside config manager
         for service in response.services:
-            if service.secret not in client.config.data['secrets_']:
-                secrets = client.config.data['secrets_']
-                secrets.append(service.secret)
-        # force re-creation of the connection with new secret added in the Authorization header
-        client.config.save()
-        client._api = None
+            client.add_secret(service.secret, service.owner_secret)
 
         print("blueprint executed")
         print('list of services created:')
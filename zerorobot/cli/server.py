@@ -35,12 +35,32 @@ def server():
 @click.option('--auto-push-interval', help='interval in minutes of automatic pushing of data repository', required=False, default=60)
 @click.option('--admin-organization', help='if specified, use this organization to protect the admin API endpoint.', required=False)
 @click.option('--user-organization', help='if specified, use this organization to protect the user API endpoint.', required=False)
+@click.option('--owner-secret-ttl', help='number of seconds an owner secret is valid', required=False, default=30 * 24 * 3600)
 @click.option('--mode', help='mode of 0-robot', type=click.Choice(['node']), required=False)
 @click.option('--god', help='enable god mode (use ONLY for development !!)', required=False, default=False, is_flag=True)
+@click.option('--max-connections', help='maximum number of open connections', required=False, default=1000)
+@click.option('--max-requests', help='maximum number of requests served concurrently', required=False, default=200)
+@click.option('--max-heavy-requests', help='maximum number of blueprints, listings and templates requests served concurrently', required=False, default=20)
+@click.option('--max-streams', help='maximum number of event streams open concurrently', required=False, default=100)
+@click.option('--max-long-polls', help='maximum number of requests waiting for a task or a blueprint job concurrently', required=False, default=100)
+@click.option('--queue-timeout', help='number of seconds a request waits for a free slot before being rejected with a 503', required=False, default=2.0)
+@click.option('--blueprint-concurrency', help='maximum number of services of a blueprint instantiated at the same time, 1 instantiates them one by one', required=False, default=1)
+@click.option('--max-blueprint-jobs', help='maximum number of blueprints executed in the background at the same time', required=False, default=2)
+@click.option('--eager-templates', help='import all the templates at startup instead of when a service needs them', is_flag=True, default=False)
+@click.option('--upgrade-concurrency', help='maximum number of services upgraded at the same time when templates change', required=False, default=25)
+@click.option('--upgrade-canary-size', help='number of services upgraded first, the upgrade is halted if any of them fails', required=False, default=1)
+@click.option('--upgrade-batch-size', help='number of services upgraded per batch after the canary', required=False, default=100)
+@click.option('--upgrade-max-error-rate', help='ratio of failed services above which an upgrade is halted', required=False, default=0.1)
+@click.option('--executor-workers', help='number of workers executing the tasks of all the services, 0 gives each service its own executor', required=False, default=0)
+@click.option('--hibernate-after', help='number of seconds after which an idle service is hibernated, 0 disables hibernation', required=False, default=0)
 def start(listen, data_repo, template_repo, config_repo, config_key, debug,
           telegram_bot_token, telegram_chat_id,
           auto_push, auto_push_interval,
-          admin_organization, user_organization, mode, god):
+          admin_organization, user_organization, owner_secret_ttl, mode, god,
+          max_connections, max_requests, max_heavy_requests, max_streams, max_long_polls, queue_timeout, blueprint_concurrency,
+          max_blueprint_jobs, eager_templates,
+          upgrade_concurrency, upgrade_canary_size, upgrade_batch_size, upgrade_max_error_rate,
+          executor_workers, hibernate_after):
     """
     start the 0-robot daemon.
     this will start the REST API on address and port specified by --listen and block
@@ -66,7 +86,7 @@ def start(listen, data_repo, template_repo, config_repo, config_key, debug,
     robot = Robot()
 
     for url in template_repo:
-        robot.add_template_repo(url)
+        robot.add_template_repo(url, lazy=not eager_templates)
 
     robot.set_data_repo(data_repo)
     robot.set_config_repo(config_repo, config_key)
@@ -76,5 +96,20 @@ def start(listen, data_repo, template_repo, config_repo, config_key, debug,
                 auto_push_interval=auto_push_interval,
                 admin_organization=admin_organization,
                 user_organization=user_organization,
+                owner_secret_ttl=owner_secret_ttl,
                 mode=mode,
-                god=god)
+                god=god,
+                max_connections=max_connections,
+                max_requests=max_requests,
+                max_heavy_requests=max_heavy_requests,
+                max_streams=max_streams,
+                max_long_polls=max_long_polls,
+                queue_timeout=queue_timeout,
+                blueprint_concurrency=blueprint_concurrency,
+                max_blueprint_jobs=max_blueprint_jobs,
+                upgrade_concurrency=upgrade_concurrency,
+                upgrade_canary_size=upgrade_canary_size,
+                upgrade_batch_size=upgrade_batch_size,
+                upgrade_max_error_rate=upgrade_max_error_rate,
+                executor_workers=executor_workers,
+                hibernate_after=hibernate_after)
@@ -14,5 +14,8 @@ config_repo = None
 
 mode = None
 god = False
+# maximum number of services of a blueprint instantiated concurrently, 1 to instantiate them one by one
+blueprint_concurrency = 1
 
 webhooks = None
+webhooks_dispatcher = None
@@ -45,8 +45,8 @@ class AutoPusher:
                 self.logger.debug("saving services and pushing data repo")
             _load_ssh_key()
 
-            # save all services
-            for service in scol.list_services():
+            # save all services, the hibernated ones are saved already
+            for service in scol.list_services(hibernated=False):
                 service.save()
 
             git = j.clients.git.get(basedir=self.repo_dir)
@@ -137,9 +137,11 @@ class TemplatesMgr:
     def checkout_repo(self, url, revision='master'):
         """
         Checkout a branch/tag/revision of a template repository
+        the services using the templates that changed are upgraded in the background
 
         @param url: url of the template repo
         @param revision: branch, tag or revision to checkout
+        @return: the zerorobot.upgrades.Upgrade of the services
         """
         return tcol.checkout_repo(url, revision)
 
@@ -150,7 +152,7 @@ class TemplatesMgr:
         keys are the templates uids
         values are the templates objects
         """
-        return tcol._templates
+        return {t.template_uid: t for t in tcol.list_templates()}
 
 
 class ZeroRobotAPI:
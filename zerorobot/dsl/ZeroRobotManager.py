@@ -8,7 +8,7 @@ from js9 import j
 from zerorobot.git.repo import RepoCheckoutError
 from zerorobot.service_collection import (ServiceConflictError,
                                           ServiceNotFoundError, TooManyResults)
-from zerorobot.service_proxy import ServiceProxy
+from zerorobot.service_proxy import ServiceProxy, _task_proxy_from_api
 from zerorobot.template_collection import (TemplateConflictError,
                                            TemplateNotFoundError)
 from zerorobot.template_uid import TemplateUID
@@ -45,12 +45,7 @@ class ServicesMgr:
     def _instantiate(self, data):
 
         if hasattr(data, 'secret') and data.secret:
-            if data.secret not in self._client.config.data['secrets_']:
-                secrets = self._client.config.data['secrets_']
-                secrets.append(data.secret)
-                self._client.config.save()
-            # force re-creation of the connection with new secret added in the Authorization header
-            self._client._api = None
+            self._client.add_secret(data.secret, getattr(data, 'owner_secret', None))
 
         srv = ServiceProxy(data.name, data.guid, self._client)
         srv.template_uid = TemplateUID.parse(data.template)
@@ -209,6 +204,41 @@ class ServicesMgr:
         except ServiceNotFoundError:
             return self.create(template_uid=template_uid, service_name=service_name, data=data, public=public)
 
+    def schedule_many(self, tasks):
+        """
+        Schedule actions on multiple services in a single request.
+        Either all the tasks are scheduled or none of them.
+
+        :param tasks: list of dict with the keys:
+                      action_name: name of the action to schedule
+                      args: dictionnary of the argument to pass to the action, optional
+                      service_guid: guid of the service on which to schedule the action
+                      filter: dict of the filters used to select the services on which to schedule the action,
+                              can be used instead of service_guid. Same filters as the find method, it can't be empty
+        :type tasks: list
+        :raises ServiceNotFoundError: raised when one of the service_guid doesn't exist
+        :raises ValueError: raised when one of the action doesn't exist or the arguments don't match its signature
+        :return: list of TaskProxy, use `wait_many` from the TaskListProxy to wait for all of them
+        :rtype: list
+        """
+        try:
+            created, _ = self._client.api.services.ScheduleTasks(tasks)
+        except HTTPError as err:
+            msg = err.response.json()['message']
+            if err.response.status_code == 404:
+                raise ServiceNotFoundError(msg)
+            if err.response.status_code == 400:
+                raise ValueError(msg)
+            raise err
+
+        services = {}
+        results = []
+        for task in created:
+            if task.service_guid not in services:
+                services[task.service_guid] = ServiceProxy(task.service_name, task.service_guid, self._client)
+            results.append(_task_proxy_from_api(task, services[task.service_guid]))
+        return results
+
 
 class TemplatesMgr:
 
@@ -230,19 +260,32 @@ class TemplatesMgr:
     def checkout_repo(self, url, revision='master'):
         """
         Checkout a branch/tag/revision of a template repository
+        the services using the templates that changed are upgraded in the background
 
         @param url: url of the template repo
         @param revision: branch, tag or revision to checkout
+        @return: the id of the upgrade of the services, use upgrade to follow its progress
         """
         data = {
             "url": url,
             "branch": revision,
         }
         try:
-            self._client.api.templates.CheckoutVersionTemplateRepo(data)
+            upgrade, _ = self._client.api.templates.CheckoutVersionTemplateRepo(data)
         except HTTPError as err:
             e = err.response.json()
             raise RepoCheckoutError(e['message'], err)
+        return upgrade.id
+
+    def upgrade(self, id):
+        """
+        Get the progress of the upgrade of the services started by checkout_repo
+
+        @param id: id of the upgrade
+        @return: TemplateUpgrade, its state is ok or halted once the upgrade is done
+        """
+        upgrade, _ = self._client.api.templates.GetTemplateUpgrade(id)
+        return upgrade
 
     @property
     def uids(self):
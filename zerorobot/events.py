@@ -0,0 +1,162 @@
+"""
+This module implements the event bus used to stream the changes happening in the robot.
+
+Task transitions, service state changes and service creation/deletion are published
+on the bus. Each subscriber gets its own bounded queue so a slow consumer never blocks
+the services: when the queue of a subscriber is full, new events are dropped for it.
+
+The bus does nothing when nobody is subscribed, so publishing is cheap in the common case.
+"""
+
+import json
+import time
+
+from gevent.queue import Empty, Full, Queue
+
+from js9 import j
+from zerorobot.prometheus.robot import events_dropped
+
+logger = j.logger.get('zerorobot')
+
+EVENT_TASK_CREATED = 'task_created'
+EVENT_TASK_STARTED = 'task_started'
+EVENT_TASK_FINISHED = 'task_finished'
+EVENT_TASK_ERRORED = 'task_errored'
+EVENT_STATE_SET = 'state_set'
+EVENT_STATE_DELETED = 'state_deleted'
+EVENT_SERVICE_CREATED = 'service_created'
+EVENT_SERVICE_DELETED = 'service_deleted'
+
+
+class Event:
+    """
+    an event published on the bus
+
+    the event is serialized only once, no matter the number of subscribers
+    """
+
+    __slots__ = ('kind', 'service_guid', 'template_uid', 'template_name', 'payload')
+
+    def __init__(self, kind, service, data):
+        self.kind = kind
+        self.service_guid = service.guid
+        self.template_uid = str(service.template_uid)
+        self.template_name = service.template_uid.name
+        self.payload = json.dumps({
+            'kind': kind,
+            'timestamp': time.time(),
+            'service_guid': service.guid,
+            'service_name': service.name,
+            'template_uid': self.template_uid,
+            'data': data,
+        })
+
+
+class Subscription:
+    """
+    Subscription receives the events matching its filters
+    """
+
+    def __init__(self, bus, service_guids=None, templates=None, queue_size=1000, allow=None):
+        """
+        @param bus: EventBus this subscription is attached to
+        @param service_guids: if set, only receive the events of these services
+        @param templates: if set, only receive the events of the services using these templates.
+                          can be a full template uid or a template name
+        @param queue_size: maximum number of events waiting to be consumed
+        @param allow: if set, function called with the guid of the service of each event when it is consumed.
+                      the event is skipped if it returns False, so access rights are checked when the event is sent
+                      and not only when subscribing
+        """
+        self._bus = bus
+        self.service_guids = set(service_guids) if service_guids else None
+        self.templates = set(templates) if templates else None
+        self.allow = allow
+        self._queue = Queue(maxsize=queue_size)
+
+    def match(self, event):
+        if self.service_guids is not None and event.service_guid not in self.service_guids:
+            return False
+        if self.templates is not None and \
+                event.template_uid not in self.templates and \
+                event.template_name not in self.templates:
+            return False
+        return True
+
+    def put(self, event):
+        try:
+            self._queue.put_nowait(event)
+        except Full:
+            events_dropped.inc()
+
+    def get(self, timeout=None):
+        """
+        wait for the next event
+
+        @return: the next event or None if no event was received within timeout seconds
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                event = self._queue.get(timeout=remaining)
+            except Empty:
+                return None
+            if self.allow is None or self.allow(event.service_guid):
+                return event
+
+    def close(self):
+        self._bus.unsubscribe(self)
+
+
+class EventBus:
+    """
+    EventBus dispatches the events published by the robot to the subscribers
+    """
+
+    def __init__(self):
+        self._subscriptions = []
+
+    def subscribe(self, service_guids=None, templates=None, queue_size=1000, allow=None):
+        """
+        create a new subscription
+
+        @param service_guids: if set, only receive the events of these services
+        @param templates: if set, only receive the events of the services using these templates
+        @param allow: if set, function that checks the subscriber can receive the events of a service, see Subscription
+        @return: Subscription, call close on it when you're done with it
+        """
+        sub = Subscription(self, service_guids=service_guids, templates=templates, queue_size=queue_size, allow=allow)
+        self._subscriptions.append(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        try:
+            self._subscriptions.remove(sub)
+        except ValueError:
+            pass
+
+    def publish(self, kind, service, **data):
+        """
+        publish an event about service
+
+        @param kind: kind of the event, one of the EVENT_* constants
+        @param service: service the event is about
+        @param data: extra information about the event
+        """
+        if not self._subscriptions:
+            return
+
+        try:
+            event = Event(kind, service, data)
+        except:
+            logger.exception("error creating %s event" % kind)
+            return
+
+        for sub in self._subscriptions:
+            if sub.match(event):
+                sub.put(event)
+
+
+# bus shared by all the services of the robot
+event_bus = EventBus()
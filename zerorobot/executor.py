@@ -0,0 +1,128 @@
+"""
+This module implements the executor shared by all the services of the robot.
+
+Instead of dedicating a greenlet to each service to process its task list, a fixed number
+of workers pull the services that have tasks waiting from a ready queue.
+A worker executes a single task of the service then puts the service back at the end of the queue
+if it has more tasks waiting, so the services take turns and the number of actions executed at the
+same time is bounded by the number of workers.
+A service is never in the queue twice nor executed by two workers at once, so its tasks are still
+executed one at a time and in order.
+
+If the executor has no worker, each service processes its own task list with a dedicated greenlet,
+see TemplateBase._run
+"""
+
+import gevent
+from gevent.queue import Empty, Queue
+
+from js9 import j
+from zerorobot import config
+from zerorobot.prometheus.robot import (executor_services_ready,
+                                        executor_workers_busy)
+
+logger = j.logger.get('zerorobot')
+
+
+class Executor:
+    """
+    Executor runs the tasks of the services with a pool of workers
+    """
+
+    def __init__(self, size=0):
+        """
+        @param size: number of workers, 0 to let each service process its own task list
+        """
+        self.size = size
+        self._ready = Queue()
+        # services in the ready queue or being executed by a worker
+        self._active = set()
+        self._workers = []
+
+    @property
+    def shared(self):
+        """
+        True if the tasks of the services are executed by the workers of the executor
+        """
+        return self.size > 0
+
+    def configure(self, size):
+        """
+        set the number of workers
+        this needs to be called before any service is created
+        """
+        if size < 0:
+            raise ValueError("size must be positive")
+        self.stop()
+        self.size = size
+
+    def notify(self, service):
+        """
+        notify the executor that service has tasks waiting
+        """
+        if not self.shared:
+            return
+        if not self._workers:
+            self.start()
+        if service in self._active:
+            return
+        self._active.add(service)
+        self._ready.put(service)
+        executor_services_ready.set(self._ready.qsize())
+
+    def start(self):
+        """
+        start the workers
+        """
+        self._workers = [gevent.spawn(self._work) for _ in range(self.size)]
+
+    def stop(self, wait=False, timeout=None):
+        """
+        stop the workers, the tasks waiting stay in the task list of their service
+        the ready queue is emptied, the services are queued again once they are notified
+        """
+        workers, self._workers = self._workers, []
+        gevent.killall(workers, block=wait, timeout=timeout)
+        self._ready = Queue()
+        self._active = set()
+        executor_services_ready.set(0)
+
+    def _work(self):
+        # wait to start the processsing of task list after the services are fully loaded
+        if config.SERVICE_LOADED:
+            config.SERVICE_LOADED.wait()
+
+        while True:
+            try:
+                service = self._ready.get()
+                executor_services_ready.set(self._ready.qsize())
+                try:
+                    self._execute_next(service)
+                finally:
+                    if not getattr(service, '_paused', False) and not service.task_list.empty():
+                        # give the other services their turn before executing the next task of this one
+                        self._ready.put(service)
+                    else:
+                        self._active.discard(service)
+            except gevent.GreenletExit:
+                return
+            except:
+                logger.exception("Uncaught exception in executor worker!")
+
+    def _execute_next(self, service):
+        if getattr(service, '_paused', False):
+            return
+        try:
+            task = service.task_list.get(block=False)
+        except Empty:
+            return
+
+        executor_workers_busy.inc()
+        try:
+            service._execute(task)
+        finally:
+            executor_workers_busy.dec()
+
+
+# executor of the robot
+executor = Executor()
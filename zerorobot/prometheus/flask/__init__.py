@@ -3,53 +3,111 @@ from urllib.parse import urlparse, parse_qs
 
 from flask import request
 from flask.helpers import make_response
-from prometheus_client import core, generate_latest, CONTENT_TYPE_LATEST, Gauge, Histogram, Counter
+from prometheus_client import REGISTRY, core, generate_latest, CONTENT_TYPE_LATEST, Gauge, Histogram, Counter
 import flask
 
 from zerorobot.prometheus.host import monitor_host_metrics
 from zerorobot.prometheus.robot import monitor_robot_metrics
 
 
+# maximum number of distinct endpoints labels, the requests to any other endpoint are counted under OTHER_ENDPOINT
+MAX_ENDPOINTS = 200
+# label of the requests that don't match any route
+UNMATCHED_ENDPOINT = 'unmatched'
+# label of the requests once MAX_ENDPOINTS is reached
+OTHER_ENDPOINT = 'other'
+
+_methods = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+
+
+class EndpointLabels:
+    """
+    EndpointLabels computes the labels of the HTTP metrics of a request
+
+    requests are labeled with the route template (e.g. /services/<service_guid>) instead of the path,
+    so the guids of the services and tasks never end up in the labels of the metrics.
+    The number of distinct endpoints is capped so the number of time series stays bounded
+    no matter what the clients send.
+    """
+
+    def __init__(self, max_endpoints=MAX_ENDPOINTS):
+        self.max_endpoints = max_endpoints
+        self._endpoints = set()
+
+    def endpoint(self, req):
+        rule = req.url_rule.rule if req.url_rule is not None else None
+        if rule is None:
+            return UNMATCHED_ENDPOINT
+        if rule in self._endpoints:
+            return rule
+        if len(self._endpoints) >= self.max_endpoints:
+            return OTHER_ENDPOINT
+        self._endpoints.add(rule)
+        return rule
+
+    def method(self, req):
+        return req.method if req.method in _methods else 'other'
+
+
 def monitor(app):
+    monitor_host_metrics()
+    monitor_robot_metrics()
+    monitor_http_requests(app)
+
+    app.add_url_rule('/metrics', 'prometheus_metrics', view_func=metrics)
+
+
+def monitor_http_requests(app, registry=REGISTRY, max_endpoints=MAX_ENDPOINTS):
+    """
+    instrument all the requests served by app
+
+    @param registry: prometheus registry where to register the metrics
+    @param max_endpoints: maximum number of distinct endpoint labels
+    """
+    labels = EndpointLabels(max_endpoints)
+
     def before_request():
         flask.g.start_time = time.time()
+        flask.g.metrics_labels = (labels.method(request), labels.endpoint(request))
         http_concurrent_request_count.inc()
         content_length = request.content_length
         if (content_length):
-            http_request_size_bytes.labels(request.method, request.path).observe(content_length)
+            http_request_size_bytes.labels(*flask.g.metrics_labels).observe(content_length)
 
     def after_request(response):
+        if hasattr(flask.g, 'metrics_labels'):
+            method, endpoint = flask.g.metrics_labels
+        else:
+            # before_request has been skipped by an other before_request handler
+            method, endpoint = labels.method(request), labels.endpoint(request)
         if hasattr(flask.g, 'start_time'):
             request_latency = time.time() - flask.g.start_time
-            http_request_latency_ms.labels(request.method, request.path).observe(request_latency)
+            http_request_latency_ms.labels(method, endpoint).observe(request_latency)
 
         http_concurrent_request_count.dec()
 
-        http_request_count.labels(request.method, request.path, response.status_code).inc()
+        http_request_count.labels(method, endpoint, response.status_code).inc()
         length = response.calculate_content_length()
         if length:
-            http_response_size_bytes.labels(request.method, request.path).observe(length)
+            http_response_size_bytes.labels(method, endpoint).observe(length)
         return response
 
-    monitor_host_metrics()
-    monitor_robot_metrics()
-
     http_request_latency_ms = Histogram('http_request_latency_ms', 'HTTP Request Latency',
-                                        ['method', 'endpoint'])
+                                        ['method', 'endpoint'], registry=registry)
 
     http_request_size_bytes = Histogram('http_request_size_bytes', 'HTTP request size in bytes',
-                                        ['method', 'endpoint'])
+                                        ['method', 'endpoint'], registry=registry)
 
     http_response_size_bytes = Histogram('http_response_size_bytes', 'HTTP response size in bytes',
-                                         ['method', 'endpoint'])
+                                         ['method', 'endpoint'], registry=registry)
 
-    http_request_count = Counter('http_request_count', 'HTTP Request Count', ['method', 'endpoint', 'http_status'])
-    http_concurrent_request_count = Gauge('http_concurrent_request_count', 'Flask Concurrent Request Count')
+    http_request_count = Counter('http_request_count', 'HTTP Request Count',
+                                 ['method', 'endpoint', 'http_status'], registry=registry)
+    http_concurrent_request_count = Gauge('http_concurrent_request_count', 'Flask Concurrent Request Count',
+                                          registry=registry)
     app.before_request(before_request)
     app.after_request(after_request)
 
-    app.add_url_rule('/metrics', 'prometheus_metrics', view_func=metrics)
-
 
 def metrics():
     registry = core.REGISTRY
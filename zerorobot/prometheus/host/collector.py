@@ -0,0 +1,96 @@
+"""
+This module implements the prometheus collector of the host metrics.
+
+Instead of registering one gauge per metric with a callback that re-reads /proc,
+the collector reads each source (cpu, memory, swap, network, disk) once per scrape
+and emits all the related samples from that single read.
+"""
+
+import os
+
+import psutil
+from prometheus_client.core import GaugeMetricFamily
+
+from .sampler import host_sampler
+
+
+class HostCollector:
+    """
+    prometheus collector that exposes the metrics of the host the robot is running on
+    """
+
+    def collect(self):
+        yield from self._collect_cpu()
+        yield from self._collect_memory()
+        yield from self._collect_network()
+        yield from self._collect_disk()
+
+    def _collect_cpu(self):
+        yield _gauge('process_cpu_usage_percents', 'CPU Usage in percents', psutil.cpu_percent())
+
+        cpu_times = psutil.cpu_times()
+        yield _gauge('process_cpu_time_user_mode', '', cpu_times.user)
+        yield _gauge('process_cpu_time_system_mode', '', cpu_times.system)
+        yield _gauge('process_cpu_time_idle_mode', '', cpu_times.idle)
+
+    def _collect_memory(self):
+        mem = psutil.virtual_memory()
+
+        if "MEMORY_LIMIT" in os.environ:
+            mem_limit_str = os.environ["MEMORY_LIMIT"]
+            total = float(mem_limit_str[:len(mem_limit_str) - 1])
+        else:
+            total = mem.total
+
+        yield _gauge('host_memory_total_bytes', '', total)
+        yield _gauge('host_memory_cached_bytes', '', mem.cached)
+        yield _gauge('host_memory_inactive_bytes', '', mem.inactive)
+        yield _gauge('host_memory_active_bytes', '', mem.active)
+        yield _gauge('host_memory_buffers_bytes', '', mem.buffers)
+        yield _gauge('host_memory_free_bytes', '', mem.free)
+        yield _gauge('host_memory_used_bytes', '', mem.used)
+        yield _gauge('host_memory_percents', '', mem.percent)
+
+        swap = psutil.swap_memory()
+        yield _gauge('host_swap_memory_percent', '', swap.percent)
+        yield _gauge('host_swap_memory_used_bytes', '', swap.used)
+        yield _gauge('host_swap_memory_free_bytes', '', swap.free)
+
+    def _collect_network(self):
+        # a single read of /proc/net/dev gives both the per interface and the total counters
+        pernic = psutil.net_io_counters(pernic=True)
+
+        bytes_sent = GaugeMetricFamily('network_bytes_sent_int', '', labels=['interface'])
+        bytes_recv = GaugeMetricFamily('network_bytes_recv_int', 'Total bytes received via current interface',
+                                       labels=['interface'])
+        for interface, counters in sorted(pernic.items()):
+            bytes_sent.add_metric([interface], counters.bytes_sent)
+            bytes_recv.add_metric([interface], counters.bytes_recv)
+        yield bytes_sent
+        yield bytes_recv
+
+        # per second can be calculate from total
+        counters = pernic.values()
+        yield _gauge('host_net_tx_bytes', '', sum(c.bytes_sent for c in counters))
+        yield _gauge('network_bytes_recv', 'Total bytes received', sum(c.bytes_recv for c in counters))
+        yield _gauge('network_packets_sent', '', sum(c.packets_sent for c in counters))
+        yield _gauge('network_packets_recv', '', sum(c.packets_recv for c in counters))
+        yield _gauge('network_errin', '', sum(c.errin for c in counters))
+        yield _gauge('network_errout', '', sum(c.errout for c in counters))
+        yield _gauge('network_dropin', '', sum(c.dropin for c in counters))
+        yield _gauge('network_dropout', '', sum(c.dropout for c in counters))
+
+    def _collect_disk(self):
+        # IO rates are computed by the background sampler
+        yield _gauge('host_disk_reads', 'Total reads for all disks', host_sampler.disk_reads_persec())
+        yield _gauge('host_disk_writes', 'Total writes for all disks', host_sampler.disk_writes_persec())
+
+        usage = psutil.disk_usage("/")
+        yield _gauge('host_disk_total', '', usage.total)
+        yield _gauge('host_disk_free', '', usage.free)
+        yield _gauge('host_disk_used', '', usage.used)
+        yield _gauge('host_disk_percent', '', usage.percent)
+
+
+def _gauge(name, documentation, value):
+    return GaugeMetricFamily(name, documentation, value=value)
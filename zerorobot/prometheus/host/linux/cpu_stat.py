@@ -1,6 +1,9 @@
 import time
 
 
+CPU_MODES = ('user', 'nice', 'system', 'idle', 'iowait', 'irq', 'softirq')
+
+
 def cpu_times():
     """Return a sequence of cpu times.
 
@@ -31,18 +34,25 @@ def cpu_percents(sample_duration=1):
     """
 
     deltas = __cpu_time_deltas(sample_duration)
+    return cpu_percents_from_deltas(deltas)
+
+
+def cpu_percents_from_deltas(deltas):
+    """Return a dictionary of usage percentages and cpu modes
+    computed from a sequence of cpu time deltas.
+
+    the deltas are the difference between two samples of cpu_times(),
+    this allows callers that already keep the previous sample around
+    to compute the percentages without sleeping.
+    """
+
     total = sum(deltas)
+    if total <= 0:
+        return {mode: 0.0 for mode in CPU_MODES}
+
     percents = [100 - (100 * (float(total - x) / total)) for x in deltas]
 
-    return {
-        'user': percents[0],
-        'nice': percents[1],
-        'system': percents[2],
-        'idle': percents[3],
-        'iowait': percents[4],
-        'irq': percents[5],
-        'softirq': percents[6],
-    }
+    return {mode: percents[i] for i, mode in enumerate(CPU_MODES)}
 
 
 def procs_running():
@@ -20,6 +20,19 @@ def disk_reads_persec(sample_duration=1):
     return reads_per_sec
 
 
+def disk_reads_writes():
+    """Return the total number of (reads, writes) completed by all disks since boot."""
+    num_reads = 0
+    num_writes = 0
+    with open('/proc/diskstats') as f1:
+        content = f1.read()
+    for line in content.splitlines():
+        fields = line.strip().split()
+        num_reads += int(fields[3])
+        num_writes += int(fields[7])
+    return num_reads, num_writes
+
+
 def _disk_reads():
     num_reads = 0
     with open('/proc/diskstats') as f1:
@@ -0,0 +1,114 @@
+"""
+This module implements a background sampler of the host metrics.
+
+Some host metrics are rates (cpu usage, disk IO per second) and computing them
+requires two samples of the /proc counters taken some time apart.
+Instead of sleeping during a scrape, the sampler runs in its own greenlet,
+keeps the previous sample around and updates the rates at a fixed interval.
+Scrapes and REST calls then only read the cached values.
+"""
+
+import time
+
+import gevent
+
+from js9 import j
+
+from .linux import cpu_stat, disk_stat
+
+logger = j.logger.get('zerorobot')
+
+
+class HostSampler:
+    """
+    HostSampler keeps rolling rate counters computed from /proc
+    """
+
+    def __init__(self, interval=1):
+        """
+        @param interval: number of seconds between two samples
+        """
+        self.interval = interval
+        self._gl = None
+        self._last_sample = None
+        self._cpu_percents = cpu_stat.cpu_percents_from_deltas([])
+        self._disk_reads_persec = 0.0
+        self._disk_writes_persec = 0.0
+
+    @property
+    def is_running(self):
+        return self._gl is not None and not self._gl.dead
+
+    def start(self):
+        """
+        take a first sample and start the sampling greenlet
+        calling start on a running sampler is a no-op
+        """
+        if self.is_running:
+            return
+        self.sample()
+        self._gl = gevent.spawn(self._run)
+
+    def stop(self):
+        """
+        stop the sampling greenlet
+        """
+        if self._gl is not None:
+            self._gl.kill(block=False)
+            self._gl = None
+
+    def _run(self):
+        while True:
+            try:
+                gevent.sleep(self.interval)
+                self.sample()
+            except gevent.GreenletExit:
+                return
+            except:
+                logger.exception("error sampling host metrics")
+
+    def sample(self):
+        """
+        read the /proc counters and update the rates
+        using the previous sample
+        """
+        now = time.time()
+        cpu_times = cpu_stat.cpu_times()
+        disk_io = disk_stat.disk_reads_writes()
+
+        if self._last_sample is not None:
+            last_time, last_cpu_times, last_disk_io = self._last_sample
+            deltas = [b - a for a, b in zip(last_cpu_times, cpu_times)]
+            self._cpu_percents = cpu_stat.cpu_percents_from_deltas(deltas)
+
+            elapsed = now - last_time
+            if elapsed > 0:
+                self._disk_reads_persec = (disk_io[0] - last_disk_io[0]) / elapsed
+                self._disk_writes_persec = (disk_io[1] - last_disk_io[1]) / elapsed
+
+        self._last_sample = (now, cpu_times, disk_io)
+
+    def cpu_percents(self):
+        """
+        return the cpu usage percentages per cpu mode,
+        computed over the last sampling interval
+        """
+        return dict(self._cpu_percents)
+
+    def disk_reads_persec(self):
+        """
+        return the number of disk reads per second,
+        computed over the last sampling interval
+        """
+        return self._disk_reads_persec
+
+    def disk_writes_persec(self):
+        """
+        return the number of disk writes per second,
+        computed over the last sampling interval
+        """
+        return self._disk_writes_persec
+
+
+# sampler shared by the prometheus gauges and the REST API
+host_sampler = HostSampler()
@@ -1,4 +1,4 @@
-from prometheus_client import Gauge, Histogram
+from prometheus_client import Counter, Gauge, Histogram
 from zerorobot import service_collection as scol
 import psutil
 import os
@@ -8,6 +8,33 @@ nr_task_waiting = Gauge("robot_tasks_waiting_total", "Number of task waiting per
 task_latency = Histogram('robot_tasks_latency_ms', 'Task latency',
                          ['action_name', 'template_uid'])
 
+# encoded views of the finished tasks
+task_view_cache_hits = Counter('robot_task_view_cache_hits', 'Number of task views served from the cache')
+task_view_cache_misses = Counter('robot_task_view_cache_misses', 'Number of finished task views not found in the cache')
+task_view_cache_bytes = Gauge('robot_task_view_cache_bytes', 'Size of the encoded task views kept in the cache')
+
+# web hooks
+webhook_delivered = Counter('robot_webhook_delivered', 'Number of payloads delivered to web hooks', ['kind'])
+webhook_dropped = Counter('robot_webhook_dropped', 'Number of payloads dropped before reaching web hooks', ['kind', 'reason'])
+
+# admission control of the REST API
+http_requests_queued = Gauge('robot_http_requests_queued', 'Number of requests waiting for a free slot', ['endpoint_class'])
+http_requests_rejected = Counter('robot_http_requests_rejected', 'Number of requests rejected because the robot is overloaded', ['endpoint_class'])
+
+# rolling upgrades of the services
+template_upgrade_services = Counter('robot_template_upgrade_services', 'Number of services upgraded to a new template', ['result'])
+template_upgrade_pending = Gauge('robot_template_upgrade_pending', 'Number of services waiting to be upgraded')
+template_upgrade_batch_duration = Histogram('robot_template_upgrade_batch_seconds', 'Duration of the batches of the rolling upgrades',
+                                            buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, float('inf')))
+template_upgrades_halted = Counter('robot_template_upgrades_halted', 'Number of rolling upgrades halted because of errors')
+
+# shared executor of the tasks
+executor_services_ready = Gauge('robot_executor_services_ready', 'Number of services with tasks waiting for a free executor worker')
+executor_workers_busy = Gauge('robot_executor_workers_busy', 'Number of executor workers executing a task')
+
+# events
+events_dropped = Counter('robot_events_dropped', 'Number of events dropped because a subscriber was too slow')
+
 
 process = psutil.Process(os.getpid())
 
@@ -20,6 +47,8 @@ def monitor_robot_metrics():
     # services
     nr_services = Gauge("robot_services_total", "Number of services running")
     nr_services.set_function(lambda: len(scol.list_services()))
+    nr_services_hibernated = Gauge("robot_services_hibernated_total", "Number of services hibernated because they are idle")
+    nr_services_hibernated.set_function(lambda: scol.count_hibernated())
     # memory
     robot_memory = Gauge('robot_total_memory_bytes', "Memory used by 0-robot")
     robot_memory.set_function(lambda: memory_usage_resource())
@@ -21,25 +21,7 @@ def load_services(data_dir):
             continue
         service_info = j.data.serializer.yaml.load(info_path)
 
-        tmpl_uid = TemplateUID.parse(service_info['template'])
-        try:
-            tmplClass = tcol.get(str(tmpl_uid))
-        except tcol.TemplateNotFoundError:
-            # template of the service not found, could be we have the template but not the same version
-            # try to get the template without specifiying version
-            tmplClasses = tcol.find(host=tmpl_uid.host, account=tmpl_uid.account, repo=tmpl_uid.repo, name=tmpl_uid.name)
-            size = len(tmplClasses)
-            if size > 1:
-                raise RuntimeError("more then one template version found, this should never happens")
-            elif size < 1:
-                # if the template is not found, try to add the repo using the info of the service template uid
-                url = "http://%s/%s/%s" % (tmpl_uid.host, tmpl_uid.account, tmpl_uid.repo)
-                tcol.add_repo(url)
-                tmplClass = tcol.get(service_info['template'])
-            else:
-                # template of another version found, use newer version to load the service
-                tmplClass = tmplClasses[0]
-
+        tmplClass = _template_of(service_info)
         srv = scol.load(tmplClass, srv_dir)
 
     loading_failed = []
@@ -50,13 +32,37 @@ def load_services(data_dir):
             logger.error("fail to load %s: %s" % (service.guid, str(err)))
             # the service is not going to process its task list until it can
             # execute validate() without problem
-            service.gl_mgr.stop('executor')
+            service._stop_executor()
             loading_failed.append(service)
 
     if len(loading_failed) > 0:
         gevent.spawn(_try_load_service, loading_failed)
 
 
+def _template_of(service_info):
+    """
+    return the template class to use to load a service
+    """
+    tmpl_uid = TemplateUID.parse(service_info['template'])
+    try:
+        return tcol.get(tmpl_uid)
+    except tcol.TemplateNotFoundError:
+        # template of the service not found, could be we have the template but not the same version
+        # try to get the template without specifiying version
+        tmplClasses = tcol.find(host=tmpl_uid.host, account=tmpl_uid.account, repo=tmpl_uid.repo, name=tmpl_uid.name)
+        size = len(tmplClasses)
+        if size > 1:
+            raise RuntimeError("more then one template version found, this should never happens")
+        elif size < 1:
+            # if the template is not found, try to add the repo using the info of the service template uid
+            url = "http://%s/%s/%s" % (tmpl_uid.host, tmpl_uid.account, tmpl_uid.repo)
+            tcol.add_repo(url)
+            return tcol.get(service_info['template'])
+        else:
+            # template of another version found, use newer version to load the service
+            return tmplClasses[0]
+
+
 def _try_load_service(services):
     """
     this method tries to execute `validate` method on the services that failed to load
@@ -71,7 +77,7 @@ def _try_load_service(services):
                 service.validate()
                 logger.debug("loading succeeded for %s" % service.guid)
                 # validate passed, service is healthy again
-                service.gl_mgr.add('executor', gevent.Greenlet(service._run))
+                service._start_executor()
                 services.remove(service)
             except:
                 logger.debug("loading failed again for %s" % service.guid)
@@ -16,7 +16,13 @@ from zerorobot import config, webhooks
 from zerorobot.git import url as giturl
 from zerorobot.prometheus.flask import monitor
 from zerorobot.server import auth
+from zerorobot.server.admission import AdmissionControl
 from zerorobot.server.app import app
+from zerorobot.task.eco_aggregator import eco_aggregator
+from zerorobot.task.storage import sqlite as task_storage
+from zerorobot.executor import executor
+from zerorobot.blueprint_jobs import jobs as blueprint_jobs
+from zerorobot.upgrades import upgrades
 
 from . import loader
 
@@ -40,6 +46,8 @@ class Robot:
         self._http = None  # server handler
         self.addr = None
         self._sig_handler = []
+        # number of seconds spent in each step of the startup, see _log_startup_timings
+        self.startup_timings = {'templates': 0.0}
 
     @property
     def address(self):
@@ -61,9 +69,17 @@ class Robot:
         config.data_repo = config.DataRepo(url)
         self.data_repo_url = url
 
-    def add_template_repo(self, url, directory='templates'):
+    def add_template_repo(self, url, directory='templates', lazy=True):
+        """
+        make the templates of a repository available to the robot
+
+        @param lazy: if True, the modules of the templates are only imported once a service
+                     needs them, which makes the startup faster on large template repositories
+        """
+        started = time.time()
         url, branch = giturl.parse_template_repo_url(url)
-        tcol.add_repo(url=url, branch=branch, directory=directory)
+        tcol.add_repo(url=url, branch=branch, directory=directory, lazy=lazy)
+        self.startup_timings['templates'] += time.time() - started
 
     def set_config_repo(self, url=None, key=None):
         """
@@ -86,8 +102,23 @@ class Robot:
               auto_push_interval=60,
               admin_organization=None,
               user_organization=None,
+              owner_secret_ttl=30 * 24 * 3600,
               mode=None,
               god=False,
+              max_connections=1000,
+              max_requests=200,
+              max_heavy_requests=20,
+              max_streams=100,
+              max_long_polls=100,
+              queue_timeout=2,
+              blueprint_concurrency=1,
+              max_blueprint_jobs=2,
+              upgrade_concurrency=25,
+              upgrade_canary_size=1,
+              upgrade_batch_size=100,
+              upgrade_max_error_rate=0.1,
+              hibernate_after=0,
+              executor_workers=0,
               **kwargs):
         """
         start the rest web server
@@ -95,6 +126,7 @@ class Robot:
         """
         config.mode = mode
         config.god = god  # when true, this allow to get data and logs from services using the REST API
+        config.blueprint_concurrency = blueprint_concurrency
 
         if config.data_repo is None or config.data_repo.path is None:
             raise RuntimeError("Not data repository set. Robot doesn't know where to save data.")
@@ -105,6 +137,19 @@ class Robot:
         # instantiate webhooks manager and load the configured webhooks
         config.webhooks = webhooks.Storage(config.data_repo.path)
         config.webhooks.load()
+        config.webhooks_dispatcher = webhooks.Dispatcher(config.webhooks)
+        config.webhooks_dispatcher.start()
+        # report summaries of the repeated task errors
+        eco_aggregator.start()
+        # how the services are upgraded when their templates change
+        upgrades.configure(concurrency=upgrade_concurrency,
+                           canary_size=upgrade_canary_size,
+                           batch_size=upgrade_batch_size,
+                           max_error_rate=upgrade_max_error_rate)
+        # number of blueprints executed in the background at the same time
+        blueprint_jobs.configure(max_running=max_blueprint_jobs)
+        # how the tasks of the services are executed, 0 workers gives each service its own greenlet
+        executor.configure(executor_workers)
 
         logger.info("data directory: %s" % config.data_repo.path)
         logger.info("config directory: %s" % j.tools.configmanager.path)
@@ -115,7 +160,7 @@ class Robot:
             monitor(app)
 
          # configure authentication middleware
-        _configure_authentication(admin_organization, user_organization)
+        _configure_authentication(admin_organization, user_organization, owner_secret_ttl)
 
         self._block = block
 
@@ -131,9 +176,12 @@ class Robot:
             config.config_repo.start_auto_push(interval=auto_push_interval, logger=logger)
 
         # load services from data repo
+        started = time.time()
         loader.load_services(config.data_repo.path)
+        self.startup_timings['services'] = time.time() - started
         # notify services that they can start processing their task list
         config.SERVICE_LOADED.set()
+        self._log_startup_timings()
 
         if mode == 'node':
             _create_node_service()
@@ -141,10 +189,22 @@ class Robot:
         # only keep executed tasks for 2 hours
         gevent.spawn(_trim_tasks, 7200)
 
+        if hibernate_after > 0:
+            logger.info("hibernation of the services idle for %d seconds enabled" % hibernate_after)
+            gevent.spawn(_hibernate_services, hibernate_after)
+
         # using a pool allow to kill the request when stopping the server
-        pool = Pool(None)
+        # the pool bounds the number of open connections, the admission control
+        # bounds the number of requests actually served and rejects the others
+        pool = Pool(max_connections)
+        handler = AdmissionControl(app,
+                                   max_requests=max_requests,
+                                   max_heavy_requests=max_heavy_requests,
+                                   max_streams=max_streams,
+                                   max_long_polls=max_long_polls,
+                                   queue_timeout=queue_timeout)
         hostport = _split_hostport(listen)
-        self._http = WSGIServer(hostport, app, spawn=pool, log=logger, error_log=logger)
+        self._http = WSGIServer(hostport, handler, spawn=pool, log=logger, error_log=logger)
         self._http.start()
         logger.info("robot running at %s:%s" % hostport)
 
@@ -156,6 +216,15 @@ class Robot:
         else:
             self._http.start()
 
+    def _log_startup_timings(self):
+        stats = tcol.stats()
+        logger.info("startup: templates registered in %.2fs, services loaded in %.2fs, "
+                    "%d/%d templates imported in %.2fs, %d services",
+                    self.startup_timings.get('templates', 0),
+                    self.startup_timings.get('services', 0),
+                    stats['imported'], stats['templates'], stats['import_time'],
+                    len(scol.list_services()))
+
     def stop(self):
         """
         stop receiving requests
@@ -171,6 +240,10 @@ class Robot:
         self._http.stop()
         self._http = None
 
+        if config.webhooks_dispatcher:
+            config.webhooks_dispatcher.stop()
+        eco_aggregator.stop()
+
         # if we don't block, we can gracefully shutdown here
         # cause we're not in a sig handler
         if self._block is False:
@@ -180,8 +253,11 @@ class Robot:
     def _save_services(self):
         """
         serialize all the services on disk
+        the hibernated services have been serialized when they were hibernated
         """
-        for service in scol.list_services():
+        # stop the execution of the tasks
+        executor.stop()
+        for service in scol.list_services(hibernated=False):
             # stop all the greenlets attached to the services
             service.gl_mgr.stop_all()
             service.save()
@@ -222,10 +298,14 @@ def _trim_tasks(period=7200):  # default 2 hours ago
             ago = int(time.time()) - period
 
             for service in scol.list_services():
-                if not hasattr(service.task_list._done, 'delete_until'):
+                if isinstance(service, scol.ServiceStub):
+                    # hibernated services don't get new tasks, their tasks only need to be deleted once
+                    if not service.tasks_trimmed and service.hibernated < ago:
+                        task_storage.delete_until(service._path, ago)
+                        service.tasks_trimmed = True
                     continue
                 # delete all task that have been created before ago
-                service.task_list._done.delete_until(ago)
+                service.task_list.delete_until(ago)
         except gevent.GreenletExit:
             # exit properly
             return
@@ -234,6 +314,25 @@ def _trim_tasks(period=7200):  # default 2 hours ago
             continue
 
 
+def _hibernate_services(idle_time):
+    """
+    this greenlet hibernates the services that have been idle for idle_time seconds
+    see service_collection.hibernate
+    """
+    while True:
+        try:
+            gevent.sleep(min(idle_time, 60))
+            count = scol.hibernate_idle(idle_time)
+            if count:
+                logger.debug("%d idle services hibernated" % count)
+        except gevent.GreenletExit:
+            # exit properly
+            return
+        except:
+            logger.exception("error hibernating idle services")
+            continue
+
+
 def _split_hostport(hostport):
     """
     convert a listen addres of the form
@@ -246,10 +345,11 @@ def _split_hostport(hostport):
     return host, int(port)
 
 
-def _configure_authentication(admin_organization, user_organization):
+def _configure_authentication(admin_organization, user_organization, owner_secret_ttl):
     if admin_organization:
         auth.auth.admin_organization = admin_organization
         logger.info("admin JWT authentication enabled for organization: %s" % auth.auth.admin_organization)
     if user_organization:
         auth.auth.user_organization = user_organization
         logger.info("user JWT authentication enabled for organization: %s" % auth.auth.user_organization)
+    auth.user_jwt.owner_secret_ttl = owner_secret_ttl
@@ -0,0 +1,175 @@
+"""
+This module implements the admission control of the REST API.
+
+Every request is classified according to the route it targets, each class of request
+has its own concurrency limit and all the requests share a global limit.
+A request that can't get a slot within queue_timeout seconds is rejected right away
+with a 503 and a Retry-After header instead of piling up in memory and starving the services.
+
+Event streams are long lived connections, they only count against their own limit
+so they can never exhaust the slots of the regular requests.
+The same goes for the long-polls: the requests waiting for a task or a blueprint job with ?wait=
+"""
+
+import json
+import time
+from urllib.parse import parse_qs
+
+from gevent.lock import BoundedSemaphore
+from werkzeug.exceptions import HTTPException
+from werkzeug.wrappers import Response
+from werkzeug.wsgi import ClosingIterator
+
+from zerorobot.prometheus.robot import http_requests_queued, http_requests_rejected
+
+CLASS_HEAVY = 'heavy'
+CLASS_LIGHT = 'light'
+CLASS_STREAM = 'stream'
+CLASS_LONG_POLL = 'long_poll'
+
+# classes of the long lived requests, they don't take a global slot
+LONG_LIVED_CLASSES = (CLASS_STREAM, CLASS_LONG_POLL)
+
+# routes that are expensive to serve: blueprints, listings and template management
+HEAVY_ROUTES = {
+    ('POST', '/blueprints'),
+    ('POST', '/blueprints/diff'),
+    ('POST', '/blueprints/jobs'),
+    ('GET', '/services'),
+    ('POST', '/services'),
+    ('POST', '/services/task_list'),
+    ('GET', '/templates'),
+    ('POST', '/templates'),
+    ('PUT', '/templates'),
+}
+
+# routes that keep the connection open
+STREAM_ROUTES = {
+    ('GET', '/events'),
+}
+
+# routes that block until a task or a job is done when the wait query parameter is set
+LONG_POLL_ROUTES = {
+    ('GET', '/services/<service_guid>/task_list/<task_guid>'),
+    ('GET', '/blueprints/jobs/<job_id>'),
+}
+
+# routes never limited, so the robot can still be monitored when overloaded
+EXEMPT_ROUTES = {
+    ('GET', '/metrics'),
+}
+
+
+class AdmissionControl:
+    """
+    WSGI middleware limiting the number of requests served concurrently
+    """
+
+    def __init__(self, app, max_requests=200, max_heavy_requests=20, max_streams=100, max_long_polls=100,
+                 queue_timeout=2, retry_after=1):
+        """
+        @param app: flask application to protect
+        @param max_requests: maximum number of requests served concurrently, event streams excluded
+        @param max_heavy_requests: maximum number of blueprints, listings and templates requests served concurrently
+        @param max_streams: maximum number of event streams open concurrently
+        @param max_long_polls: maximum number of requests waiting for a task or a job concurrently
+        @param queue_timeout: maximum number of seconds a request waits for a slot before being rejected
+        @param retry_after: value of the Retry-After header sent with the rejected requests
+        """
+        self.app = app
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._global = BoundedSemaphore(max_requests)
+        self._classes = {
+            CLASS_HEAVY: BoundedSemaphore(max_heavy_requests),
+            CLASS_LIGHT: None,
+            CLASS_STREAM: BoundedSemaphore(max_streams),
+            CLASS_LONG_POLL: BoundedSemaphore(max_long_polls),
+        }
+
+    def classify(self, environ):
+        """
+        @return: the class of the request or None if the request is not limited
+        """
+        method = environ.get('REQUEST_METHOD', 'GET')
+        try:
+            rule, _ = self.app.url_map.bind_to_environ(environ).match(return_rule=True)
+        except HTTPException:
+            # the request will be refused by flask anyway
+            return CLASS_LIGHT
+
+        key = (method, rule.rule)
+        if key in EXEMPT_ROUTES:
+            return None
+        if key in HEAVY_ROUTES:
+            return CLASS_HEAVY
+        if key in STREAM_ROUTES:
+            return CLASS_STREAM
+        if key in LONG_POLL_ROUTES and _waits(environ):
+            return CLASS_LONG_POLL
+        return CLASS_LIGHT
+
+    def __call__(self, environ, start_response):
+        klass = self.classify(environ)
+        if klass is None:
+            return self.app(environ, start_response)
+
+        # take the slot of the class first, so requests waiting for a class
+        # slot don't hold a global slot
+        locks = []
+        if self._classes[klass] is not None:
+            locks.append(self._classes[klass])
+        if klass not in LONG_LIVED_CLASSES:
+            locks.append(self._global)
+
+        if not self._acquire(locks, klass):
+            http_requests_rejected.labels(klass).inc()
+            return self._reject(environ, start_response)
+
+        def release():
+            for lock in reversed(locks):
+                lock.release()
+
+        try:
+            return ClosingIterator(self.app(environ, start_response), release)
+        except:
+            release()
+            raise
+
+    def _acquire(self, locks, klass):
+        deadline = time.monotonic() + self.queue_timeout
+        acquired = []
+        for lock in locks:
+            if not lock.acquire(blocking=False):
+                # no free slot, wait in the queue
+                http_requests_queued.labels(klass).inc()
+                try:
+                    ok = lock.acquire(timeout=max(0, deadline - time.monotonic()))
+                finally:
+                    http_requests_queued.labels(klass).dec()
+                if not ok:
+                    for l in reversed(acquired):
+                        l.release()
+                    return False
+            acquired.append(lock)
+        return True
+
+    def _reject(self, environ, start_response):
+        body = json.dumps({'code': 503, 'message': 'robot is overloaded, retry later'})
+        response = Response(body, status=503, mimetype='application/json',
+                            headers={'Retry-After': str(self.retry_after)})
+        return response(environ, start_response)
+
+
+def _waits(environ):
+    """
+    @return: True if the query string of the request asks to wait for the resource to be done
+    """
+    values = parse_qs(environ.get('QUERY_STRING', '')).get('wait')
+    if not values:
+        return False
+    try:
+        return float(values[0]) > 0
+    except ValueError:
+        # the handler refuses the request right away
+        return False
@@ -5,6 +5,8 @@ from flask import Flask, jsonify, send_file, send_from_directory
 from js9 import j
 
 from .blueprints_api import blueprints_api
+from .conditional import compress
+from .events_api import events_api
 from .services_api import services_api
 from .templates_api import templates_api
 from .robot_api import robot_api
@@ -14,10 +16,13 @@ dir_path = os.path.dirname(os.path.realpath(__file__))
 app = Flask(__name__)
 
 app.register_blueprint(blueprints_api)
+app.register_blueprint(events_api)
 app.register_blueprint(services_api)
 app.register_blueprint(templates_api)
 app.register_blueprint(robot_api)
 
+app.after_request(compress)
+
 
 @app.route('/apidocs/<path:path>')
 def send_js(path):
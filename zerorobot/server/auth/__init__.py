@@ -1 +1 @@
-from .auth import admin, user, service, admin_user, user_service, all
+from .auth import admin, user, service, admin_user, admin_service, user_service, all, authorize_service
@@ -7,6 +7,7 @@ from zerorobot import service_collection as scol
 
 from . import user_jwt
 from .flask_httpauth import HTTPTokenAuth, MultiAuth
+from .token_cache import TokenCache
 
 logger = j.logger.get('zrobot')
 
@@ -25,8 +26,19 @@ service = HTTPTokenAuth('Bearer',  header='ZrobotSecret')
 
 user_service = MultiAuth(user, service)
 admin_user = MultiAuth(admin, user)
+admin_service = MultiAuth(admin, service)
 all = MultiAuth(admin, user, service)
 
+# claims of the itsyouonline JWT already verified
+_verified = TokenCache()
+
+# endpoints of the routes that act on multiple services without a service_guid in their URL
+# the service scheme checks the services they target by guid, their handler checks the other services
+MULTI_SERVICE_ENDPOINTS = {
+    'services_api.ScheduleTasks',
+    'events_api.StreamEvents',
+}
+
 
 def _verify_token(token, organization):
     if organization is None:
@@ -36,11 +48,16 @@ def _verify_token(token, organization):
     if allowed_scopes is None or len(allowed_scopes) == 0:
         return True
 
-    try:
-        scope = jwt.decode(token, _oauth2_server_pub_key, audience=None)["scope"]
-    except Exception as err:
-        logger.error('error decoding JWT: %s', str(err))
-        return False
+    claims = _verified.get(token)
+    if claims is None:
+        try:
+            claims = jwt.decode(token, _oauth2_server_pub_key, audience=None)
+        except Exception as err:
+            logger.error('error decoding JWT: %s', str(err))
+            return False
+        _verified.set(token, claims)
+
+    scope = claims.get("scope", [])
 
     for allowed in allowed_scopes:
         for s in scope:
@@ -63,11 +80,29 @@ def _verify_user_token(token):
 @service.verify_token
 def _verify_secret_token(tokens):
     service_guid = request.view_args.get('service_guid')
-    if not service_guid:
+    if service_guid:
+        return _verify_service_secret(service_guid, tokens)
+
+    if request.endpoint not in MULTI_SERVICE_ENDPOINTS:
         return False
 
+    # routes that act on multiple services, like POST /services/task_list or GET /events, need a valid secret
+    # for every service the request targets by guid
+    # the other services are checked by the handler itself
+    for guid in _targeted_services():
+        if not _verify_service_secret(guid, tokens):
+            return False
+    return True
+
+
+def _verify_service_secret(service_guid, tokens):
+    try:
+        owner = scol.get_service_owner(service_guid)
+    except scol.ServiceNotFoundError:
+        owner = None
+
     for token in tokens.split(' '):
-        if user_jwt.verify(service_guid, token):
+        if user_jwt.verify(service_guid, token) or user_jwt.verify_owner(owner, token):
             return True
 
     try:
@@ -77,3 +112,27 @@ def _verify_secret_token(tokens):
         return False
 
     return False
+
+
+def authorize_service(service_guid):
+    """
+    check the secrets of the current request give access to the service service_guid
+    using the service scheme, for handlers that deal with multiple services
+
+    @return: True if the request is authorized, False otherwise
+    """
+    auth = service.get_auth()
+    tokens = auth['token'] if auth else ''
+    return _verify_service_secret(service_guid, tokens)
+
+
+def _targeted_services():
+    """
+    return the guids of the services targeted by the service_guid query parameter
+    or by the items of the body of the request
+    """
+    guids = {guid for guid in request.args.get('service_guid', '').split(',') if guid}
+    body = request.get_json(silent=True)
+    if isinstance(body, list):
+        guids.update(item['service_guid'] for item in body if isinstance(item, dict) and item.get('service_guid'))
+    return guids
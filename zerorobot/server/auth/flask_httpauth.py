@@ -1,5 +1,5 @@
 from functools import wraps
-from flask import request, make_response, jsonify, Response
+from flask import request, make_response, jsonify
 from werkzeug.datastructures import Authorization
 
 
@@ -42,40 +42,54 @@ class HTTPAuth(object):
     def authenticate_header(self):
         return '{0} realm="{1}"'.format(self.scheme, self.realm)
 
+    def get_auth(self):
+        auth = request.authorization
+        if auth is None and self.header in request.headers:
+            # Flask/Werkzeug do not recognize any authentication types
+            # other than Basic or Digest, so here we parse the header by
+            # hand
+            try:
+                auth_type, token = request.headers[self.header].split(None, 1)
+                auth = Authorization(auth_type, {'token': token})
+            except ValueError:
+                # The Authorization header is either empty or has no token
+                pass
+
+        # if the auth type does not match, we act as if there is no auth
+        # this is better than failing directly, as it allows the callback
+        # to handle special cases, like supporting multiple auth types
+        if auth is not None and auth.type.lower() != self.scheme.lower():
+            auth = None
+        return auth
+
+    def authorize(self):
+        """
+        check the credentials of the current request against this scheme
+        without calling any handler
+
+        @return: True if the request is authorized, False otherwise
+        """
+        # Flask normally handles OPTIONS requests on its own, but in the
+        # case it is configured to forward those to the application, we
+        # need to ignore authentication headers and let the request through
+        # to avoid unwanted interactions with CORS.
+        if request.method == 'OPTIONS':  # pragma: no cover
+            return True
+
+        auth = self.get_auth()
+        if auth and auth.username:
+            password = self.get_password_callback(auth.username)
+        else:
+            password = None
+        return bool(self.authenticate(auth, password))
+
     def login_required(self, f):
         @wraps(f)
         def decorated(*args, **kwargs):
-            auth = request.authorization
-            if auth is None and self.header in request.headers:
-                # Flask/Werkzeug do not recognize any authentication types
-                # other than Basic or Digest, so here we parse the header by
-                # hand
-                try:
-                    auth_type, token = request.headers[self.header].split(None, 1)
-                    auth = Authorization(auth_type, {'token': token})
-                except ValueError:
-                    # The Authorization header is either empty or has no token
-                    pass
-
-            # if the auth type does not match, we act as if there is no auth
-            # this is better than failing directly, as it allows the callback
-            # to handle special cases, like supporting multiple auth types
-            if auth is not None and auth.type.lower() != self.scheme.lower():
-                auth = None
-
-            # Flask normally handles OPTIONS requests on its own, but in the
-            # case it is configured to forward those to the application, we
-            # need to ignore authentication headers and let the request through
-            # to avoid unwanted interactions with CORS.
-            if request.method != 'OPTIONS':  # pragma: no cover
-                if auth and auth.username:
-                    password = self.get_password_callback(auth.username)
-                else:
-                    password = None
-                if not self.authenticate(auth, password):
-                    # Clear TCP receive buffer of any pending data
-                    request.data
-                    return self.auth_error_callback()
+            if not self.authorize():
+                # Clear TCP receive buffer of any pending data
+                request.data
+                return self.auth_error_callback()
 
             return f(*args, **kwargs)
         return decorated
@@ -113,28 +127,27 @@ class MultiAuth(object):
         self.main_auth = main_auth
         self.additional_auth = args
 
+    def authorize(self):
+        """
+        check the credentials of the current request against all the schemes
+
+        @return: True if one of the schemes authorizes the request, False otherwise
+        """
+        for auth in [self.main_auth, *self.additional_auth]:
+            if auth.authorize():
+                return True
+        return False
+
     def login_required(self, f):
         @wraps(f)
         def decorated(*args, **kwargs):
-            # try if one of the authentication scheme works
-            for auth in [self.main_auth, *self.additional_auth]:
-                resp = auth.login_required(f)(*args, **kwargs)
-                status_code = _extract_status_code(resp)
-                if status_code < 400:
-                    return resp
-            return self.main_auth.auth_error_callback()
+            # the schemes are only used to authorize the request,
+            # the handler itself is executed once, whatever response it returns
+            if not self.authorize():
+                # Clear TCP receive buffer of any pending data
+                request.data
+                return self.main_auth.auth_error_callback()
 
-        return decorated
-
-
-def _extract_status_code(resp):
-    if isinstance(resp, tuple):
-        size = len(resp)
-        if size == 3:  # tuple is (body, status_code, headers)
-            return resp[1]
-        if size == 2:  # tuple is (response, status_code)
-            return resp[0].status_code
-    if isinstance(resp, Response):
-        return resp.status_code
+            return f(*args, **kwargs)
 
-    raise TypeError('response has an unexpected type: %s' % type(resp))
+        return decorated
@@ -0,0 +1,73 @@
+"""
+This module implements a cache of the JWT that have already been verified.
+
+Verifying a JWT requires to check its signature, which is by far the most expensive
+part of the authentication of a request. Since clients send the same tokens over and over,
+the claims of the verified tokens are kept in a bounded LRU so a token is only verified once.
+
+Tokens are indexed by their hash, so the cache never keeps the tokens themselves in memory,
+and an entry is dropped as soon as the token it represents expires.
+"""
+
+import hashlib
+import time
+from collections import OrderedDict
+
+
+class TokenCache:
+    """
+    LRU of the claims of the verified tokens
+    """
+
+    def __init__(self, size=10000):
+        """
+        @param size: maximum number of tokens kept in the cache, least recently used are evicted first
+        """
+        self.size = size
+        self._entries = OrderedDict()
+
+    def get(self, token):
+        """
+        @return: the claims of token if it has already been verified and is not expired, None otherwise
+        """
+        key = _hash(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        claims, exp = entry
+        if exp is not None and exp <= time.time():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return dict(claims)
+
+    def set(self, token, claims):
+        """
+        remember that token has been verified and contains claims
+        """
+        exp = claims.get('exp')
+        try:
+            exp = float(exp) if exp is not None else None
+        except (TypeError, ValueError):
+            # jose already refuses tokens with an invalid exp claim
+            return
+
+        key = _hash(token)
+        self._entries[key] = (dict(claims), exp)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _hash(token):
+    if isinstance(token, str):
+        token = token.encode()
+    return hashlib.sha256(token).digest()
@@ -1,12 +1,24 @@
 from functools import wraps
 import os
+import time
 
 from jose import jwt
 from js9 import j
 
+from .token_cache import TokenCache
+
 logger = j.logger.get('zrobot')
 _token_prefix = "Bearer "
 
+# signing key, only read again from disk when the key file changes
+_key = None
+_key_stat = None
+# claims of the secrets already verified with the current key
+_verified = TokenCache()
+
+# number of seconds an owner secret is valid, to be set at startup by robot class
+owner_secret_ttl = 30 * 24 * 3600
+
 
 def create(claims):
     """create a JWT with the claims pass as argument
@@ -20,17 +32,22 @@ def create(claims):
 
 def decode(token):
     key = _get_key()
-    return jwt.decode(token, key, algorithms='HS256')
+    claims = _verified.get(token)
+    if claims is not None:
+        return claims
+
+    claims = jwt.decode(token, key, algorithms='HS256')
+    _verified.set(token, claims)
+    return claims
 
 
 def verify(service_guid, token):
     if not token:
         return False
 
-    expected = {'service_guid': service_guid}
     try:
         claims = decode(token)
-        if claims == expected:
+        if claims.get('service_guid') == service_guid:
             return True
     except Exception as err:
         logger.error('error decoding user secret: %s', str(err))
@@ -38,6 +55,46 @@ def verify(service_guid, token):
     return False
 
 
+def verify_owner(owner, token):
+    """
+    check that token is the owner secret of owner
+    """
+    if not token or not owner:
+        return False
+
+    try:
+        claims = decode(token)
+        if 'service_guid' not in claims and claims.get('owner') == owner:
+            return True
+    except Exception as err:
+        logger.error('error decoding owner secret: %s', str(err))
+
+    return False
+
+
+def create_service_secrets(service_guid, owner, owner_secret=None):
+    """
+    create the secrets returned to the creator of a service
+
+    the secret of the service never expires, the secret of the owner expires after owner_secret_ttl seconds.
+    since a new owner secret is returned each time a service is created with it, active owners keep a valid one
+
+    @param owner_secret: secret of the owner already created, if set it is returned instead of creating a new one
+    @return: tuple (secret of the service, secret of the owner)
+    """
+    secret = create({'service_guid': service_guid, 'owner': owner})
+    if owner_secret is None:
+        owner_secret = create_owner_secret(owner)
+    return secret, owner_secret
+
+
+def create_owner_secret(owner):
+    """
+    create a secret that gives access to all the services of owner, it expires after owner_secret_ttl seconds
+    """
+    return create({'owner': owner, 'exp': int(time.time()) + owner_secret_ttl})
+
+
 def _get_key():
     """return the signing key to create JWT
     the key is the one used by the config manager of JumpScale
@@ -48,14 +105,25 @@ def _get_key():
     Returns:
         str -- the signing key
     """
+    global _key, _key_stat
+
     if j.tools.configmanager.keyname is None or j.tools.configmanager.keyname == '':
         raise SigningKeyNotFoundError('no key configured')
 
     key_path = os.path.expanduser(os.path.join('~/.ssh', j.tools.configmanager.keyname))
-    if not os.path.exists(key_path):
+    try:
+        st = os.stat(key_path)
+    except FileNotFoundError:
         raise SigningKeyNotFoundError('key not found')
 
-    return j.sal.fs.fileGetContents(key_path)
+    stat = (key_path, st.st_mtime_ns, st.st_size, st.st_ino)
+    if stat != _key_stat:
+        # the key changed, the tokens verified with the previous key can't be trusted anymore
+        _key = j.sal.fs.fileGetContents(key_path)
+        _key_stat = stat
+        _verified.clear()
+
+    return _key
 
 
 class SigningKeyNotFoundError(Exception):
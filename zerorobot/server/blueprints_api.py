@@ -14,3 +14,30 @@ def ExecuteBlueprint():
     It is handler for POST /blueprints
     """
     return handlers.ExecuteBlueprintHandler()
+
+
+@blueprints_api.route('/blueprints/diff', methods=['POST'])
+def DiffBlueprint():
+    """
+    Compute the changes a blueprint would make, without executing it
+    It is handler for POST /blueprints/diff
+    """
+    return handlers.DiffBlueprintHandler()
+
+
+@blueprints_api.route('/blueprints/jobs', methods=['POST'])
+def CreateBlueprintJob():
+    """
+    Execute a blueprint in the background
+    It is handler for POST /blueprints/jobs
+    """
+    return handlers.CreateBlueprintJobHandler()
+
+
+@blueprints_api.route('/blueprints/jobs/<job_id>', methods=['GET'])
+def GetBlueprintJob(job_id):
+    """
+    Retrieve the progress of the execution of a blueprint
+    It is handler for GET /blueprints/jobs/<job_id>
+    """
+    return handlers.GetBlueprintJobHandler(job_id)
@@ -0,0 +1,72 @@
+"""
+This module implements the conditional GET and the compression of the responses of the REST API.
+
+The large collections (services, tasks, templates, logs) are tagged with an ETag computed
+from a revision counter of the collection, so the tag is known without serializing anything.
+A client that already has the current version of a collection gets a 304 with an empty body.
+
+Responses bigger than COMPRESS_MIN_SIZE are compressed with gzip or deflate
+when the client accepts it.
+"""
+
+import gzip
+import hashlib
+import zlib
+
+from flask import Response, request
+
+# responses smaller than this are not worth compressing
+COMPRESS_MIN_SIZE = 1024
+
+
+def etag(*parts):
+    """
+    compute an ETag from the parts identifying the version of a resource
+    """
+    return hashlib.md5('\x00'.join(str(p) for p in parts).encode('utf8')).hexdigest()
+
+
+def not_modified(tag):
+    """
+    @param tag: ETag of the current version of the requested resource
+    @return: a 304 response if the client already has this version of the resource, None otherwise
+    """
+    if request.if_none_match.contains_weak(tag):
+        return Response(status=304, headers=etag_header(tag))
+    return None
+
+
+def etag_header(tag):
+    # the tags are weak since the same version can be sent compressed or not
+    return {'ETag': 'W/"%s"' % tag}
+
+
+def compress(response):
+    """
+    flask after_request hook that compresses the response if the client supports it
+    """
+    if response.direct_passthrough or response.is_streamed or response.status_code != 200 or \
+            'Content-Encoding' in response.headers:
+        return response
+
+    accepted = request.accept_encodings
+    if 'gzip' in accepted:
+        encoding = 'gzip'
+    elif 'deflate' in accepted:
+        encoding = 'deflate'
+    else:
+        return response
+
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return response
+
+    if encoding == 'gzip':
+        data = gzip.compress(data, compresslevel=6)
+    else:
+        data = zlib.compress(data, 6)
+
+    response.set_data(data)
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
@@ -0,0 +1,16 @@
+# DO NOT EDIT THIS FILE. This file will be overwritten when re-running go-raml.
+
+from flask import Blueprint
+from . import handlers
+
+
+events_api = Blueprint('events_api', __name__)
+
+
+@events_api.route('/events', methods=['GET'])
+def StreamEvents():
+    """
+    Stream the events of the robot as server-sent events
+    It is handler for GET /events
+    """
+    return handlers.StreamEventsHandler()
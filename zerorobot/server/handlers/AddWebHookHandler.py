@@ -28,6 +28,6 @@ def AddWebHookHandler():
         return jsonify(code=400, message="bad request body"), 400
 
     webhooks = config.webhooks
-    webhook = webhooks.add(inputs['url'], inputs['kind'])
+    webhook = webhooks.add(inputs['url'], inputs['kind'], inputs.get('batch') or False)
 
     return jsonify(webhook.as_dict()), 201
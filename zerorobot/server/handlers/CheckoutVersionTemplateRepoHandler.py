@@ -28,6 +28,7 @@ def CheckoutVersionTemplateRepoHandler():
     except jsonschema.ValidationError as e:
         return jsonify(errors="bad request body"), 400
 
-    tcol.checkout_repo(inputs.get('url'), inputs.get('branch'))
-
-    return "", 204, {"Content-type": 'application/json'}
+    # the services are upgraded in the background, the progress is available at the location of the upgrade
+    upgrade = tcol.checkout_repo(inputs.get('url'), inputs.get('branch'))
+    headers = {'Location': '/templates/upgrades/%s' % upgrade.id}
+    return jsonify(upgrade.view()), 202, headers
@@ -0,0 +1,60 @@
+# THIS FILE IS SAFE TO EDIT. It will not be overwritten when rerunning go-raml.
+
+import jsonschema
+from flask import request, jsonify
+
+from js9 import j
+from zerorobot import blueprint
+from zerorobot.blueprint_jobs import BlueprintJob, TooManyJobsError, jobs
+from zerorobot.server import auth
+from zerorobot.template_collection import (TemplateConflictError,
+                                           TemplateNotFoundError)
+
+from .ExecuteBlueprintHandler import (Blueprint_schema_validator,
+                                      _extract_user_secrets, execute_blueprint)
+from .listServicesHandler import extract_owner_from_headers
+
+# number of seconds a client should wait before retrying when too many jobs are waiting
+RETRY_AFTER = 10
+
+
+@auth.admin_user.login_required
+def CreateBlueprintJobHandler():
+    '''
+    Execute a blueprint in the background
+    It is handler for POST /blueprints/jobs
+    '''
+    inputs = request.get_json()
+    try:
+        Blueprint_schema_validator.validate(inputs)
+    except jsonschema.ValidationError as err:
+        return jsonify(code=400, message=str(err)), 400
+
+    try:
+        actions, services = blueprint.parse(inputs['content'])
+    except (blueprint.BadBlueprintFormatError, TemplateConflictError, TemplateNotFoundError) as err:
+        return jsonify(code=400, message=str(err.args[1])), 400
+
+    # the secrets are read now since the job doesn't run in the context of the request
+    owner = extract_owner_from_headers(request.headers)
+    owner_secret = None
+    if not owner:
+        # the secrets of the services are only returned to the owner of the job
+        # so a requester without owner secret gets one right away
+        owner = j.data.idgenerator.generateGUID()
+        try:
+            owner_secret = auth.user_jwt.create_owner_secret(owner)
+        except auth.user_jwt.SigningKeyNotFoundError:
+            return jsonify(code=500, message='error creating owner secret: no signing key available'), 500
+    allowed_services = _extract_user_secrets(request)
+
+    job = BlueprintJob(actions, services, owner)
+    try:
+        jobs.submit(job, execute_blueprint, actions, services, owner, allowed_services, owner_secret=owner_secret)
+    except TooManyJobsError as err:
+        return jsonify(code=503, message=str(err)), 503, {'Retry-After': str(RETRY_AFTER)}
+
+    view = job.view(owner)
+    if owner_secret:
+        view['owner_secret'] = owner_secret
+    return jsonify(view), 202, {'Location': '/blueprints/jobs/%s' % job.id}
@@ -0,0 +1,82 @@
+# THIS FILE IS SAFE TO EDIT. It will not be overwritten when rerunning go-raml.
+
+import jsonschema
+from flask import request, jsonify
+
+from zerorobot import blueprint
+from zerorobot import service_collection as scol
+from zerorobot import template_collection as tcol
+from zerorobot.server import auth
+from zerorobot.template import data as service_data
+from zerorobot.template_collection import (TemplateConflictError,
+                                           TemplateNotFoundError)
+
+from .ExecuteBlueprintHandler import (Blueprint_schema_validator,
+                                      _find_services_to_be_scheduled)
+
+
+@auth.admin_user.login_required
+def DiffBlueprintHandler():
+    '''
+    Compute the changes a blueprint would make, without executing it
+    It is handler for POST /blueprints/diff
+    '''
+    inputs = request.get_json()
+    try:
+        Blueprint_schema_validator.validate(inputs)
+    except jsonschema.ValidationError as err:
+        return jsonify(code=400, message=str(err)), 400
+
+    try:
+        actions, services = blueprint.parse(inputs['content'])
+    except (blueprint.BadBlueprintFormatError, TemplateConflictError, TemplateNotFoundError) as err:
+        return jsonify(code=400, message=str(err.args[1])), 400
+
+    return jsonify(diff_blueprint(actions, services)), 200
+
+
+def diff_blueprint(actions, services):
+    """
+    compute the changes a blueprint would make, without creating, updating or scheduling anything
+
+    @param actions: actions of the blueprint, as returned by blueprint.parse
+    @param services: services of the blueprint, as returned by blueprint.parse
+    @return: dict in the format of the BlueprintDiff type
+    """
+    services_diff = []
+    # data of the services the blueprint would create, in case the blueprint declares them more than once
+    planned = {}
+    for service_descr in services:
+        template = tcol.get(service_descr['template'])
+        name = service_descr['service']
+        data = service_descr.get('data') or {}
+        view = {'template': service_descr['template'], 'service': name}
+
+        key = (str(template.template_uid), name)
+        existing = scol.find(template_uid=key[0], name=name)
+        if existing:
+            view['guid'] = existing[0].guid
+            changes = existing[0].data.diff(data)
+        elif key in planned:
+            changes = service_data.diff(planned[key], data)
+        else:
+            planned[key] = data
+            view['change'] = 'create'
+            view['data'] = data
+            services_diff.append(view)
+            continue
+
+        view['change'] = 'update' if changes else 'none'
+        if changes:
+            view['data'] = changes
+        services_diff.append(view)
+
+    actions_diff = []
+    for action_item, candidates in zip(actions, _find_services_to_be_scheduled(actions)):
+        view = {'action': action_item['action'], 'services': [service.guid for service in candidates]}
+        for k in ['template', 'service']:
+            if action_item.get(k):
+                view[k] = action_item[k]
+        actions_diff.append(view)
+
+    return {'services': services_diff, 'actions': actions_diff}
@@ -5,12 +5,13 @@ import os
 
 import jsonschema
 from flask import request, jsonify
+from gevent.pool import Pool
 from jsonschema import Draft4Validator
 
 from js9 import j
 from zerorobot import service_collection as scol
 from zerorobot import template_collection as tcol
-from zerorobot import blueprint
+from zerorobot import blueprint, blueprint_jobs, config
 from zerorobot.service_collection import ServiceConflictError
 from zerorobot.template.base import BadActionArgumentError
 from zerorobot.template_collection import (TemplateConflictError,
@@ -19,6 +20,7 @@ from zerorobot.template_collection import (TemplateConflictError,
 from zerorobot.template_uid import TemplateUID
 
 from zerorobot.server import auth
+from .listServicesHandler import extract_guid_from_headers, extract_owner_from_headers
 from .views import task_view, service_view
 
 dir_path = os.path.dirname(os.path.realpath(__file__))
@@ -44,77 +46,196 @@ def ExecuteBlueprintHandler():
     except (blueprint.BadBlueprintFormatError, TemplateConflictError, TemplateNotFoundError) as err:
         return jsonify(code=400, message=str(err.args[1])), 400
 
-    services_created, err_code, err_msg = instantiate_services(services)
+    owner = extract_owner_from_headers(request.headers) or j.data.idgenerator.generateGUID()
+    response, err_code, err_msg = execute_blueprint(actions, services, owner, _extract_user_secrets(request))
     if err_code or err_msg:
         return jsonify(code=err_code, message=err_msg), err_code
 
-    services_2b_schedules = _find_services_to_be_scheduled(actions)
-    allowed_services = _extract_user_secrets(request) + [s['guid'] for s in services_created]
+    return jsonify(response), 200
+
+
+def execute_blueprint(actions, services, owner, allowed_services, job=None, owner_secret=None):
+    """
+    create the services and schedule the actions of a blueprint
+
+    @param actions: actions of the blueprint, as returned by blueprint.parse
+    @param services: services of the blueprint, as returned by blueprint.parse
+    @param owner: owner of the services created
+    @param allowed_services: guids of the existing services the caller has access to
+    @param job: if set, the progress of the execution is reported on this BlueprintJob
+    @param owner_secret: secret of the owner already created, see instantiate_services
+    @return: tuple (result, error code, error message)
+    """
+    services_created, err_code, err_msg = instantiate_services(services, owner, job, owner_secret)
+    if err_code or err_msg:
+        return None, err_code, err_msg
+
+    # resolve the targets of all the actions at once
+    targets = _find_services_to_be_scheduled(actions)
+    services_2b_schedules = [service.guid for candidates in targets for service in candidates]
+    allowed_services = list(allowed_services) + [s['guid'] for s in services_created]
     not_allowed = set(services_2b_schedules) - set(allowed_services)
     if not_allowed:
         error_msg = "you are trying to schedule action on some services on which you don't have rights."
-        return jsonify(code=401, message=error_msg), 401
+        return None, 401, error_msg
 
     tasks_created = []
-    for action_item in actions:
+    for i, (action_item, candidates) in enumerate(zip(actions, targets)):
         try:
-            tasks_created.extend(_schedule_action(action_item))
+            tasks = _schedule_action(action_item, candidates)
         except BadActionArgumentError as err:
+            if job:
+                job.action_progress(i, blueprint_jobs.ACTION_STATE_ERROR)
             err_msg = "bad action argument for action %s: %s" % (action_item['action'], str(err))
-            return jsonify(code=400, message=err_msg), 400
+            return None, 400, err_msg
+        tasks_created.extend(tasks)
+        if job:
+            job.action_progress(i, blueprint_jobs.ACTION_STATE_SCHEDULED, [task.guid for task, _ in tasks])
 
     response = {'tasks': [], 'services': services_created}
     for task, service in tasks_created:
         response['tasks'].append(task_view(task, service))
 
-    return jsonify(response), 200
+    return response, None, None
 
 
-def instantiate_services(services):
-    services_created = []
-    err_msg = None
-    err_code = None
+def instantiate_services(services, owner=None, job=None, owner_secret=None):
+    """
+    create or update the services of a blueprint
 
-    for service in services:
+    by default the services are instantiated one by one in the order of the blueprint.
+    if config.blueprint_concurrency is above 1, the services that don't depend on each other
+    are instantiated concurrently, at most config.blueprint_concurrency at the same time, see _waves.
+    if the instantiation of one service fails, all the services created are deleted
+
+    @param job: if set, the progress of the instantiation is reported on this BlueprintJob
+    @param owner_secret: secret of the owner already created, if not set it is created with the first service
+    @return: tuple (views of the services created, error code, error message)
+    """
+    views = [None] * len(services)
+    errors = [None] * len(services)
+    # the owner secret is the same for all the services, only create it once
+
+    def instantiate(i):
+        nonlocal owner_secret
         try:
-            service = _instantiate_service(service)
-            if service:
-                # add secret to new created service
-                view = service_view(service)
-                try:
+            service = _instantiate_service(services[i])
+            if not service:
+                if job:
+                    job.service_progress(i, blueprint_jobs.SERVICE_STATE_UPDATED)
+                return
+
+            if owner:
+                scol.set_service_owner(service.guid, owner)
+            view = service_view(service)
+            # keep track of the service before creating its secret so it is deleted if anything fails
+            views[i] = view
+            if owner:
+                # the service has already been saved by instantiate_service, save its owner right away
+                service.save()
+            try:
+                if owner:
+                    view['secret'], owner_secret = auth.user_jwt.create_service_secrets(service.guid, owner, owner_secret)
+                    view['owner_secret'] = owner_secret
+                else:
                     view['secret'] = auth.user_jwt.create({'service_guid': service.guid})
-                    services_created.append(view)
-                except auth.user_jwt.SigningKeyNotFoundError as err:
-                    err_code = 500
-                    err_msg = 'error creating user secret: no signing key available'
-                    break
-                except Exception as err:
-                    err_code = 500
-                    err_msg = 'error creating user secret: %s' % str(err)
-                    break
-
-        except TemplateNotFoundError:
-            err_code = 404
-            err_msg = "template '%s' not found" % service['template']
-            break
-        except TemplateConflictError as err:
-            err_code = 400
-            err_msg = err.args[0]
-            break
+            except auth.user_jwt.SigningKeyNotFoundError:
+                errors[i] = (500, 'error creating user secret: no signing key available')
+            except Exception as err:
+                errors[i] = (500, 'error creating user secret: %s' % str(err))
         except Exception as err:
-            err_code = 500
-            err_msg = str(err)
+            errors[i] = _instantiate_error(services[i], err)
+
+        if job:
+            if errors[i]:
+                job.service_progress(i, blueprint_jobs.SERVICE_STATE_ERROR)
+            else:
+                job.service_progress(i, blueprint_jobs.SERVICE_STATE_CREATED, views[i]['guid'])
+
+    if config.blueprint_concurrency > 1:
+        waves = _waves(services)
+    else:
+        waves = [[i] for i in range(len(services))]
+
+    pool = Pool(max(config.blueprint_concurrency, 1))
+    for wave in waves:
+        for i in wave:
+            pool.spawn(instantiate, i)
+        pool.join()
+        if any(errors):
             break
 
-    if err_code or err_msg:
-        # means we had an error during the creation of services
-        # clean up all created service in this blueprint
-        for service in services_created:
-            scol.get_by_guid(service['guid']).delete()
+    services_created = [view for view in views if view is not None]
+    error = next((err for err in errors if err is not None), None)
+    if error is None:
+        return services_created, None, None
+
+    # means we had an error during the creation of services
+    # clean up all created service in this blueprint
+    for i, view in enumerate(views):
+        if view is None:
+            continue
+        scol.get_by_guid(view['guid']).delete()
+        if job:
+            job.service_progress(i, blueprint_jobs.SERVICE_STATE_DELETED)
 
+    err_code, err_msg = error
     return services_created, err_code, err_msg
 
 
+def _waves(services):
+    """
+    split the services of a blueprint in waves of services that can be instantiated concurrently
+
+    a service depends on the services declared before it with the same name,
+    and on the services declared before it whose name appears in its data.
+    a service is part of the wave following the one of the last service it depends on
+
+    @return: list of list of indexes in services
+    """
+    levels = []
+    names = {}  # name -> indexes of the services with this name
+    for i, service in enumerate(services):
+        level = 0
+        for name in _referenced_names(service.get('data')) | {service['service']}:
+            for j in names.get(name, []):
+                level = max(level, levels[j] + 1)
+        levels.append(level)
+        names.setdefault(service['service'], []).append(i)
+
+    waves = [[] for _ in range(max(levels) + 1)] if levels else []
+    for i, level in enumerate(levels):
+        waves[level].append(i)
+    return waves
+
+
+def _referenced_names(data):
+    """
+    return all the strings contained in data
+    """
+    if isinstance(data, str):
+        return {data}
+    names = set()
+    if isinstance(data, dict):
+        for value in data.values():
+            names |= _referenced_names(value)
+    elif isinstance(data, (list, tuple)):
+        for value in data:
+            names |= _referenced_names(value)
+    return names
+
+
+def _instantiate_error(service_descr, err):
+    """
+    return the error code and message to send when the instantiation of a service failed with err
+    """
+    if isinstance(err, TemplateNotFoundError):
+        return 404, "template '%s' not found" % service_descr['template']
+    if isinstance(err, TemplateConflictError):
+        return 400, err.args[0]
+    return 500, str(err)
+
+
 def _instantiate_service(service_descr):
     try:
         srv = tcol.instantiate_service(service_descr['template'], service_descr['service'], service_descr.get('data', None))
@@ -128,55 +249,16 @@ def _instantiate_service(service_descr):
         err.service.data.update_secure(data)
 
 
-def _find_services_to_be_scheduled(actions):
-    services_guids = []
-
-    for action_item in actions:
-        template_uid = None
-        template = action_item.get("template")
-        if template:
-            template_uid = TemplateUID.parse(template)
-
-        service = action_item.get("service")
-
-        candidates = []
-
-        kwargs = {'name': service}
-        if template_uid:
-            kwargs.update({
-                'template_host': template_uid.host,
-                'template_account': template_uid.account,
-                'template_repo': template_uid.repo,
-                'template_name': template_uid.name,
-                'template_version': template_uid.version,
-            })
-        # filter out None value
-        kwargs = {k: v for k, v in kwargs.items() if v is not None}
-
-        if len(kwargs) > 0:
-            candidates = scol.find(**kwargs)
-        else:
-            candidates = scol.list_services()
-
-        services_guids.extend([s.guid for s in candidates])
-    return services_guids
-
-
-def _schedule_action(action_item):
+def _action_query(action_item):
+    """
+    return the filters of the services targeted by an action, as accepted by scol.find
+    """
     template_uid = None
     template = action_item.get("template")
     if template:
         template_uid = TemplateUID.parse(template)
 
-    service = action_item.get("service")
-    action = action_item.get("action")
-    args = action_item.get('args')
-    if args and not isinstance(args, dict):
-        raise TypeError("args should be a dict not %s" % type(args))
-
-    candidates = []
-
-    kwargs = {'name': service}
+    kwargs = {'name': action_item.get("service")}
     if template_uid:
         kwargs.update({
             'template_host': template_uid.host,
@@ -186,12 +268,24 @@ def _schedule_action(action_item):
             'template_version': template_uid.version,
         })
     # filter out None value
-    kwargs = {k: v for k, v in kwargs.items() if v is not None}
+    return {k: v for k, v in kwargs.items() if v is not None}
+
+
+def _find_services_to_be_scheduled(actions):
+    """
+    return the services targeted by each action, resolved with a single search in the index
+    """
+    return scol.find_many([_action_query(action_item) for action_item in actions])
 
-    if len(kwargs) > 0:
-        candidates = scol.find(**kwargs)
-    else:
-        candidates = scol.list_services()
+
+def _schedule_action(action_item, candidates=None):
+    action = action_item.get("action")
+    args = action_item.get('args')
+    if args and not isinstance(args, dict):
+        raise TypeError("args should be a dict not %s" % type(args))
+
+    if candidates is None:
+        candidates = scol.find(**_action_query(action_item))
 
     tasks = []
     for service in candidates:
@@ -201,26 +295,4 @@ def _schedule_action(action_item):
 
 
 def _extract_user_secrets(request):
-    if 'ZrobotSecret' not in request.headers:
-        return []
-
-    ss = request.headers['ZrobotSecret'].split(None, 1)
-    if len(ss) != 2:
-        return []
-
-    auth_type = ss[0]
-    tokens = ss[1]
-    if auth_type != 'Bearer' or not tokens:
-        return []
-
-    services_guids = []
-    for token in tokens.split(' '):
-        try:
-            claims = auth.user_jwt.decode(token)
-            guid = claims.get('service_guid')
-            if guid:
-                services_guids.append(guid)
-        except:
-            continue
-
-    return services_guids
+    return list(extract_guid_from_headers(request.headers))
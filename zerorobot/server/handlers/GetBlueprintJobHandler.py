@@ -0,0 +1,39 @@
+# THIS FILE IS SAFE TO EDIT. It will not be overwritten when rerunning go-raml.
+
+from flask import jsonify, request
+
+from zerorobot.blueprint_jobs import jobs
+from zerorobot.server import auth
+
+from .listServicesHandler import extract_owner_from_headers
+
+# maximum number of seconds a request can block waiting for a job to be done
+MAX_WAIT = 60
+
+
+@auth.admin_user.login_required
+def GetBlueprintJobHandler(job_id):
+    '''
+    Retrieve the progress of the execution of a blueprint
+    It is handler for GET /blueprints/jobs/<job_id>
+
+    if the wait query parameter is specified, the request blocks until
+    the job is done or wait seconds elapsed, then returns the job.
+    the secrets of the services created are only returned to the owner of the job
+    '''
+    wait = request.args.get('wait')
+    if wait is not None:
+        try:
+            wait = min(float(wait), MAX_WAIT)
+        except ValueError:
+            return jsonify(code=400, message="wait must be a number of seconds"), 400
+
+    try:
+        job = jobs.get(job_id)
+    except KeyError:
+        return jsonify(code=404, message="blueprint job with id '%s' not found" % job_id), 404
+
+    if wait and wait > 0:
+        job.wait(timeout=wait)
+
+    return jsonify(job.view(extract_owner_from_headers(request.headers))), 200
@@ -6,6 +6,7 @@ from flask import jsonify, request, Response
 from js9 import j
 from zerorobot import service_collection as scol
 from zerorobot import config
+from zerorobot.server.conditional import etag, etag_header, not_modified
 
 
 def GetLogsHandler(service_guid):
@@ -22,5 +23,12 @@ def GetLogsHandler(service_guid):
     if not os.path.exists(log_file):
         return jsonify(logs=''), 200
 
+    # the log file is only appended to, its size and modification time identify its content
+    stat = os.stat(log_file)
+    tag = etag('logs', service.guid, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    resp = not_modified(tag)
+    if resp is not None:
+        return resp
+
     with open(log_file) as f:
-        return jsonify(logs=f.read()), 200
+        return jsonify(logs=f.read()), 200, etag_header(tag)
@@ -2,13 +2,14 @@
 
 from flask import jsonify, request
 from zerorobot import service_collection as scol
-from zerorobot.prometheus.host.linux import cpu_stat, mem_stat
+from zerorobot.prometheus.host.linux import mem_stat
+from zerorobot.prometheus.host.sampler import host_sampler
 
 
 def GetMetricsHandler():
     mem_active, mem_total, mem_cached, mem_free, swap_total, swap_free = mem_stat.mem_stats()
     output = {
-        'cpu': cpu_stat.cpu_percents(),
+        'cpu': host_sampler.cpu_percents(),
         'memory': {
             'total': mem_total,
             'active': mem_active,
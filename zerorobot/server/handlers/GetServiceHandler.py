@@ -17,7 +17,8 @@ def GetServiceHandler(service_guid):
     It is handler for GET /services/<service_guid>
     '''
     try:
-        service = scol.get_by_guid(service_guid)
+        # the view of a hibernated service is built from its stub
+        service = scol.get_by_guid(service_guid, wake=False)
     except KeyError:
         return json.dumps({'code': 404, 'message': "service with guid '%s' not found" % service_guid}), \
             404, {"Content-type": 'application/json'}
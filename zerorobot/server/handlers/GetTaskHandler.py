@@ -3,18 +3,31 @@
 from flask import jsonify, request
 
 from zerorobot import service_collection as scol
-from zerorobot.server.handlers.views import task_view
+from zerorobot.server.handlers.views import task_view_json
 from zerorobot.task import TaskNotFoundError
 
 from zerorobot.server import auth
 
+# maximum number of seconds a request can block waiting for a task to be done
+MAX_WAIT = 60
+
 
 @auth.service.login_required
 def GetTaskHandler(task_guid, service_guid):
     '''
     Retrieve the detail of a task
     It is handler for GET /services/<service_guid>/task_list/<task_guid>
+
+    if the wait query parameter is specified, the request blocks until
+    the task is done or wait seconds elapsed, then returns the task
     '''
+    wait = request.args.get('wait')
+    if wait is not None:
+        try:
+            wait = min(float(wait), MAX_WAIT)
+        except ValueError:
+            return jsonify(code=400, message="wait must be a number of seconds"), 400
+
     try:
         service = scol.get_by_guid(service_guid)
     except scol.ServiceNotFoundError:
@@ -25,4 +38,7 @@ def GetTaskHandler(task_guid, service_guid):
     except TaskNotFoundError:
         return jsonify(code=404, message="task with guid '%s' not found" % task_guid), 404
 
-    return jsonify(task_view(task, service)), 200
+    if wait and wait > 0:
+        task.wait_done(timeout=wait)
+
+    return task_view_json(task, service), 200, {"Content-type": 'application/json'}
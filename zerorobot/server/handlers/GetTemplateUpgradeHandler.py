@@ -0,0 +1,20 @@
+# THIS FILE IS SAFE TO EDIT. It will not be overwritten when rerunning go-raml.
+
+from flask import jsonify
+
+from zerorobot.server import auth
+from zerorobot.upgrades import upgrades
+
+
+@auth.admin.login_required
+def GetTemplateUpgradeHandler(upgrade_id):
+    '''
+    Retrieve the progress of a rolling upgrade of the services
+    It is handler for GET /templates/upgrades/<upgrade_id>
+    '''
+    try:
+        upgrade = upgrades.get(upgrade_id)
+    except KeyError:
+        return jsonify(code=404, message="upgrade with id '%s' not found" % upgrade_id), 404
+
+    return jsonify(upgrade.view()), 200
@@ -3,6 +3,7 @@
 import json
 
 from zerorobot import service_collection as scol
+from zerorobot.template import actions
 
 from zerorobot.server import auth
 
@@ -19,9 +20,8 @@ def ListActionsHandler(service_guid):
         return json.dumps({'code': 404, 'message': "service with guid '%s' not found" % service_guid}), \
             404, {"Content-type": 'application/json'}
 
-    actions = get_actions_list(service)
-
-    return json.dumps(actions), 200, {"Content-type": 'application/json'}
+    # the catalog of the actions is computed once per template
+    return actions.get(type(service)).json, 200, {"Content-type": 'application/json'}
 
 
 def get_actions_list(obj):
@@ -29,16 +29,4 @@ def get_actions_list(obj):
     extract the method name that the service has that are not the
     method comming from the template base
     """
-    skip = ['load', 'save', 'schedule_action', 'recurring_action', 'validate', 'add_delete_callback']
-    actions = []
-    for name in dir(obj):
-        if name in skip or name.startswith('_'):
-            continue
-        # test if the attribute is a property, we use this so we don't actually
-        # call the property, but just detect it
-        if isinstance(getattr(type(obj), name, None), property):
-            actions.append({'name': name})
-        elif callable(getattr(obj, name)):
-            actions.append({'name': name})
-
-    return actions
+    return [spec.view() for spec in actions.get(type(obj)).actions.values()]
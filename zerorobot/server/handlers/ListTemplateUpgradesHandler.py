@@ -0,0 +1,15 @@
+# THIS FILE IS SAFE TO EDIT. It will not be overwritten when rerunning go-raml.
+
+from flask import jsonify
+
+from zerorobot.server import auth
+from zerorobot.upgrades import upgrades
+
+
+@auth.admin.login_required
+def ListTemplateUpgradesHandler():
+    '''
+    List the last rolling upgrades of the services
+    It is handler for GET /templates/upgrades
+    '''
+    return jsonify([upgrade.view() for upgrade in upgrades.list()]), 200
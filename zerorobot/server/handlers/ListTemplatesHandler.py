@@ -3,6 +3,7 @@
 import json
 
 from zerorobot import template_collection as tcol
+from zerorobot.server.conditional import etag, etag_header, not_modified
 from zerorobot.server.handlers.views import template_view
 
 from zerorobot.server import auth
@@ -14,5 +15,13 @@ def ListTemplatesHandler():
     List all the templates available to the ZeroRobot
     It is handler for GET /templates
     '''
-    templates = [template_view(t) for t in tcol.list_templates()]
-    return json.dumps(templates), 200, {"Content-type": 'application/json'}
+    tag = etag('templates', tcol.revision())
+    resp = not_modified(tag)
+    if resp is not None:
+        return resp
+
+    # the view only needs the uid, don't import the templates not used yet
+    templates = [template_view(t) for t in tcol.list_templates(load=False)]
+    headers = {"Content-type": 'application/json'}
+    headers.update(etag_header(tag))
+    return json.dumps(templates), 200, headers
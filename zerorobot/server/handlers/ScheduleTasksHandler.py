@@ -0,0 +1,87 @@
+# THIS FILE IS SAFE TO EDIT. It will not be overwritten when rerunning go-raml.
+
+import json
+import os
+
+import jsonschema
+from flask import jsonify, request
+from jsonschema import Draft4Validator
+
+from zerorobot import service_collection as scol
+from zerorobot.server import auth
+from zerorobot.server.handlers.listServicesHandler import extract_guid_from_headers
+from zerorobot.server.handlers.views import task_view
+from zerorobot.template.base import ActionNotFoundError, BadActionArgumentError
+
+dir_path = os.path.dirname(os.path.realpath(__file__))
+TaskSchedule_schema = json.load(open(dir_path + '/schema/TaskSchedule_schema.json'))
+TaskSchedule_schema_resolver = jsonschema.RefResolver('file://' + dir_path + '/schema/', TaskSchedule_schema)
+TaskSchedule_schema_validator = Draft4Validator(TaskSchedule_schema, resolver=TaskSchedule_schema_resolver)
+
+_filter_keys = ["name", "template_uid", "template_host", "template_account", "template_repo", "template_name", "template_version"]
+
+
+@auth.service.login_required
+def ScheduleTasksHandler():
+    '''
+    Schedule tasks on multiple services in a single request.
+    All the tasks are validated before any of them is scheduled.
+    It is handler for POST /services/task_list
+    '''
+    inputs = request.get_json()
+    if not isinstance(inputs, list):
+        return jsonify(code=400, message="body must be a list of tasks"), 400
+
+    for i, item in enumerate(inputs):
+        try:
+            TaskSchedule_schema_validator.validate(item)
+        except jsonschema.ValidationError as e:
+            return jsonify(code=400, message="task %d: %s" % (i, str(e))), 400
+        if not item.get('service_guid') and item.get('filter') is None:
+            return jsonify(code=400, message="task %d: service_guid or filter is required" % i), 400
+        unknown = set(item.get('filter') or {}) - set(_filter_keys)
+        if unknown:
+            return jsonify(code=400, message="task %d: unsupported filter keys: %s" % (i, ','.join(sorted(unknown)))), 400
+        if not item.get('service_guid') and not any(item['filter'].values()):
+            # an empty filter would match all the services of the robot
+            return jsonify(code=400, message="task %d: filter can't be empty" % i), 400
+
+    allowed_services = extract_guid_from_headers(request.headers)
+
+    def is_allowed(service):
+        return service.guid in allowed_services or scol.is_service_public(service.guid) is True
+
+    # resolve the services targeted by each item and make sure all the actions are valid
+    # before scheduling anything, so a bad item doesn't leave half of the tasks scheduled
+    to_schedule = []
+    for i, item in enumerate(inputs):
+        service_guid = item.get('service_guid')
+        if service_guid:
+            try:
+                service = scol.get_by_guid(service_guid, wake=False)
+            except scol.ServiceNotFoundError:
+                return jsonify(code=404, message="service with guid '%s' not found" % service_guid), 404
+            if not is_allowed(service):
+                return jsonify(code=401, message="not allowed to schedule tasks on service '%s'" % service_guid), 401
+            services = [scol.get_by_guid(service_guid)]
+        else:
+            kwargs = {k: v for k, v in item['filter'].items() if v}
+            # only rehydrate the hibernated services the caller is allowed to use
+            services = [scol.get_by_guid(s.guid) for s in scol.find(wake=False, **kwargs) if is_allowed(s)]
+
+        args = item.get('args', None)
+        for service in services:
+            try:
+                service._check_action(item['action_name'], args)
+            except ActionNotFoundError:
+                return jsonify(code=400, message="task %d: action '%s' not found" % (i, item['action_name'])), 400
+            except BadActionArgumentError:
+                return jsonify(code=400, message="task %d: the argument passed in the requests, doesn't match the signature of the action" % i), 400
+            to_schedule.append((service, item['action_name'], args))
+
+    tasks = []
+    for service, action_name, args in to_schedule:
+        task = service.schedule_action(action=action_name, args=args)
+        tasks.append(task_view(task, service))
+
+    return json.dumps(tasks), 201, {"Content-type": 'application/json'}
@@ -0,0 +1,54 @@
+# THIS FILE IS SAFE TO EDIT. It will not be overwritten when rerunning go-raml.
+
+from flask import Response, request, stream_with_context
+
+from zerorobot.events import event_bus
+from zerorobot.server import auth
+
+# number of seconds after which a comment is sent on an idle stream
+# so proxies keep the connection open and dead clients are detected
+KEEPALIVE = 15
+
+
+@auth.admin_service.login_required
+def StreamEventsHandler():
+    '''
+    Stream the events of the robot as server-sent events
+    It is handler for GET /events
+    '''
+    service_guids = _split(request.args.get('service_guid'))
+    templates = _split(request.args.get('template'))
+
+    # admins receive the events of all the services
+    # the other callers only receive the events of the services the service scheme gives them access to:
+    # the services they have a secret for, the services of their owner secret and the public services.
+    # the access is checked for each event when it is sent, since services can be created,
+    # made public or change hands while the stream is open
+    allow = None if auth.admin.authorize() else auth.authorize_service
+
+    sub = event_bus.subscribe(service_guids=service_guids, templates=templates, allow=allow)
+
+    def stream():
+        try:
+            # let the client know the subscription is active
+            yield ': subscribed\n\n'
+            while True:
+                event = sub.get(timeout=KEEPALIVE)
+                if event is None:
+                    yield ': keepalive\n\n'
+                    continue
+                yield 'event: %s\ndata: %s\n\n' % (event.kind, event.payload)
+        finally:
+            sub.close()
+
+    headers = {
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    }
+    return Response(stream_with_context(stream()), mimetype='text/event-stream', headers=headers)
+
+
+def _split(value):
+    if not value:
+        return None
+    return [x for x in value.split(',') if x]
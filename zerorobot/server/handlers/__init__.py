@@ -2,6 +2,9 @@
 
 
 from .ExecuteBlueprintHandler import ExecuteBlueprintHandler
+from .DiffBlueprintHandler import DiffBlueprintHandler
+from .CreateBlueprintJobHandler import CreateBlueprintJobHandler
+from .GetBlueprintJobHandler import GetBlueprintJobHandler
 from .ListWebHooksHandler import ListWebHooksHandler
 from .AddWebHookHandler import AddWebHookHandler
 from .DeleteWebHookHandler import DeleteWebHookHandler
@@ -15,7 +18,11 @@ from .ListActionsHandler import ListActionsHandler
 from .getTaskListHandler import getTaskListHandler
 from .AddTaskToListHandler import AddTaskToListHandler
 from .GetTaskHandler import GetTaskHandler
+from .ScheduleTasksHandler import ScheduleTasksHandler
+from .StreamEventsHandler import StreamEventsHandler
 from .GetLogsHandler import GetLogsHandler
 from .ListTemplatesHandler import ListTemplatesHandler
 from .AddTemplateRepoHandler import AddTemplateRepoHandler
 from .CheckoutVersionTemplateRepoHandler import CheckoutVersionTemplateRepoHandler
+from .ListTemplateUpgradesHandler import ListTemplateUpgradesHandler
+from .GetTemplateUpgradeHandler import GetTemplateUpgradeHandler
@@ -7,6 +7,8 @@ import jsonschema
 from flask import request, jsonify
 from jsonschema import Draft4Validator
 
+from js9 import j
+
 from zerorobot import template_collection as tcol
 from zerorobot.server.handlers.views import service_view
 from zerorobot import service_collection as scol
@@ -14,6 +16,7 @@ from zerorobot.template_collection import (TemplateConflictError,
                                            TemplateNotFoundError)
 
 from zerorobot.server import auth
+from zerorobot.server.handlers.listServicesHandler import extract_owner_from_headers
 
 
 dir_path = os.path.dirname(os.path.realpath(__file__))
@@ -53,9 +56,15 @@ def createServiceHandler():
         service = None
         return jsonify(code=500, message=str(err)), 500
 
+    # services created with the same owner secret can all be accessed with this secret
+    owner = extract_owner_from_headers(request.headers) or j.data.idgenerator.generateGUID()
+    scol.set_service_owner(service.guid, owner)
+    # the service has already been saved by instantiate_service, save its owner right away
+    service.save()
+
     output = service_view(service)
     try:
-        output['secret'] = auth.user_jwt.create({'service_guid': service.guid})
+        output['secret'], output['owner_secret'] = auth.user_jwt.create_service_secrets(service.guid, owner)
     except auth.user_jwt.SigningKeyNotFoundError as err:
         return jsonify(code=500, message='error creating user secret: no signing key available'), 500
     except Exception as err:
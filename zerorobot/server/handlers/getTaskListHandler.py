@@ -4,7 +4,8 @@ from flask import jsonify, request
 from js9 import j
 from zerorobot import service_collection as scol
 from zerorobot.server import auth
-from zerorobot.server.handlers.views import task_view
+from zerorobot.server.conditional import etag, etag_header, not_modified
+from zerorobot.server.handlers.views import tasks_view_json
 
 
 @auth.service.login_required
@@ -22,6 +23,16 @@ def getTaskListHandler(service_guid):
     if all_task is not None:
         all_task = j.data.types.bool.fromString(all_task)
 
-    tasks = [task_view(t, service) for t in service.task_list.list_tasks(all=all_task)]
+    # the running task is part of the list, its state changes without changing the revision of the list
+    current = service.task_list.current
+    tag = etag('tasks', service.guid, service.task_list.revision, all_task,
+               current.guid if current else None, current.state if current else None)
+    resp = not_modified(tag)
+    if resp is not None:
+        return resp
 
-    return jsonify(tasks), 200
+    tasks = service.task_list.list_tasks(all=all_task)
+
+    headers = {"Content-type": 'application/json'}
+    headers.update(etag_header(tag))
+    return tasks_view_json(tasks, service), 200, headers
@@ -5,6 +5,8 @@ import json
 from flask import request
 
 from zerorobot import service_collection as scol
+from zerorobot import config
+from zerorobot.server.conditional import etag, etag_header, not_modified
 from zerorobot.server.handlers.views import service_view
 from zerorobot.server import auth
 
@@ -20,32 +22,63 @@ def listServicesHandler():
         if val:
             kwargs[x] = val
 
+    headers = {"Content-type": 'application/json'}
+    # in god mode the data of the services are part of the view, and changes to the data are not tracked
+    if not config.god:
+        tag = etag('services', scol.revision(), request.query_string, request.headers.get('ZrobotSecret'))
+        resp = not_modified(tag)
+        if resp is not None:
+            return resp
+        headers.update(etag_header(tag))
+
     allowed_services = extract_guid_from_headers(request.headers)
-    services = [service_view(s) for s in scol.find(**kwargs) if s.guid in allowed_services or scol.is_service_public(s.guid) is True]
-    return json.dumps(services), 200, {"Content-type": 'application/json'}
+    # the view of the hibernated services is built from their stub, listing doesn't rehydrate them
+    services = [service_view(s) for s in scol.find(wake=False, **kwargs) if s.guid in allowed_services or scol.is_service_public(s.guid) is True]
+    return json.dumps(services), 200, headers
 
 
 def extract_guid_from_headers(headers):
-    if 'ZrobotSecret' not in request.headers:
-        return []
+    """
+    return the guids of the services the secrets present in the headers give access to.
+    a service secret gives access to its service, an owner secret to all the services of its owner
+    """
+    services_guids = set()
+    for claims in _secrets_claims(headers):
+        guid = claims.get('service_guid')
+        if guid:
+            services_guids.add(guid)
+        elif claims.get('owner'):
+            services_guids.update(scol.list_owned_services(claims['owner']))
+
+    return services_guids
+
+
+def extract_owner_from_headers(headers):
+    """
+    return the owner of the first owner secret present in the headers, None if there is none
+    """
+    for claims in _secrets_claims(headers):
+        if 'service_guid' not in claims and claims.get('owner'):
+            return claims['owner']
+    return None
+
+
+def _secrets_claims(headers):
+    if 'ZrobotSecret' not in headers:
+        return
 
-    services_guids = []
     ss = headers['ZrobotSecret'].split(None, 1)
     if len(ss) != 2:
-        return []
+        return
 
     auth_type = ss[0]
     tokens = ss[1]
     if auth_type != 'Bearer' or not tokens:
-        return []
+        return
 
     for token in tokens.split(' '):
         try:
             claims = auth.user_jwt.decode(token)
-            guid = claims.get('service_guid')
-            if guid:
-                services_guids.append(guid)
         except:
             continue
-
-    return services_guids
+        yield claims
@@ -1,5 +1,11 @@
+from collections import OrderedDict
+
 from zerorobot import service_collection as scol
 from zerorobot import config
+from zerorobot.prometheus.robot import (task_view_cache_bytes,
+                                        task_view_cache_hits,
+                                        task_view_cache_misses)
+from zerorobot.task import TASK_STATE_ERROR, TASK_STATE_OK
 import json
 
 
@@ -54,6 +60,71 @@ def task_view(task, service):
     }
 
 
+def task_view_json(task, service):
+    """
+    return the view of the task encoded in JSON
+
+    finished tasks never change, so their encoded view is cached
+    """
+    if task.state not in (TASK_STATE_OK, TASK_STATE_ERROR):
+        return json.dumps(task_view(task, service)).encode()
+
+    encoded = _task_views.get(task.guid)
+    if encoded is None:
+        encoded = json.dumps(task_view(task, service)).encode()
+        _task_views.set(task.guid, encoded)
+    return encoded
+
+
+def tasks_view_json(tasks, service):
+    """
+    return the JSON list of the views of the tasks, assembled from the cached views
+    """
+    return b'[' + b','.join(task_view_json(t, service) for t in tasks) + b']'
+
+
+class TaskViewCache:
+    """
+    LRU of the encoded views of the finished tasks, keyed by task guid
+    """
+
+    def __init__(self, size=10000):
+        self.size = size
+        self.nbytes = 0
+        self._entries = OrderedDict()
+
+    def get(self, guid):
+        encoded = self._entries.get(guid)
+        if encoded is None:
+            task_view_cache_misses.inc()
+            return None
+        task_view_cache_hits.inc()
+        self._entries.move_to_end(guid)
+        return encoded
+
+    def set(self, guid, encoded):
+        previous = self._entries.pop(guid, None)
+        if previous is not None:
+            self.nbytes -= len(previous)
+        self._entries[guid] = encoded
+        self.nbytes += len(encoded)
+        while len(self._entries) > self.size:
+            _, evicted = self._entries.popitem(last=False)
+            self.nbytes -= len(evicted)
+        task_view_cache_bytes.set(self.nbytes)
+
+    def clear(self):
+        self._entries.clear()
+        self.nbytes = 0
+        task_view_cache_bytes.set(0)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_task_views = TaskViewCache()
+
+
 def template_view(template):
     return {
         "uid": str(template.template_uid),
@@ -25,6 +25,16 @@ def createService():
     return handlers.createServiceHandler()
 
 
+@services_api.route('/services/task_list', methods=['POST'])
+def ScheduleTasks():
+    """
+    Schedule tasks on multiple services in a single request.
+    All the tasks are validated before any of them is scheduled.
+    It is handler for POST /services/task_list
+    """
+    return handlers.ScheduleTasksHandler()
+
+
 @services_api.route('/services/<service_guid>', methods=['GET'])
 def GetService(service_guid):
     """
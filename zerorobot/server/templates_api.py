@@ -28,7 +28,26 @@ def AddTemplateRepo():
 @templates_api.route('/templates', methods=['PUT'])
 def CheckoutVersionTemplateRepo():
     """
-    Checkout a certain branch/tag/revision of a template repository
+    Checkout a certain branch/tag/revision of a template repository.
+    The services are upgraded in the background, use GetTemplateUpgrade to follow the upgrade
     It is handler for PUT /templates
     """
     return handlers.CheckoutVersionTemplateRepoHandler()
+
+
+@templates_api.route('/templates/upgrades', methods=['GET'])
+def ListTemplateUpgrades():
+    """
+    List the last rolling upgrades of the services
+    It is handler for GET /templates/upgrades
+    """
+    return handlers.ListTemplateUpgradesHandler()
+
+
+@templates_api.route('/templates/upgrades/<upgrade_id>', methods=['GET'])
+def GetTemplateUpgrade(upgrade_id):
+    """
+    Retrieve the progress of a rolling upgrade of the services
+    It is handler for GET /templates/upgrades/<upgrade_id>
+    """
+    return handlers.GetTemplateUpgradeHandler(upgrade_id)
@@ -0,0 +1,47 @@
+# DO NOT EDIT THIS FILE. This file will be overwritten when re-running go-raml.
+
+"""
+Auto-generated class for BlueprintDiff
+"""
+from .BlueprintDiffAction import BlueprintDiffAction
+from .BlueprintDiffService import BlueprintDiffService
+
+from . import client_support
+
+
+class BlueprintDiff(object):
+    """
+    auto-generated. don't touch.
+    """
+
+    @staticmethod
+    def create(**kwargs):
+        """
+        :type actions: list[BlueprintDiffAction]
+        :type services: list[BlueprintDiffService]
+        :rtype: BlueprintDiff
+        """
+
+        return BlueprintDiff(**kwargs)
+
+    def __init__(self, json=None, **kwargs):
+        if json is None and not kwargs:
+            raise ValueError('No data or kwargs present')
+
+        class_name = 'BlueprintDiff'
+        data = json or kwargs
+
+        # set attributes
+        data_types = [BlueprintDiffAction]
+        self.actions = client_support.set_property('actions', data, data_types, False, [], True, True, class_name)
+        data_types = [BlueprintDiffService]
+        self.services = client_support.set_property('services', data, data_types, False, [], True, True, class_name)
+
+    def __str__(self):
+        return self.as_json(indent=4)
+
+    def as_json(self, indent=0):
+        return client_support.to_json(self, indent=indent)
+
+    def as_dict(self):
+        return client_support.to_dict(self)
@@ -0,0 +1,10 @@
+# DO NOT EDIT THIS FILE. This file will be overwritten when re-running go-raml.
+
+from enum import Enum
+
+
+class EnumBlueprintJobState(Enum):
+    pending = "pending"
+    running = "running"
+    ok = "ok"
+    error = "error"
@@ -0,0 +1,79 @@
+# DO NOT EDIT THIS FILE. This file will be overwritten when re-running go-raml.
+
+"""
+Auto-generated class for TemplateUpgrade
+"""
+from .EnumTemplateUpgradeState import EnumTemplateUpgradeState
+from .TemplateReload import TemplateReload
+from .TemplateUpgradeBatch import TemplateUpgradeBatch
+from six import string_types
+
+from . import client_support
+
+
+class TemplateUpgrade(object):
+    """
+    auto-generated. don't touch.
+    """
+
+    @staticmethod
+    def create(**kwargs):
+        """
+        :type batches: list[TemplateUpgradeBatch]
+        :type created: int
+        :type error: string_types
+        :type failed: int
+        :type finished: int
+        :type id: string_types
+        :type revision: string_types
+        :type state: EnumTemplateUpgradeState
+        :type templates: TemplateReload
+        :type total: int
+        :type upgraded: int
+        :type url: string_types
+        :rtype: TemplateUpgrade
+        """
+
+        return TemplateUpgrade(**kwargs)
+
+    def __init__(self, json=None, **kwargs):
+        if json is None and not kwargs:
+            raise ValueError('No data or kwargs present')
+
+        class_name = 'TemplateUpgrade'
+        data = json or kwargs
+
+        # set attributes
+        data_types = [TemplateUpgradeBatch]
+        self.batches = client_support.set_property('batches', data, data_types, False, [], True, True, class_name)
+        data_types = [int]
+        self.created = client_support.set_property('created', data, data_types, False, [], False, True, class_name)
+        data_types = [string_types]
+        self.error = client_support.set_property('error', data, data_types, False, [], False, False, class_name)
+        data_types = [int]
+        self.failed = client_support.set_property('failed', data, data_types, False, [], False, True, class_name)
+        data_types = [int]
+        self.finished = client_support.set_property('finished', data, data_types, False, [], False, False, class_name)
+        data_types = [string_types]
+        self.id = client_support.set_property('id', data, data_types, False, [], False, True, class_name)
+        data_types = [string_types]
+        self.revision = client_support.set_property('revision', data, data_types, False, [], False, False, class_name)
+        data_types = [EnumTemplateUpgradeState]
+        self.state = client_support.set_property('state', data, data_types, False, [], False, True, class_name)
+        data_types = [TemplateReload]
+        self.templates = client_support.set_property('templates', data, data_types, False, [], False, False, class_name)
+        data_types = [int]
+        self.total = client_support.set_property('total', data, data_types, False, [], False, True, class_name)
+        data_types = [int]
+        self.upgraded = client_support.set_property('upgraded', data, data_types, False, [], False, True, class_name)
+        data_types = [string_types]
+        self.url = client_support.set_property('url', data, data_types, False, [], False, False, class_name)
+
+    def __str__(self):
+        return self.as_json(indent=4)
+
+    def as_json(self, indent=0):
+        return client_support.to_json(self, indent=indent)
+
+    def as_dict(self):
+        return client_support.to_dict(self)
@@ -3,6 +3,9 @@ this module is the only place where the service will be kept in memory.
 other services and class need to use this module method to create, access, list and search the services
 """
 import os
+import time
+
+from gevent.lock import RLock
 
 from js9 import j
 from zerorobot.sqlite import SqliteIndex
@@ -12,6 +15,12 @@ logger = j.logger.get('zerorobot')
 
 _sqlite_index = SqliteIndex()
 _guid_index = {}
+# owner -> set of guids of the services owned
+_owner_index = {}
+# incremented each time the collection or the state of one of its services changes
+_revision = 0
+# serializes the rehydration of the hibernated services, see wake
+_wake_lock = RLock()
 
 
 def add(service):
@@ -21,16 +30,41 @@ def add(service):
             service=_guid_index[service.guid])
     _guid_index[service.guid] = service
     _sqlite_index.add_service(service)
+    owner = getattr(service, '_owner', None)
+    if owner:
+        _owner_index.setdefault(owner, set()).add(service.guid)
+    changed()
 
     logger.debug("add service %s to collection" % service)
 
 
-def find(**kwargs):
+def find(wake=True, **kwargs):
+    """
+    search the services
+
+    :param wake: if False, the hibernated services are returned as ServiceStub instead of being rehydrated
+    :type wake: boolean
+    """
     guids = _sqlite_index.find(**kwargs)
-    services = [_guid_index[guid] for guid in guids]
+    if not wake:
+        return [_guid_index[guid] for guid in guids]
+    services = [_get(guid) for guid in guids]
     return services
 
 
+def find_many(queries):
+    """
+    search the services matching multiple queries at once
+
+    :param queries: list of dict, each dict has the same format as the kwargs of find
+    :type queries: list
+    :return: one list of services per query
+    :rtype: list
+    """
+    results = _sqlite_index.find_many(queries)
+    return [[_get(guid) for guid in guids] for guids in results]
+
+
 def get_by_name(name):
     services = find(name=name)
     if len(services) > 1:
@@ -40,14 +74,47 @@ def get_by_name(name):
     return services[0]
 
 
-def get_by_guid(guid):
+def get_by_guid(guid, wake=True):
+    """
+    :param wake: if False, a hibernated service is returned as a ServiceStub instead of being rehydrated
+    :type wake: boolean
+    """
     if guid not in _guid_index:
         raise ServiceNotFoundError("service with guid=%s not found" % guid)
-    return _guid_index[guid]
+    if not wake:
+        return _guid_index[guid]
+    return _get(guid)
 
 
-def list_services():
-    return list(_guid_index.values())
+def _get(guid):
+    """
+    return the service with this guid, rehydrate it if it is hibernated
+    """
+    service = _guid_index[guid]
+    if isinstance(service, ServiceStub):
+        return wake(guid)
+    return service
+
+
+def count_hibernated():
+    """
+    :return: the number of hibernated services
+    :rtype: int
+    """
+    return sum(1 for s in _guid_index.values() if isinstance(s, ServiceStub))
+
+
+def list_services(hibernated=True):
+    """
+    :param hibernated: if False, only return the services that are not hibernated
+    :type hibernated: boolean
+    :return: the services of the collection, the hibernated services are returned as ServiceStub,
+             using anything else than their identity rehydrates them
+    :rtype: list
+    """
+    if hibernated:
+        return list(_guid_index.values())
+    return [s for s in _guid_index.values() if not isinstance(s, ServiceStub)]
 
 
 def is_service_public(guid):
@@ -59,19 +126,85 @@ def is_service_public(guid):
     :return: true is service is public, false otherwise
     :rtype: boolean
     """
-    service = get_by_guid(guid)
-    return getattr(service, '_public', False) is True
+    if guid not in _guid_index:
+        raise ServiceNotFoundError("service with guid=%s not found" % guid)
+    # read from the collection directly so hibernated services are not rehydrated
+    return getattr(_guid_index[guid], '_public', False) is True
+
+
+def get_service_owner(guid):
+    """
+    :param guid: guid of the service
+    :type guid: str
+    :return: the identifier of the owner of the service, None if it has no owner
+    """
+    if guid not in _guid_index:
+        raise ServiceNotFoundError("service with guid=%s not found" % guid)
+    # read from the collection directly so hibernated services are not rehydrated
+    return getattr(_guid_index[guid], '_owner', None)
 
 
 def set_service_public(guid):
     service = get_by_guid(guid)
     service._public = True
+    changed()
+
+
+def set_service_owner(guid, owner):
+    """
+    set the owner of a service
+    all the services of an owner can be accessed with a single owner secret
+
+    :param guid: guid of the service
+    :type guid: str
+    :param owner: identifier of the owner
+    :type owner: str
+    """
+    service = get_by_guid(guid)
+    previous = getattr(service, '_owner', None)
+    if previous and previous in _owner_index:
+        _owner_index[previous].discard(guid)
+    service._owner = owner
+    _owner_index.setdefault(owner, set()).add(guid)
+    changed()
+
+
+def list_owned_services(owner):
+    """
+    :param owner: identifier of the owner
+    :type owner: str
+    :return: the guids of the services owned by owner
+    :rtype: set
+    """
+    return _owner_index.get(owner, set())
+
+
+def revision():
+    """
+    :return: the revision of the collection, it changes each time a service is added, deleted or changes state
+    :rtype: int
+    """
+    return _revision
+
+
+def changed():
+    """
+    mark the collection as changed
+    """
+    global _revision
+    _revision += 1
 
 
 def delete(service):
     if service.guid in _guid_index:
         del _guid_index[service.guid]
+    owner = getattr(service, '_owner', None)
+    if owner in _owner_index:
+        _owner_index[owner].discard(service.guid)
+        if not _owner_index[owner]:
+            del _owner_index[owner]
     _sqlite_index.delete_service(service)
+    changed()
 
     logger.debug("delete service %s from collection" % service)
 
@@ -84,6 +217,15 @@ def load(template, base_path):
     @param base_path: path of the directory where
                         to load the service state and data from
     """
+    srv = _load(template, base_path)
+    add(srv)
+    return srv
+
+
+def _load(template, base_path):
+    """
+    instantiate the service serialized in base_path, without adding it to the collection
+    """
     if not os.path.exists(base_path):
         raise FileNotFoundError("Trying to load service from %s, but directory doesn't exists" % base_path)
 
@@ -104,12 +246,12 @@ def load(template, base_path):
 
     srv = template(name=service_info['name'], guid=service_info['guid'], data=service_data)
     srv._public = service_info.get('public', False)
+    srv._owner = service_info.get('owner')
 
     srv.state.load(os.path.join(base_path, 'state.yaml'))
     srv.data.load(os.path.join(base_path, 'data.yaml'))
     srv.task_list.load(os.path.join(base_path, 'tasks.yaml'))
     srv._path = base_path
-    add(srv)
     return srv
 
 
@@ -118,6 +260,10 @@ def upgrade(service, new_template, force=False):
         # nothing to do
         return service
 
+    if isinstance(service, ServiceStub) or getattr(service, '_hibernated', False):
+        # upgrade the service currently in the collection
+        service = get_by_guid(service.guid)
+
     logger.info("upgrade service %s (%s) to %s", service.name, service.guid, new_template.template_uid)
     service.template_uid = new_template.template_uid
 
@@ -127,6 +273,7 @@ def upgrade(service, new_template, force=False):
         current_task.wait(timeout=300)  # FIXME: fixed timeout, no timeout ?
 
     # stop the services
+    service._stop_executor()
     service.gl_mgr.stop_all(wait=True)
     service.save()
 
@@ -140,6 +287,92 @@ def upgrade(service, new_template, force=False):
     return service
 
 
+def can_hibernate(service):
+    """
+    a service can be hibernated if it has no task waiting or running
+    and if the only greenlets it runs are its executor and the recurring save
+
+    :param service: the service
+    :return: True if the service can be hibernated
+    :rtype: boolean
+    """
+    if isinstance(service, ServiceStub) or not hasattr(service, 'gl_mgr'):
+        return False
+    if getattr(service, '_paused', False):
+        # the service doesn't process its task list, see robot.loader
+        return False
+    if set(service.gl_mgr.gls.keys()) - {'executor'} != {'recurring_save'}:
+        # services with other recurring actions stay in memory
+        return False
+    # list_tasks returns the tasks waiting and the one running
+    return not service.task_list.list_tasks()
+
+
+def hibernate(service):
+    """
+    save the service on disk and replace it in the collection by a ServiceStub,
+    which releases its greenlets, its task storage and its logger.
+    the service is rehydrated transparently by wake the next time it is used
+
+    :param service: the service to hibernate
+    :return: True if the service has been hibernated, False if it is not idle
+    :rtype: boolean
+    """
+    if not can_hibernate(service) or _guid_index.get(service.guid) is not service:
+        return False
+
+    service.gl_mgr.stop_all(wait=True, timeout=5)
+    if not service.task_list.empty():
+        # a task has been scheduled while the greenlets were stopping
+        service._start()
+        return False
+
+    service.save()
+    stub = ServiceStub(service)
+    service._release()
+    _guid_index[service.guid] = stub
+    logger.debug("hibernate service %s" % service)
+    return True
+
+
+def hibernate_idle(idle_time):
+    """
+    hibernate all the services that have been idle for at least idle_time seconds
+
+    :param idle_time: number of seconds
+    :return: number of services hibernated
+    :rtype: int
+    """
+    now = time.time()
+    count = 0
+    for service in list_services(hibernated=False):
+        last_activity = getattr(service, '_last_activity', None)
+        if last_activity is None or now - last_activity < idle_time:
+            continue
+        if hibernate(service):
+            count += 1
+    return count
+
+
+def wake(guid):
+    """
+    rehydrate a hibernated service from its serialized format
+
+    :param guid: guid of the service
+    :return: the service
+    """
+    with _wake_lock:
+        stub = _guid_index[guid]
+        if not isinstance(stub, ServiceStub):
+            # already rehydrated while we were waiting for the lock
+            return stub
+
+        service = _load(stub.template, stub._path)
+        _guid_index[guid] = service
+        logger.debug("wake service %s" % service)
+        return service
+
+
 def drop_all():
     """
     delete all services
@@ -149,6 +382,51 @@ def drop_all():
     _guid_index = {}
 
 
+class ServiceStub:
+    """
+    ServiceStub takes the place of a hibernated service in the collection
+
+    it only keeps what is needed to identify, search and list the service.
+    accessing any other attribute rehydrates the service and returns the attribute of the rehydrated service
+    """
+
+    __slots__ = ('guid', 'name', 'template', 'template_uid', 'version', 'state', '_path', '_public', '_owner',
+                 'hibernated', 'tasks_trimmed')
+
+    def __init__(self, service):
+        self.guid = service.guid
+        self.name = service.name
+        self.template = type(service)
+        self.template_uid = service.template_uid
+        self.version = service.version
+        # the state can be read without rehydrating the service, changing it rehydrates the service
+        self.state = type(service.state)(on_change=self._state_changed)
+        self.state.categories = {category: dict(tags) for category, tags in service.state.categories.items()}
+        self._path = service._path
+        self._public = service._public
+        self._owner = service._owner
+        # time of the hibernation
+        self.hibernated = time.time()
+        # True once the executed tasks of the service have been deleted, see robot._trim_tasks
+        self.tasks_trimmed = False
+
+    def __getattr__(self, name):
+        return getattr(wake(self.guid), name)
+
+    def _state_changed(self, category, tag, state):
+        service = wake(self.guid)
+        if state is None:
+            service.state.delete(category, tag)
+        else:
+            service.state.set(category, tag, state)
+
+    def schedule_action(self, action, args=None):
+        return wake(self.guid).schedule_action(action, args)
+
+    def __repr__(self):
+        return "%s (hibernated)" % self.guid
+
+
 class ServiceConflictError(Exception):
     """
     Raised when trying to create a service with a duplicate name
@@ -6,16 +6,22 @@ When a service or robot ask the creation of a service to another robot, a proxy
 so the robot see the service as if it as local to him while in reality the service is managed by another robot.
 """
 
+import time
 import urllib
 
+import gevent
 from requests.exceptions import HTTPError
 
-from jose import jwt
 from js9 import j
 from zerorobot.task import (TASK_STATE_ERROR, TASK_STATE_NEW, TASK_STATE_OK,
                             TASK_STATE_RUNNING, Task, TaskNotFoundError)
 from zerorobot.template.state import ServiceState
 
+logger = j.logger.get('zerorobot')
+
+# maximum number of seconds a single long-poll request waits on the remote robot
+LONG_POLL_WAIT = 30
+
 
 class ServiceProxy():
     """
@@ -96,16 +102,7 @@ class ServiceProxy():
     def delete(self):
         self._zrobot_client.api.services.DeleteService(self.guid)
         # clean up secret from zrobot client
-        for secret in list(self._zrobot_client.config.data['secrets_']):
-            try:
-                claims = jwt.get_unverified_claims(secret)
-            except:
-                continue
-            else:
-                if claims.get('service_guid') == self.guid:
-                    self._zrobot_client.config.data['secrets_'].remove(secret)
-                    self._zrobot_client.config.save()
-                    return
+        self._zrobot_client.remove_secret(self.guid)
 
 
 class TaskListProxy:
@@ -133,6 +130,75 @@ class TaskListProxy:
                 raise TaskNotFoundError("no task with guid %s found" % guid)
             raise err
 
+    def wait_many(self, tasks, timeout=None, die=False):
+        """
+        wait blocks until all the tasks have been executed
+        see wait_many for the details
+        """
+        return wait_many(tasks, timeout=timeout, die=die)
+
+
+def wait_many(tasks, timeout=None, die=False):
+    """
+    wait blocks until all the tasks have been executed
+
+    instead of polling each task individually, the task lists of the services
+    are polled once per service and the final state of a task is only fetched once it has left its task list
+
+    if timeout is specified and the tasks didn't finished within timeout seconds,
+    raises TimeoutError
+
+    if die is True and one of the task is in TASK_STATE_ERROR after the wait, the eco of its exception will be raised
+
+    @param tasks: list of TaskProxy, they can belong to different services
+    @return: the list of tasks
+    """
+    def wait():
+        pending = list(tasks)
+        while pending:
+            pending = _poll_tasks(pending)
+            if pending:
+                gevent.sleep(0.5)
+
+    if timeout:
+        # ensure the type is correct
+        timeout = float(timeout)
+        try:
+            gevent.with_timeout(timeout, wait)
+        except gevent.Timeout:
+            raise TimeoutError()
+    else:
+        wait()
+
+    if die is True:
+        for task in tasks:
+            if task.state == TASK_STATE_ERROR and task.eco:
+                raise task.eco
+
+    return tasks
+
+
+def _poll_tasks(tasks):
+    """
+    update the tasks that are done and return the ones still waiting to be executed
+    """
+    by_service = {}
+    for task in tasks:
+        by_service.setdefault(task.service.guid, []).append(task)
+
+    pending = []
+    for service_tasks in by_service.values():
+        service = service_tasks[0].service
+        waiting, _ = service._zrobot_client.api.services.getTaskList(service_guid=service.guid, query_params={'all': False})
+        waiting = {t.guid for t in waiting}
+        for task in service_tasks:
+            if task.guid in waiting:
+                pending.append(task)
+            elif task.state in ('new', 'running'):
+                # the task left the task list between the two calls but is not marked as done yet
+                pending.append(task)
+    return pending
+
 
 class TaskProxy(Task):
     """
@@ -152,6 +218,55 @@ class TaskProxy(Task):
     def execute(self):
         raise RuntimeError("a TaskProxy should never be executed")
 
+    def wait(self, timeout=None, die=False):
+        """
+        wait blocks until the task has been executed
+        if timeout is specified and the task didn't finished within timeout seconds,
+        raises TimeoutError
+
+        if die is True and the state is TASK_STATE_ERROR after the wait, the eco of the exception will be raised
+
+        instead of polling the state of the task, the remote robot is asked to hold
+        the request until the task is done, so only a few requests are needed.
+        if the remote robot doesn't support it, the state is polled every 0.5 seconds
+        """
+        deadline = time.time() + float(timeout) if timeout else None
+        while self._state not in (TASK_STATE_OK, TASK_STATE_ERROR):
+            wait = LONG_POLL_WAIT
+            if deadline is not None:
+                wait = min(wait, deadline - time.time())
+                if wait <= 0:
+                    raise TimeoutError()
+            started = time.time()
+            task, _ = self.service._zrobot_client.api.services.GetTask(
+                task_guid=self.guid, service_guid=self.service.guid, query_params={'wait': wait})
+            self._update(task)
+            if self._state not in (TASK_STATE_OK, TASK_STATE_ERROR) and time.time() - started < wait:
+                # older robots ignore wait and answer right away, don't flood them with requests
+                gevent.sleep(0.5)
+
+        if die is True and self._state == TASK_STATE_ERROR:
+            if not self.eco:
+                logger.critical('task is in error state, but no eco')
+            else:
+                raise self.eco
+
+        return self
+
+    def _update(self, task):
+        """
+        update the cached attributes from a task returned by the API
+        """
+        self._state = task.state.value
+        if task.duration:
+            self._duration = task.duration
+        if task.result:
+            self._result = j.data.serializer.json.loads(task.result)
+        if task.eco:
+            d_eco = task.eco.as_dict()
+            d_eco['_traceback'] = task.eco._traceback
+            self._eco = j.core.errorhandler.getErrorConditionObject(ddict=d_eco)
+
     @property
     def result(self):
         if self._result is None:
@@ -169,8 +284,12 @@ class TaskProxy(Task):
 
     @property
     def state(self):
+        if self._state in (TASK_STATE_OK, TASK_STATE_ERROR):
+            # the state of a task doesn't change anymore once it has been executed
+            return self._state
         task, _ = self.service._zrobot_client.api.services.GetTask(task_guid=self.guid, service_guid=self.service.guid)
-        return task.state.value
+        self._state = task.state.value
+        return self._state
 
     @state.setter
     def state(self, value):
@@ -189,6 +308,8 @@ class TaskProxy(Task):
 
 def _task_proxy_from_api(task, service):
     t = TaskProxy(task.guid, service, task.action_name, task.args, task.created)
+    if task.state:
+        t._state = task.state.value
     if task.duration:
         t._duration = task.duration
     if task.eco:
@@ -28,6 +28,11 @@ _create_index_stmts = [
 _add_service_stmt = "INSERT INTO services VALUES (?,?,?,?,?,?,?,?)"
 _delete_service_stmt = "DELETE FROM services WHERE guid=?"
 _find_services_stmt = "SELECT guid FROM services"
+_select_services_stmt = "SELECT * FROM services"
+_columns = ['guid', 'name', 'template_uid', 'template_host', 'template_account',
+            'template_repo', 'template_name', 'template_version']
+# sqlite refuses statements with more variables than this
+_max_variables = 900
 
 
 class SqliteIndex:
@@ -78,3 +83,45 @@ class SqliteIndex:
 
         self._cursor.execute(stmt, t)
         return [x[0] for x in self._cursor.fetchall()]
+
+    def find_many(self, queries):
+        """
+        run multiple find at once
+
+        the rows that can match any of the queries are fetched with a single statement
+        and are then dispatched between the queries
+
+        @param queries: list of dict, each dict has the same format as the kwargs of find
+        @return: list of list of guids, one list per query
+        """
+        names = set()
+        for query in queries:
+            if 'name' not in query:
+                # one query needs to look at all the services anyway
+                names = None
+                break
+            names.add(query['name'])
+
+        if names is None:
+            self._cursor.execute(_select_services_stmt)
+            rows = self._cursor.fetchall()
+        else:
+            rows = []
+            names = list(names)
+            for i in range(0, len(names), _max_variables):
+                chunk = names[i:i + _max_variables]
+                stmt = _select_services_stmt + " WHERE name IN (%s)" % ','.join('?' * len(chunk))
+                self._cursor.execute(stmt, chunk)
+                rows.extend(self._cursor.fetchall())
+
+        rows = [dict(zip(_columns, row)) for row in rows]
+        by_name = {}
+        for row in rows:
+            by_name.setdefault(row['name'], []).append(row)
+
+        results = []
+        for query in queries:
+            candidates = by_name.get(query['name'], []) if 'name' in query else rows
+            results.append([row['guid'] for row in candidates
+                            if all(row[col] == val for col, val in query.items())])
+        return results
@@ -0,0 +1,256 @@
+"""
+This module implements the aggregation of the errors raised by the tasks
+before they are reported to telegram and to the web hooks.
+
+Errors are fingerprinted by template, action, exception type and the last frames
+of the traceback. The first occurrence of an error is reported immediately,
+then the occurrences of the same error are only counted and a single summary
+is reported per fingerprint per interval.
+The interval of each error starts when it is reported, so its summary is sent
+as soon as its own interval is over.
+To not keep the tasks, the exceptions and their tracebacks alive until then, only the
+text of the summary and the payload sent to the web hooks are kept for each error.
+"""
+
+import hashlib
+import logging
+import pprint
+import time
+import traceback
+from collections import OrderedDict
+
+import gevent
+from gevent.event import Event
+
+from js9 import j
+from zerorobot import config
+
+logger = j.logger.get('zerorobot')
+telegram_logger = logging.getLogger('telegram_logger')
+
+
+class _Entry:
+
+    def __init__(self):
+        # timestamp of the last time this error has been reported
+        self.last_reported = None
+        # number of occurrences since the last report
+        self.suppressed = 0
+        # description of the last occurrence, used to build the summary
+        self.message = None
+        self.payload = None
+
+
+class EcoAggregator:
+    """
+    EcoAggregator deduplicates and rate limits the reporting of the task errors
+    """
+
+    def __init__(self, interval=300, size=1000, nr_frames=5):
+        """
+        @param interval: minimum number of seconds between two reports of the same error
+        @param size: maximum number of fingerprints kept in memory, least recently seen are evicted first
+        @param nr_frames: number of frames of the traceback used to compute the fingerprint
+        """
+        self.interval = interval
+        self.size = size
+        self.nr_frames = nr_frames
+        self._entries = OrderedDict()
+        self._gl = None
+        # set when a summary is pending so the reporting greenlet computes when to send it
+        self._wakeup = Event()
+
+    @property
+    def is_running(self):
+        return self._gl is not None and not self._gl.dead
+
+    def start(self):
+        """
+        start the greenlet that reports the summaries of the pending errors
+        """
+        if self.is_running:
+            return
+        self._gl = gevent.spawn(self._run)
+
+    def stop(self):
+        if self._gl is not None:
+            self._gl.kill(block=False)
+            self._gl = None
+
+    def fingerprint(self, task, exc_type, tb):
+        """
+        compute the fingerprint of an error
+        """
+        template = str(task.service.template_uid) if task.service else ''
+        # walk_tb doesn't read the source files, unlike extract_tb
+        frames = list(traceback.walk_tb(tb))[-self.nr_frames:]
+        key = [template, task.action_name or '', exc_type.__name__]
+        key.extend('%s:%s:%s' % (frame.f_code.co_filename, lineno, frame.f_code.co_name) for frame, lineno in frames)
+        return hashlib.md5('\n'.join(key).encode('utf8')).hexdigest()
+
+    def report(self, task, exc_type, exc, tb):
+        """
+        report the error raised during the execution of task
+
+        the error is sent right away if it's the first time it is seen
+        or if it has not been reported during the last interval,
+        otherwise it is only counted
+
+        @return: the fingerprint of the error
+        """
+        key = self.fingerprint(task, exc_type, tb)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = _Entry()
+            self._entries[key] = entry
+            if len(self._entries) > self.size:
+                _, evicted = self._entries.popitem(last=False)
+                # the occurrences counted for the evicted error would be lost otherwise
+                self._report_summary(evicted, time.time())
+        else:
+            self._entries.move_to_end(key)
+
+        now = time.time()
+        if entry.last_reported is None or now - entry.last_reported >= self.interval:
+            occurrences = entry.suppressed + 1
+            self._clear(entry, now)
+            self._emit(task, exc_type, exc, tb, occurrences)
+        else:
+            entry.suppressed += 1
+            entry.message = _summary_message(task, exc_type, exc)
+            entry.payload = _eco_payload(task)
+            if entry.suppressed == 1:
+                self._wakeup.set()
+        return key
+
+    def flush(self):
+        """
+        report a summary for all the errors that occurred
+        but were not reported and whose interval is over
+        """
+        now = time.time()
+        for entry in list(self._entries.values()):
+            if entry.suppressed > 0 and now - entry.last_reported >= self.interval:
+                self._report_summary(entry, now)
+
+    def next_flush(self):
+        """
+        @return: the timestamp at which the next summary is due, None if no summary is pending
+        """
+        due = [entry.last_reported + self.interval for entry in self._entries.values() if entry.suppressed > 0]
+        return min(due) if due else None
+
+    def _report_summary(self, entry, now):
+        if entry.suppressed <= 0:
+            return
+        message, payload, occurrences = entry.message, entry.payload, entry.suppressed
+        self._clear(entry, now)
+        self._emit_summary(message, payload, occurrences)
+
+    def _clear(self, entry, now):
+        entry.last_reported = now
+        entry.suppressed = 0
+        entry.message = None
+        entry.payload = None
+
+    def _run(self):
+        while True:
+            try:
+                due = self.next_flush()
+                # sleep until the end of the interval of the first pending error,
+                # or until an error becomes pending
+                self._wakeup.wait(timeout=None if due is None else max(due - time.time(), 0))
+                self._wakeup.clear()
+                self.flush()
+            except gevent.GreenletExit:
+                return
+            except:
+                logger.exception("error reporting errors summary")
+
+    def _emit(self, task, exc_type, exc, tb, occurrences):
+        gevent.spawn(_report_telegram, task, exc_type, exc, tb, occurrences)
+        _send_eco_webhooks(_eco_payload(task), occurrences)
+
+    def _emit_summary(self, message, payload, occurrences):
+        msg = "%s\n\noccurred %d times during the last %d seconds" % (message, occurrences, self.interval)
+        gevent.spawn(_log_telegram, msg)
+        _send_eco_webhooks(payload, occurrences)
+
+
+def _summary_message(task, exc_type, exc):
+    """
+    describe an error already reported, without its stacktrace
+    """
+    return "Error type: %s\nError message:\n\t%s\nTemplate: %s\nAction: %s" % (
+        exc_type.__name__,
+        exc,
+        task.service.template_uid if task.service else None,
+        task.action_name,
+    )
+
+
+def _report_telegram(task, exc_type, exc, tb, occurrences):
+    # go to last traceback
+    last_traceback = tb
+    while last_traceback.tb_next:
+        last_traceback = last_traceback.tb_next
+
+    # get locals
+    locals_ = last_traceback.tb_frame.f_locals
+
+    stacktrace = ''.join(traceback.format_tb(tb))
+    msg = "Error type: %s\nError message:\n\t%s\nStacktrace:\n%s\n\nTask arguments:\n%s\n\nLocal values:\n%s" % (
+        exc_type.__name__,
+        exc,
+        stacktrace,
+        pprint.pformat(task._args, width=50),
+        pprint.pformat(locals_, width=50)
+    )
+    if occurrences > 1:
+        msg += "\n\noccurred %d times since last report" % occurrences
+    _log_telegram(msg)
+
+
+def _log_telegram(msg):
+    # if enabled, unexpected errors would be logged on the telegram chat
+    try:
+        telegram_logger.error(msg)
+    except:
+        logger.exception("Failed to log error to telegram handler")
+
+
+def _eco_payload(task):
+    """
+    return the payload sent to the eco web hooks for the error of task, without the number of occurrences
+    None if the error can't be sent to the web hooks
+    """
+    if task.eco is None or task.service is None:
+        return None
+
+    task.eco.key  # make sure uniquekey is filled
+    eco_data = task.eco.__dict__.copy()
+    # the traceback object keeps all the frames of the error alive
+    eco_data.pop('tb', None)
+
+    return {
+        'service': task.service.guid,
+        'action_name': task.action_name,
+        'args': task._args,
+        'eco': eco_data,
+    }
+
+
+def _send_eco_webhooks(payload, occurrences=1):
+    if payload is None:
+        return
+
+    dispatcher = config.webhooks_dispatcher
+    if dispatcher is None:
+        return
+
+    # the dispatcher takes care of batching and sending the ecos concurrently
+    dispatcher.send('eco', dict(payload, occurrences=occurrences))
+
+
+# aggregator shared by all the tasks of the robot
+eco_aggregator = EcoAggregator()
@@ -25,6 +25,23 @@ _count_tasks_stmt = "SELECT count(*) FROM tasks"
 _drop_stmt = "DELETE FROM tasks"
 
 
+def delete_until(path, to_timestap):
+    """
+    delete the tasks created before to_timestap from the task storage of the service saved in path,
+    without loading the service
+    """
+    db_path = os.path.join(path, 'tasks.db')
+    if not os.path.exists(db_path):
+        return
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute(_delete_task_stmt, (to_timestap,))
+        conn.commit()
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+
 class TaskStorageSqlite(TaskStorageBase):
     """
     This class implement the TaskStorage interface
@@ -4,29 +4,22 @@ task module holds the logic regarding TaskList and Task classes.
 These two classes are used by the services to managed the requested actions
 """
 
-import hashlib
-import logging
 import os
-import pprint
 import sys
 import time
-import traceback
 
 import gevent
-import requests
+from gevent.event import Event
 from gevent.lock import Semaphore
 
 from js9 import j
-from zerorobot import config
 from zerorobot.errors import ExpectedError
+from .eco_aggregator import eco_aggregator
 
 from . import (TASK_STATE_ERROR, TASK_STATE_NEW, TASK_STATE_OK,
                TASK_STATE_RUNNING)
 
 logger = j.logger.get('zerorobot')
-telegram_logger = logging.getLogger('telegram_logger')
-
-stacks = list()
 
 
 class Task:
@@ -52,6 +45,8 @@ class Task:
 
         self._state = TASK_STATE_NEW
         self._state_lock = Semaphore()
+        # set once the task reached a terminal state (ok or error)
+        self._done = Event()
 
     @property
     def created(self):
@@ -72,22 +67,23 @@ class Task:
     def execute(self):
         self.state = TASK_STATE_RUNNING
         started = time.time()
+        state = TASK_STATE_OK
         try:
             if self._args is not None:
                 self._result = self._func(**self._args)
             else:
                 self._result = self._func()
-            self.state = TASK_STATE_OK
         except:
-            self.state = TASK_STATE_ERROR
+            state = TASK_STATE_ERROR
             # capture stacktrace and exception
             exc_type, exc, exc_traceback = sys.exc_info()
             self._eco = j.core.errorhandler.parsePythonExceptionObject(exc, tb=exc_traceback)
             if not isinstance(exc, ExpectedError):
-                gevent.spawn(self._report_telegram, exc_type, exc, exc_traceback)
-                gevent.spawn(_send_eco_webhooks, self.service, self)
+                eco_aggregator.report(self, exc_type, exc, exc_traceback)
         finally:
             self._duration = time.time() - started
+            # the state is set last so a finished task is complete as soon as it is seen as finished
+            self.state = state
         return self._result
 
     @property
@@ -99,6 +95,10 @@ class Task:
         try:
             self._state_lock.acquire()
             self._state = value
+            if value in (TASK_STATE_OK, TASK_STATE_ERROR):
+                self._done.set()
+            else:
+                self._done.clear()
         finally:
             self._state_lock.release()
 
@@ -110,19 +110,13 @@ class Task:
 
         if die is True and the state is TASK_STATE_ERROR after the wait, the eco of the exception will be raised
         """
-        def wait():
-            while self.state in ('new', 'running'):
-                gevent.sleep(0.5)
-
         if timeout:
             # ensure the type is correct
             timeout = float(timeout)
-            try:
-                gevent.with_timeout(timeout, wait)
-            except gevent.Timeout:
+            if not self.wait_done(timeout):
                 raise TimeoutError()
         else:
-            wait()
+            self.wait_done()
 
         if die is True and self.state == TASK_STATE_ERROR:
             if not self.eco:
@@ -132,6 +126,14 @@ class Task:
 
         return self
 
+    def wait_done(self, timeout=None):
+        """
+        block until the task reached a terminal state or timeout seconds elapsed
+
+        @return: True if the task is done, False otherwise
+        """
+        return self._done.wait(timeout=timeout)
+
     def __lt__(self, other):
         return self._created < other._created
 
@@ -140,57 +142,3 @@ class Task:
 
     def __str__(self):
         return repr(self)
-
-    def _report_telegram(self, exc_type, exc, tb):
-        # if enabled, unexpected errors would be logged on the telegram chat
-        # go to last traceback
-        last_traceback = tb
-        while last_traceback.tb_next:
-            last_traceback = last_traceback.tb_next
-
-        # get locals
-        locals_ = last_traceback.tb_frame.f_locals
-
-        stacktrace = ''.join(traceback.format_tb(tb))
-        stacktrace_hash = hashlib.md5(stacktrace.encode('utf8')).digest()
-        if not stacktrace_hash in stacks:
-            try:
-                telegram_logger.error(
-                    "Error type: %s\nError message:\n\t%s\nStacktrace:\n%s\n\nTask arguments:\n%s\n\nLocal values:\n%s" % (
-                        exc_type.__name__,
-                        exc,
-                        stacktrace,
-                        pprint.pformat(self._args, width=50),
-                        pprint.pformat(locals_, width=50)
-                    ))
-                stacks.append(stacktrace_hash)
-                while len(stacks) > 1000:
-                    stacks.pop(0)
-            except:
-                logger.exception("Failed to log error to telegram handler")
-
-
-def _send_eco_webhooks(service, task):
-    if task.eco is None:
-        return
-
-    webhooks = config.webhooks
-
-    # TODO: send concurrently from a pool of greenlet
-    task.eco.key  # make sure uniquekey is filled
-    eco_data = task.eco.__dict__.copy()
-    eco_data.pop('tb', None)
-
-    data = {
-        'service': service.guid,
-        'action_name': task.action_name,
-        'args': task._args,
-        'eco': eco_data
-    }
-
-    for wh in webhooks.list(kind='eco'):
-        try:
-            requests.post(wh.url, json=data)
-            logger.debug("eco web hook sent to %s" % wh.url)
-        except Exception as err:
-            logger.warning('fail to send web hook to %s' % wh.url)
@@ -8,6 +8,7 @@ from gevent.lock import Semaphore
 from gevent.queue import PriorityQueue
 
 from js9 import j
+from zerorobot.executor import executor
 from zerorobot.prometheus.robot import nr_task_waiting
 
 from . import (PRIORITY_NORMAL, PRIORITY_SYSTEM, TASK_STATE_ERROR,
@@ -40,6 +41,8 @@ class TaskList:
         # pointer to current task
         self._current = None
         self._current_mu = Semaphore()
+        # incremented each time a task is added, extracted or removed from the list
+        self.revision = 0
 
     @property
     def current(self):
@@ -55,13 +58,15 @@ class TaskList:
         if self._done:
             self._done.close()
 
-    def get(self):
+    def get(self, block=True):
         """
         pop out a task from the task list
         this call is blocking when the task list is empty
+        @param block: if False, raise gevent.queue.Empty instead of blocking when the task list is empty
         """
-        _, task = self._queue.get()
+        _, task = self._queue.get(block=block)
         self.current = task
+        self.revision += 1
         nr_task_waiting.labels(service_guid=self.service.guid).dec()
         return task
 
@@ -74,6 +79,9 @@ class TaskList:
         task._priority = priority
         nr_task_waiting.labels(service_guid=self.service.guid).inc()
         self._queue.put((priority, task))
+        self.revision += 1
+        # with the shared executor, the service needs to be queued to have its task executed
+        executor.notify(self.service)
 
     def done(self, task):
         """
@@ -82,6 +90,7 @@ class TaskList:
         if task._priority != PRIORITY_SYSTEM:
             self.current = None
             self._done.add(task)
+            self.revision += 1
 
     def empty(self):
         """
@@ -97,9 +106,20 @@ class TaskList:
         try:
             while not self.empty():
                 self._queue.get_nowait()
+                self.revision += 1
         except gevent.queue.Empty:
             return
 
+    def delete_until(self, until):
+        """
+        delete the executed tasks created before until
+        @param until: timestamp
+        """
+        if not hasattr(self._done, 'delete_until'):
+            return
+        self._done.delete_until(until)
+        self.revision += 1
+
     def list_tasks(self, all=False):
         """
         @param all: if True, also return the task that have been executed
@@ -0,0 +1,122 @@
+"""
+This module implements the catalog of the actions of a template.
+
+Listing the actions of a service or validating the arguments of an action
+requires to walk over the attributes of the template and inspect the signature of its methods.
+Since the actions of a template never change once the template is loaded,
+the catalog is computed once per template class and reused by all its services.
+"""
+
+import inspect
+import json
+import weakref
+
+# methods of TemplateBase that are not actions
+SKIP = ['load', 'save', 'schedule_action', 'recurring_action', 'validate', 'add_delete_callback']
+
+# template class -> Catalog
+_catalogs = weakref.WeakKeyDictionary()
+
+
+class ActionSpec:
+    """
+    description of an action and of its signature
+    """
+
+    def __init__(self, name, parameters=None, is_property=False):
+        """
+        @param name: name of the action
+        @param parameters: list of inspect.Parameter of the action, without self
+        @param is_property: True if the action is a property of the template
+        """
+        self.name = name
+        self.is_property = is_property
+        parameters = parameters or []
+        self.arguments = [p.name for p in parameters]
+        self.defaults = {p.name: p.default for p in parameters if p.default is not inspect.Parameter.empty}
+        self.required = [p.name for p in parameters
+                         if p.default is inspect.Parameter.empty and p.kind != p.VAR_KEYWORD]
+        self.var_keyword = any(p.kind == p.VAR_KEYWORD for p in parameters)
+
+    def check_args(self, args):
+        """
+        check that args match the signature of the action
+
+        @param args: dictionnary of the argument to pass to the action
+        @return: a message describing the error if args doesn't match the signature, None otherwise
+        """
+        for name in self.required:
+            if not args or name not in args:
+                return "parameter %s is mandatory but not passed to in args" % name
+
+        if args and not self.var_keyword:
+            diff = set(args.keys()).difference(self.arguments)
+            if diff:
+                return 'arguments "%s" are not present in the signature of the action' % ','.join(diff)
+
+        return None
+
+    def view(self):
+        return {'name': self.name, 'arguments': self.arguments}
+
+
+class Catalog:
+    """
+    catalog of the actions of a template class
+    """
+
+    def __init__(self, template):
+        self.actions = {}
+        for name in dir(template):
+            if name in SKIP or name.startswith('_'):
+                continue
+
+            static = inspect.getattr_static(template, name, None)
+            if isinstance(static, property):
+                # don't inspect the property, just detect it
+                self.actions[name] = ActionSpec(name, is_property=True)
+                continue
+
+            attr = getattr(template, name, None)
+            if not callable(attr):
+                continue
+            self.actions[name] = ActionSpec(name, _parameters(attr, static))
+
+        self.json = json.dumps([spec.view() for spec in self.actions.values()])
+
+    def get(self, name):
+        return self.actions.get(name)
+
+
+def get(template):
+    """
+    return the catalog of the actions of a template class,
+    the catalog is created the first time it is requested
+    """
+    catalog = _catalogs.get(template)
+    if catalog is None:
+        catalog = Catalog(template)
+        _catalogs[template] = catalog
+    return catalog
+
+
+def invalidate(template):
+    """
+    drop the catalog of a template class, it will be created again on next access
+    """
+    _catalogs.pop(template, None)
+
+
+def _parameters(attr, static):
+    try:
+        signature = inspect.signature(attr, follow_wrapped=True)
+    except (TypeError, ValueError):
+        return []
+
+    parameters = list(signature.parameters.values())
+    # the function is looked up on the class, so self is part of the signature
+    # unless it's a staticmethod or a classmethod
+    if inspect.isfunction(static) and parameters and \
+            parameters[0].kind in (inspect.Parameter.POSITIONAL_ONLY, inspect.Parameter.POSITIONAL_OR_KEYWORD):
+        parameters = parameters[1:]
+    return parameters
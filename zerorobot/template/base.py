@@ -19,11 +19,17 @@ from js9 import j
 from zerorobot import service_collection as scol
 from zerorobot import webhooks
 from zerorobot.dsl.ZeroRobotAPI import ZeroRobotAPI
+from zerorobot.events import (EVENT_SERVICE_DELETED, EVENT_STATE_DELETED,
+                              EVENT_STATE_SET, EVENT_TASK_CREATED,
+                              EVENT_TASK_ERRORED, EVENT_TASK_FINISHED,
+                              EVENT_TASK_STARTED, event_bus)
+from zerorobot.executor import executor
 from zerorobot.prometheus.robot import task_latency
 from zerorobot import config
 from zerorobot.task import (PRIORITY_NORMAL, PRIORITY_SYSTEM, TASK_STATE_ERROR,
                             Task, TaskList)
 from zerorobot.task.utils import wait_all
+from zerorobot.template import actions
 from zerorobot.template.data import ServiceData
 from zerorobot.template.state import ServiceState
 
@@ -123,6 +129,8 @@ class TemplateBase:
         self.guid = guid or str(uuid4())
         self.name = name or self.guid
         self._public = False
+        # identifier of the owner of the service, see service_collection.set_service_owner
+        self._owner = None
         # location on the filesystem where to store the service
         self._path = os.path.join(
             config.data_repo.path,
@@ -139,18 +147,70 @@ class TemplateBase:
         self.data = ServiceData(self)
         if data:
             self.data.update(data)
-        self.state = ServiceState()
+        self.state = ServiceState(on_change=self._state_changed)
         self.task_list = TaskList(self)
 
         self._delete_callback = []
 
         # start the greenlets of this service
         self.gl_mgr = GreenletsMgr()
-        self.gl_mgr.add('executor', gevent.Greenlet(self._run))
-        self.recurring_action('save', 10)
+        self._start()
 
         self.logger = _configure_logger(self.guid)
 
+        # time of the last action scheduled or executed by a user, see service_collection.hibernate_idle
+        self._last_activity = time.time()
+        # set once the service has been replaced by a stub in the service collection
+        self._hibernated = False
+
+    def _start(self):
+        """
+        start processing the task list and the greenlet saving the service
+        """
+        self._start_executor()
+        self.recurring_action('save', 10)
+
+    def _start_executor(self):
+        """
+        start processing the task list
+        the tasks are executed by the shared executor of the robot if it has workers,
+        by a greenlet dedicated to this service otherwise
+        """
+        self._paused = False
+        if executor.shared:
+            if not self.task_list.empty():
+                executor.notify(self)
+        else:
+            self.gl_mgr.add('executor', gevent.Greenlet(self._run))
+
+    def _stop_executor(self):
+        """
+        stop processing the task list
+        """
+        self._paused = True
+        self.gl_mgr.stop('executor')
+
+    def _release(self):
+        """
+        release the task storage and the logger of the service
+        called by service_collection.hibernate once the greenlets of the service are stopped
+
+        the data, state, task list, logger and api of this instance are dropped,
+        accessing them from a reference kept on this instance rehydrates the service and returns its attribute,
+        so the changes are made on the rehydrated service, see __getattr__
+        """
+        self._hibernated = True
+        self.task_list._done.close()
+        _release_logger(self.logger)
+        for name in _RELEASED_ATTRIBUTES:
+            del self.__dict__[name]
+
+    def __getattr__(self, name):
+        # only called for the attributes dropped by _release, or attributes that don't exist
+        if self.__dict__.get('_hibernated') and name in _RELEASED_ATTRIBUTES:
+            return getattr(scol.get_by_guid(self.guid), name)
+        raise AttributeError("'%s' object has no attribute '%s'" % (type(self).__name__, name))
+
     def validate(self):
         """
         This method is called on all services during robot statup
@@ -180,6 +240,7 @@ class TemplateBase:
             'name': self.name,
             'guid': self.guid,
             'public': self._public,
+            'owner': self._owner,
         })
         self.state.save(os.path.join(self._path, 'state.yaml'))
         self.data.save(os.path.join(self._path, 'data.yaml'))
@@ -198,15 +259,7 @@ class TemplateBase:
         while True:
             try:
                 task = self.task_list.get()
-                task.service = self
-                try:
-                    task.execute()
-                finally:
-                    task_latency.labels(action_name=task.action_name, template_uid=str(self.template_uid)).observe(task.duration)
-                    # notify the task list that this task is done
-                    self.task_list.done(task)
-                    if task.state == TASK_STATE_ERROR:
-                        self.logger.error("error executing action %s:\n%s" % (task.action_name, task.eco.traceback))
+                self._execute(task)
             except gevent.GreenletExit:
                 # TODO: gracefull shutdown
                 # make sure the task storage is close properly
@@ -215,6 +268,25 @@ class TemplateBase:
             except:
                 self.logger.exception("Uncaught exception in service task loop!")
 
+    def _execute(self, task):
+        """
+        execute a task extracted from the task list of this service
+        """
+        task.service = self
+        event_bus.publish(EVENT_TASK_STARTED, self, task_guid=task.guid, action_name=task.action_name)
+        try:
+            task.execute()
+        finally:
+            kind = EVENT_TASK_ERRORED if task.state == TASK_STATE_ERROR else EVENT_TASK_FINISHED
+            event_bus.publish(kind, self, task_guid=task.guid, action_name=task.action_name, state=task.state)
+            task_latency.labels(action_name=task.action_name, template_uid=str(self.template_uid)).observe(task.duration)
+            # notify the task list that this task is done
+            self.task_list.done(task)
+            if task._priority != PRIORITY_SYSTEM:
+                self._last_activity = time.time()
+            if task.state == TASK_STATE_ERROR:
+                self.logger.error("error executing action %s:\n%s" % (task.action_name, task.eco.traceback))
+
     def schedule_action(self, action, args=None):
         """
         Add an action to the task list of this service.
@@ -228,6 +300,34 @@ class TemplateBase:
         return self._schedule_action(action, args)
 
     def _schedule_action(self, action, args=None, priority=PRIORITY_NORMAL):
+        if self._hibernated:
+            # this instance has been hibernated, schedule on the rehydrated service
+            return scol.get_by_guid(self.guid)._schedule_action(action, args, priority)
+
+        method = self._check_action(action, args)
+        task = Task(method, args)
+        self.task_list.put(task, priority=priority)
+        if priority != PRIORITY_SYSTEM:
+            self._last_activity = time.time()
+        event_bus.publish(EVENT_TASK_CREATED, self, task_guid=task.guid, action_name=task.action_name)
+        return task
+
+    def _check_action(self, action, args=None):
+        """
+        make sure action exists and that args match its signature
+
+        @param action: name of the action
+        @param args: dictionnary of the argument to pass to the action
+        @return: the method implementing the action
+        """
+        spec = actions.get(type(self)).get(action)
+        if spec is not None and not spec.is_property and action not in self.__dict__:
+            # the signature of the action has already been inspected when the template was loaded
+            err = spec.check_args(args)
+            if err:
+                raise BadActionArgumentError(err)
+            return getattr(self, action)
+
         if not hasattr(self, action):
             raise ActionNotFoundError("service %s doesn't have action %s" % (self.name, action))
 
@@ -253,9 +353,7 @@ class TemplateBase:
             if diff and not kwargs_enable:
                 raise BadActionArgumentError('arguments "%s" are not present in the signature of the action' % ','.join(diff))
 
-        task = Task(method, args)
-        self.task_list.put(task, priority=priority)
-        return task
+        return method
 
     def recurring_action(self, action, period):
         """
@@ -306,6 +404,7 @@ class TemplateBase:
         wait_all(delete_tasks, timeout=30, die=False)
 
         # stop all recurring action and processing of task list
+        self._stop_executor()
         self.gl_mgr.stop_all(wait=True, timeout=5)
 
         # close ressources of logging handlers
@@ -324,6 +423,12 @@ class TemplateBase:
 
         # remove from memory
         scol.delete(self)
+        event_bus.publish(EVENT_SERVICE_DELETED, self)
+
+    def _state_changed(self, category, tag, state):
+        scol.changed()
+        kind = EVENT_STATE_SET if state is not None else EVENT_STATE_DELETED
+        event_bus.publish(kind, self, category=category, tag=tag, state=state)
 
     def update_data(self, data):
         """
@@ -416,3 +521,19 @@ def _configure_logger(guid):
         l.addHandler(h)
     l.setLevel(logging.DEBUG)
     return l
+
+
+# attributes of a hibernated instance that are forwarded to the rehydrated service
+_RELEASED_ATTRIBUTES = ('data', 'state', 'task_list', 'logger', 'api')
+
+
+def _release_logger(l):
+    """
+    close the file handler of a service logger and forget the logger
+    """
+    shared = j.logger.handlers._all
+    for h in list(l.handlers):
+        l.removeHandler(h)
+        if h not in shared and hasattr(h, 'close'):
+            h.close()
+    logging.Logger.manager.loggerDict.pop(l.name, None)
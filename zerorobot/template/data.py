@@ -36,11 +36,19 @@ class ServiceData(dict):
         if not isinstance(data, dict):
             raise ValueError('argument should be a dict not %s' % type(data))
 
-        if data == {}:
+        if not self.diff(data):
+            # nothing would change, don't bother the service with a task
             return
         # schedule the update of the data. This is required to serialize data access
         return self._service._schedule_action(action='update_data', args={'data': data}, priority=PRIORITY_SYSTEM)
 
+    def diff(self, data):
+        """
+        @param data: dict of data to be merge with current one
+        @return: dict containing only the parts of data that differ from the current data
+        """
+        return diff(self, data or {})
+
     def save(self, path):
         """
         Serialize the data into a file
@@ -56,3 +64,31 @@ class ServiceData(dict):
         @param path: file path from where to load the data
         """
         self.update(j.data.serializer.yaml.load(path))
+
+
+def diff(current, new):
+    """
+    structural diff of new against current
+
+    the keys missing from new are not considered as changes, since new is merged into current.
+    nested dicts are compared key by key, unless keys have been removed from them
+    in which case they are reported as a whole like any other value
+
+    @param current: dict of the current data
+    @param new: dict of the new data
+    @return: dict containing only the keys of new whose value differs from current
+    """
+    changes = {}
+    for key, value in new.items():
+        if key not in current:
+            changes[key] = value
+            continue
+
+        old = current[key]
+        if isinstance(value, dict) and isinstance(old, dict) and value.keys() >= old.keys():
+            nested = diff(old, value)
+            if nested:
+                changes[key] = nested
+        elif value != old:
+            changes[key] = value
+    return changes
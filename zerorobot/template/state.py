@@ -34,8 +34,13 @@ class ServiceState:
     This class represent the state of the service.
     """
 
-    def __init__(self):
+    def __init__(self, on_change=None):
+        """
+        @param on_change: optional callback called with (category, tag, state)
+                          every time a state changes. state is None when the state is deleted
+        """
         self.categories = {}
+        self._on_change = on_change
 
     def set(self, category, tag, state):
         """
@@ -47,7 +52,10 @@ class ServiceState:
         if category not in self.categories:
             self.categories[category] = {}
 
+        changed = self.categories[category].get(tag) != state
         self.categories[category][tag] = state
+        if changed and self._on_change:
+            self._on_change(category, tag, state)
 
     def get(self, category, tag=None):
         """
@@ -95,13 +103,18 @@ class ServiceState:
             return
 
         if tag is None:
-            del self.categories[category]
+            tags = self.categories.pop(category)
+            if self._on_change:
+                for tag in tags:
+                    self._on_change(category, tag, None)
             return
 
         if tag not in self.categories[category]:
             return
 
         del self.categories[category][tag]
+        if self._on_change:
+            self._on_change(category, tag, None)
 
     def save(self, path):
         """
@@ -3,30 +3,47 @@ this module is the only place where the templates will be kept in memory.
 other services and class need to use this module method to load/access the templates
 """
 
+import ast
+import hashlib
 import importlib.util
 import os
 import sys
-
-from gevent.pool import Pool
+import time
 
 from js9 import j
 from zerorobot import service_collection as scol
 from zerorobot import git
+from zerorobot.events import EVENT_SERVICE_CREATED, event_bus
 from zerorobot.service_collection import ServiceConflictError
+from zerorobot.template import actions
 from zerorobot.template_uid import TemplateUID
+from zerorobot.upgrades import upgrades
 
 logger = j.logger.get('zerorobot')
 
+# template uid -> template class, or TemplateStub if the module of the template is not imported yet
 _templates = {}
-
-
-def add_repo(url, branch=None, directory='templates'):
+# indexes of the uids of _templates, maintained by _add and _remove
+# name -> set of uids
+_by_name = {}
+# (host, account, repo, name) -> set of uids
+_by_repo = {}
+# incremented each time a template is loaded
+_revision = 0
+# (url, template directory) -> (fingerprint of the directory, template class or TemplateStub)
+_fingerprints = {}
+# total number of seconds spent importing the modules of the templates
+_import_time = 0.0
+
+
+def add_repo(url, branch=None, directory='templates', lazy=False):
     """
     url: url of a git repository e.g: http://github.com/jumpscale/zeroroot
     branch: the branch of the repository to checkout
     directory: the path to the directory where the templates are located in the repository
+    lazy: if True, the templates are only registered from their metadata and their module
+          is imported the first time the template class is needed
     """
-    new_templates = []
     dir_path = git.url.git_path(url)
 
     if not os.path.exists(dir_path):
@@ -40,11 +57,81 @@ def add_repo(url, branch=None, directory='templates'):
         if branch is not None and repo.branchName != branch:
             repo.switchBranch(branch)
 
+    return _load_repo(url, dir_path, directory, lazy).templates
+
+
+class ReloadReport:
+    """
+    templates of a repository loaded by _load_repo, sorted by what changed since the previous load
+    """
+
+    def __init__(self):
+        self.templates = []
+        self.added = []
+        self.updated = []
+        self.unchanged = []
+
+    @property
+    def changed(self):
+        return self.added + self.updated
+
+    def view(self):
+        return {k: [str(t.template_uid) for t in getattr(self, k)] for k in ['added', 'updated', 'unchanged']}
+
+
+def _load_repo(url, dir_path, directory='templates', lazy=False):
+    """
+    load the templates of a repository
+
+    only the templates whose files changed since they were last loaded are imported again.
+    if lazy is True, the templates are registered instead of imported, see _register_template
+
+    @return: ReloadReport
+    """
+    report = ReloadReport()
     for path in j.sal.fs.listDirsInDir(j.sal.fs.joinPaths(dir_path, directory)):
         if j.sal.fs.getBaseName(path) == '__pycache__':
             continue
-        new_templates.append(_load_template(url, path))
-    return new_templates
+
+        fingerprint = _fingerprint(path)
+        previous = _fingerprints.get((url, path))
+        if previous and previous[0] == fingerprint and _templates.get(previous[1].template_uid) is previous[1]:
+            report.templates.append(previous[1])
+            report.unchanged.append(previous[1])
+            continue
+
+        if lazy:
+            template = _register_template(url, path, fingerprint)
+        else:
+            template = _load_template(url, path, fingerprint)
+        report.templates.append(template)
+        if previous and previous[1].template_uid == template.template_uid:
+            report.updated.append(template)
+        else:
+            report.added.append(template)
+
+    logger.info("templates of %s: %d added, %d updated, %d unchanged",
+                url, len(report.added), len(report.updated), len(report.unchanged))
+    return report
+
+
+def _fingerprint(template_dir):
+    """
+    hash of all the files of a template directory: the template itself, its schema and its helper modules
+    """
+    h = hashlib.md5()
+    for root, dirs, files in os.walk(template_dir):
+        dirs[:] = sorted(d for d in dirs if d != '__pycache__')
+        for name in sorted(files):
+            if name.endswith('.pyc'):
+                continue
+            path = os.path.join(root, name)
+            h.update(os.path.relpath(path, template_dir).encode('utf8'))
+            h.update(b'\x00')
+            with open(path, 'rb') as f:
+                h.update(f.read())
+            h.update(b'\x00')
+    return h.hexdigest()
 
 
 def get(uid):
@@ -81,15 +168,25 @@ def get(uid):
 
     if uid not in _templates:
         raise TemplateNotFoundError("template with name %s not found" % str(uid))
-    return _templates[uid]
+    return _class(_templates[uid])
 
 
 def find(host=None, account=None, repo=None, name=None, version=None):
     """
     search for a template based on the part of the template UID
     """
+    if name and host and account and repo:
+        uids = _by_repo.get((host, account, repo, name), ())
+    elif name:
+        uids = _by_name.get(name, ())
+    else:
+        uids = list(_templates.keys())
+
     match = []
-    for uid, template in _templates.items():
+    for uid in uids:
+        template = _templates.get(uid)
+        if template is None:
+            continue
         if host and uid.host != host:
             continue
         if account and uid.account != account:
@@ -101,14 +198,156 @@ def find(host=None, account=None, repo=None, name=None, version=None):
         if version and uid.version != version:
             continue
         match.append(template)
-    return match
+    return [_class(template) for template in match]
+
+
+def list_templates(load=True):
+    """
+    @param load: if False, the templates not imported yet are returned as TemplateStub
+    """
+    templates = list(_templates.values())
+    if load:
+        templates = [_class(template) for template in templates]
+    return templates
+
+
+def stats():
+    """
+    @return: dict with the number of templates known, the number of templates imported
+             and the number of seconds spent importing them
+    """
+    return {
+        'templates': len(_templates),
+        'imported': sum(1 for t in _templates.values() if not isinstance(t, TemplateStub)),
+        'import_time': _import_time,
+    }
+
+
+def revision():
+    """
+    return the revision of the collection, it changes each time a template is loaded
+    """
+    return _revision
+
+
+class TemplateStub:
+    """
+    template registered from its metadata, its module is imported the first time the class is needed
+    """
+
+    def __init__(self, url, template_dir, template_uid, fingerprint):
+        self.url = url
+        self.template_dir = template_dir
+        self.template_uid = template_uid
+        self.fingerprint = fingerprint
+
+    def load(self):
+        """
+        import the module of the template and replace the stub by the template class in the collection
+        """
+        current = _templates.get(self.template_uid)
+        if current is not None and not isinstance(current, TemplateStub):
+            # already imported
+            return current
+
+        template = _load_template(self.url, self.template_dir, self.fingerprint)
+        if template.template_uid != self.template_uid and _templates.get(self.template_uid) is self:
+            # the metadata didn't match the content of the module
+            _remove(self.template_uid)
+        return template
+
+    def __repr__(self):
+        return "TemplateStub(%s)" % self.template_uid
 
 
-def list_templates():
-    return list(_templates.values())
+def _class(template):
+    """
+    return the class of template, importing its module if it's a TemplateStub
+    """
+    if isinstance(template, TemplateStub):
+        return template.load()
+    return template
+
+
+def _names(template_dir):
+    """
+    @return: tuple (name of the template, name of its class, path of its module)
+    """
+    template_name = os.path.basename(template_dir).split('.')[0]
+    class_name = template_name.replace('_', ' ').title().replace(' ', '')
+    class_path = os.path.join(template_dir, template_name + '.py')
+    return template_name, class_name, class_path
+
+
+def _register_template(url, template_dir, fingerprint=None):
+    """
+    register a template without importing its module
 
+    the version of the template is read from the source of its class, if it can't be found
+    statically the template is imported right away with _load_template
 
-def _load_template(url, template_dir):
+    @return: the TemplateStub, or the template class if it had to be imported
+    """
+    global _revision
+    template_name, class_name, class_path = _names(template_dir)
+    version = _read_version(class_path, class_name)
+    if version is None:
+        return _load_template(url, template_dir, fingerprint)
+
+    _, host, account, repo = git.url.parse(url)
+    uid = TemplateUID.parse("%s/%s/%s/%s/%s" % (host, account, repo, template_name, version))
+    stub = TemplateStub(url, template_dir, uid, fingerprint or _fingerprint(template_dir))
+
+    previous = _templates.get(uid)
+    if previous is not None and not isinstance(previous, TemplateStub):
+        actions.invalidate(previous)
+    _add(uid, stub)
+    _fingerprints[(url, template_dir)] = (stub.fingerprint, stub)
+    _revision += 1
+    logger.debug("register template %s to collection" % uid)
+    return stub
+
+
+def _read_version(class_path, class_name):
+    """
+    read the version of a template from the source of its class, without executing it
+
+    @return: the version or None if it's not set as a plain string in the class body
+    """
+    try:
+        with open(class_path) as f:
+            tree = ast.parse(f.read(), class_path)
+    except (OSError, SyntaxError, ValueError):
+        return None
+
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef) or node.name != class_name:
+            continue
+        for stmt in node.body:
+            if not isinstance(stmt, ast.Assign) or \
+                    not any(isinstance(t, ast.Name) and t.id == 'version' for t in stmt.targets):
+                continue
+            try:
+                version = ast.literal_eval(stmt.value)
+            except ValueError:
+                return None
+            return version if isinstance(version, str) else None
+    return None
+
+
+def _add(uid, template):
+    _templates[uid] = template
+    _by_name.setdefault(uid.name, set()).add(uid)
+    _by_repo.setdefault((uid.host, uid.account, uid.repo, uid.name), set()).add(uid)
+
+
+def _remove(uid):
+    _templates.pop(uid, None)
+    _by_name.get(uid.name, set()).discard(uid)
+    _by_repo.get((uid.host, uid.account, uid.repo, uid.name), set()).discard(uid)
+
+
+def _load_template(url, template_dir, fingerprint=None):
     """
     load a template in memory from a file
     The file must contain a class that inherits from template.TemplateBase
@@ -118,14 +357,17 @@ def _load_template(url, template_dir):
         node.py -> Node
         vm_manager.py -> VmManager
         a_long_name.py -> ALongName
+
+    fingerprint is the hash of the template directory, computed if not specified
     """
-    template_name = os.path.basename(template_dir).split('.')[0]
-    class_name = template_name.replace('_', ' ').title().replace(' ', '')
-    class_path = os.path.join(template_dir, template_name + '.py')
+    global _revision, _import_time
+    template_name, class_name, class_path = _names(template_dir)
 
+    started = time.time()
     spec = importlib.util.spec_from_file_location(template_name, class_path)
     module = importlib.util.module_from_spec(spec)
     spec.loader.exec_module(module)
+    _import_time += time.time() - started
 
     class_ = getattr(module, class_name)
 
@@ -136,7 +378,15 @@ def _load_template(url, template_dir):
     sys.modules[str(class_.template_uid)] = module
 
     class_.template_dir = template_dir
-    _templates[class_.template_uid] = class_
+    # inspect the actions once, they are shared by all the services of the template
+    actions.get(class_)
+    previous = _templates.get(class_.template_uid)
+    if previous is not None and not isinstance(previous, TemplateStub):
+        # the actions can have changed with the new version of the template
+        actions.invalidate(previous)
+    _add(class_.template_uid, class_)
+    _fingerprints[(url, template_dir)] = (fingerprint or _fingerprint(template_dir), class_)
+    _revision += 1
     logger.debug("add template %s to collection" % class_.template_uid)
     return _templates[class_.template_uid]
 
@@ -145,7 +395,7 @@ def instantiate_service(template, name=None, data=None):
     if isinstance(template, str):
         template = get(template)
 
-    existing = scol.find(template_uid=str(template.template_uid), name=name)
+    existing = scol.find(wake=False, template_uid=str(template.template_uid), name=name)
     if name and len(existing) > 0:
         raise ServiceConflictError(
             message="a service with name=%s already exist" % name,
@@ -156,10 +406,21 @@ def instantiate_service(template, name=None, data=None):
     service.save()
 
     scol.add(service)
+    event_bus.publish(EVENT_SERVICE_CREATED, service)
     return service
 
 
 def checkout_repo(url, revision='master'):
+    """
+    checkout revision of the template repository url then upgrade the services
+    of the templates whose files changed
+
+    the services are upgraded in the background, if the upgrade is halted
+    the previous version of the templates updated in place is registered again,
+    so the services not upgraded keep using it when they are loaded again
+
+    @return: the zerorobot.upgrades.Upgrade of the services, use zerorobot.upgrades.upgrades.get to follow its progress
+    """
     logger.info("checkout %s for repo %s", revision, url)
     dir_path = git.url.git_path(url)
 
@@ -174,19 +435,52 @@ def checkout_repo(url, revision='master'):
     if t == 'branch':
         repo.pull()
 
-    # load the new templates
-    logger.info("reload templates")
-    updated_templates = add_repo(url)
+    # keep the templates loaded before the checkout, to restore them if the upgrade is halted
+    previous = {uid: (template, sys.modules.get(str(uid))) for uid, template in _templates.items()}
 
-    # pool of greenlet used to upgrade service concurrently
-    pool = Pool(25)
-    for template in updated_templates:
-        for service in scol.find(template_host=template.template_uid.host,
+    # load the templates that changed
+    logger.info("reload templates")
+    report = _load_repo(url, dir_path)
+
+    # upgrade the services in batches, see zerorobot.upgrades
+    plan = []
+    for template in report.changed:
+        # the hibernated services are rehydrated when their batch is upgraded
+        for service in scol.find(wake=False,
+                                 template_host=template.template_uid.host,
                                  template_account=template.template_uid.account,
                                  template_repo=template.template_uid.repo,
                                  template_name=template.template_uid.name):
-            pool.spawn(scol.upgrade, service, template, True)
-    pool.join(raise_error=True)
+            plan.append((service, template))
+    upgrade = upgrades.plan(plan, url, revision, report.view())
+
+    def on_halt(upgrade):
+        _restore_templates(report.updated, previous)
+
+    return upgrades.start(upgrade, on_halt=on_halt)
+
+
+def _restore_templates(templates, previous):
+    """
+    register again the previous version of templates that have been updated without changing their version
+
+    @param templates: the templates to restore
+    @param previous: dict template uid -> (template, module) of the templates before they were updated
+    """
+    global _revision
+    for template in templates:
+        uid = template.template_uid
+        prev, module = previous.get(uid, (None, None))
+        if prev is None or isinstance(prev, TemplateStub) or _templates.get(uid) is not template:
+            # nothing to restore, or the template has been loaded again since
+            continue
+
+        actions.invalidate(template)
+        _add(uid, prev)
+        if module is not None:
+            sys.modules[str(uid)] = module
+        _revision += 1
+        logger.info("restore previous version of template %s", uid)
 
 
 class TemplateNameError(Exception):
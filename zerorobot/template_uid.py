@@ -4,15 +4,39 @@ import re
 _version_regex = re.compile("(\d+).(\d+).(\d+)")
 _name_regex = re.compile("^\w+$")
 
+# the same uids are parsed over and over (services loading, blueprints, searches)
+# so the results of parse are kept and shared.
+# uid string -> TemplateUID
+_parsed = {}
+# tuple of the uid -> TemplateUID, so equal uids parsed from different strings are the same object
+_interned = {}
+# the caches are cleared when they reach this size, to bound the memory used by invalid or rare uids
+_CACHE_SIZE = 10000
+
 
 class TemplateUID:
+    """
+    unique identifier of a template
+
+    TemplateUID objects are immutable, so they can be shared, see parse.
+    their tuple, hash and version are computed once
+    """
+
+    __slots__ = ('host', 'account', 'repo', 'name', 'version', '_tuple', '_hash', '_version')
 
     def __init__(self, host, account, repo, name, version):
-        self.host = host
-        self.account = account
-        self.repo = repo
-        self.name = name
-        self.version = version
+        for k, v in [('host', host), ('account', account), ('repo', repo), ('name', name), ('version', version)]:
+            object.__setattr__(self, k, v)
+        t = tuple(x for x in [host, account, repo, name, version] if x)
+        object.__setattr__(self, '_tuple', t)
+        object.__setattr__(self, '_hash', hash(t))
+        object.__setattr__(self, '_version', _version_tuple(version))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("TemplateUID is immutable")
+
+    def __reduce__(self):
+        return (self.__class__, (self.host, self.account, self.repo, self.name, self.version))
 
     @classmethod
     def parse(cls, uid):
@@ -35,7 +59,26 @@ class TemplateUID:
         parse supports forms:
         complete uid: github.com/account/repository/name/version
         without version: github.com/account/repository/name
+
+        the TemplateUID returned is shared by all the callers parsing the same uid, it must not be modified
         """
+        parsed = _parsed.get(uid)
+        if parsed is not None:
+            return parsed
+
+        parsed = cls._parse(uid)
+        key = parsed.tuple()
+        parsed = _interned.setdefault(key, parsed)
+        if len(_parsed) >= _CACHE_SIZE:
+            _parsed.clear()
+        if len(_interned) >= _CACHE_SIZE:
+            _interned.clear()
+            _interned[key] = parsed
+        _parsed[uid] = parsed
+        return parsed
+
+    @classmethod
+    def _parse(cls, uid):
         host, account, repo, name, version = None, None, None, None, None
 
         parsed = urlparse(uid)
@@ -59,33 +102,35 @@ class TemplateUID:
         return cls(host, account, repo, name, version)
 
     def tuple(self):
-        l = [self.host, self.account, self.repo, self.name, self.version]
-        return tuple(x for x in l if x)
+        return self._tuple
 
     def __repr__(self):
-        return '/'.join(self.tuple())
+        return '/'.join(self._tuple)
 
     def __str__(self):
         return repr(self)
 
     def __comp(self, other):
-        if self.tuple()[:-1] != other.tuple()[:-1]:
+        if (self.host, self.account, self.repo, self.name) != (other.host, other.account, other.repo, other.name):
             raise ValueError("other is not the same template, can't compare version")
-        if self.version < other.version:
+        if self._version < other._version:
             return -1
-        elif self.version > other.version:
+        elif self._version > other._version:
             return 1
         else:
             return 0
 
     def __eq__(self, other):
+        if other is self:
+            return True
+
         if isinstance(other, str):
             other = TemplateUID.parse(other)
 
         if not isinstance(other, TemplateUID):
             raise ValueError("other is not an instance of TemplateUID")
 
-        return self.tuple() == other.tuple()
+        return self._hash == other._hash and self._tuple == other._tuple
 
     def __lt__(self, other):
         return self.__comp(other) == -1
@@ -100,4 +145,23 @@ class TemplateUID:
         return self.__comp(other) in [0, 1]
 
     def __hash__(self):
-        return hash(self.tuple())
+        return self._hash
+
+
+def _version_tuple(version):
+    """
+    return a tuple that orders the versions numerically: 0.0.10 is greater than 0.0.9
+
+    a pre-release (1.0.0-rc1) is lower than its release (1.0.0),
+    a version that doesn't start with numbers is lower than all the numeric versions
+    and no version is lower than any version.
+    the version string itself is the last element of the tuple,
+    so two different versions never compare equal
+    """
+    if not version:
+        return ()
+    m = _version_regex.match(version)
+    if not m:
+        return ((), version)
+    release = 0 if version[m.end():].startswith('-') else 1
+    return (tuple(int(x) for x in m.groups()), release, version)
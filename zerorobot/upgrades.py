@@ -0,0 +1,311 @@
+"""
+This module implements the rolling upgrade of the services when the templates they use change.
+
+Instead of upgrading all the services at once, the services are upgraded in batches:
+a small canary batch first, then batches of batch_size services.
+Within a batch, at most concurrency services are upgraded at the same time.
+
+Once upgraded, each service is checked by calling its validate method.
+The upgrade is halted if a service of the canary batch fails or if the error rate
+goes above max_error_rate, the services not upgraded yet keep running the previous version of their template.
+
+Upgrades are started with UpgradeManager.start and run in the background,
+their progress is followed with UpgradeManager.get.
+"""
+
+import time
+from collections import OrderedDict
+from uuid import uuid4
+
+import gevent
+from gevent.lock import Semaphore
+from gevent.pool import Pool
+
+from js9 import j
+from zerorobot import service_collection as scol
+from zerorobot.prometheus.robot import (template_upgrade_batch_duration,
+                                        template_upgrade_pending,
+                                        template_upgrade_services,
+                                        template_upgrades_halted)
+
+logger = j.logger.get('zerorobot')
+
+UPGRADE_STATE_PENDING = 'pending'
+UPGRADE_STATE_RUNNING = 'running'
+UPGRADE_STATE_OK = 'ok'
+UPGRADE_STATE_HALTED = 'halted'
+
+# maximum number of errors reported per batch
+MAX_BATCH_ERRORS = 20
+
+
+class UpgradeBatch:
+    """
+    UpgradeBatch tracks the upgrade of a group of services
+    """
+
+    def __init__(self, plan, canary=False):
+        """
+        @param plan: list of tuple (service, new template)
+        @param canary: True if this is the canary batch
+        """
+        self.plan = plan
+        self.canary = canary
+        self.upgraded = 0
+        self.failed = 0
+        self.errors = []
+        self.started = None
+        self.finished = None
+
+    @property
+    def duration(self):
+        if self.started is None:
+            return None
+        return (self.finished or time.time()) - self.started
+
+    def view(self):
+        out = {
+            'canary': self.canary,
+            'size': len(self.plan),
+            'upgraded': self.upgraded,
+            'failed': self.failed,
+            'errors': self.errors,
+        }
+        if self.started is not None:
+            out['started'] = int(self.started)
+            out['duration'] = self.duration
+        if self.finished is not None:
+            out['finished'] = int(self.finished)
+        return out
+
+
+class Upgrade:
+    """
+    Upgrade tracks the rolling upgrade of the services after a change of templates
+    """
+
+    def __init__(self, batches, url=None, revision=None, templates=None):
+        """
+        @param batches: list of UpgradeBatch
+        @param url: url of the template repository that changed
+        @param revision: revision of the template repository checked out
+        @param templates: uids of the templates added, updated and unchanged by the checkout
+        """
+        self.id = str(uuid4())
+        self.url = url
+        self.revision = revision
+        self.templates = templates
+        self.state = UPGRADE_STATE_PENDING
+        self.created = int(time.time())
+        self.finished = None
+        self.batches = batches
+        self.error = None
+
+    @property
+    def total(self):
+        return sum(len(batch.plan) for batch in self.batches)
+
+    @property
+    def upgraded(self):
+        return sum(batch.upgraded for batch in self.batches)
+
+    @property
+    def failed(self):
+        return sum(batch.failed for batch in self.batches)
+
+    @property
+    def is_done(self):
+        return self.state in (UPGRADE_STATE_OK, UPGRADE_STATE_HALTED)
+
+    def halt(self, reason):
+        self.state = UPGRADE_STATE_HALTED
+        self.error = reason
+
+    def view(self):
+        out = {
+            'id': self.id,
+            'state': self.state,
+            'created': self.created,
+            'total': self.total,
+            'upgraded': self.upgraded,
+            'failed': self.failed,
+            'batches': [batch.view() for batch in self.batches],
+        }
+        for k in ['url', 'revision', 'templates', 'finished', 'error']:
+            if getattr(self, k) is not None:
+                out[k] = getattr(self, k)
+        return out
+
+
+class UpgradeManager:
+    """
+    UpgradeManager runs the rolling upgrades, one at a time
+    """
+
+    def __init__(self, concurrency=25, canary_size=1, batch_size=100, max_error_rate=0.1, size=100):
+        """
+        @param concurrency: maximum number of services upgraded at the same time
+        @param canary_size: number of services of the first batch, the upgrade is halted if any of them fails
+        @param batch_size: number of services of the following batches
+        @param max_error_rate: the upgrade is halted once the ratio of failed services goes above this value
+        @param size: maximum number of upgrades kept in memory
+        """
+        self.configure(concurrency, canary_size, batch_size, max_error_rate)
+        self.size = size
+        self._lock = Semaphore()
+        self._upgrades = OrderedDict()
+
+    def configure(self, concurrency=25, canary_size=1, batch_size=100, max_error_rate=0.1):
+        if concurrency < 1 or batch_size < 1:
+            raise ValueError("concurrency and batch_size must be at least 1")
+        if not 0 <= max_error_rate <= 1:
+            raise ValueError("max_error_rate must be between 0 and 1")
+        self.concurrency = concurrency
+        self.canary_size = max(canary_size, 0)
+        self.batch_size = batch_size
+        self.max_error_rate = max_error_rate
+
+    def plan(self, plan, url=None, revision=None, templates=None):
+        """
+        split plan into batches and register the upgrade
+
+        @param plan: list of tuple (service, new template)
+        @param url, revision, templates: description of the change of templates, see Upgrade
+        @return: the Upgrade, pass it to run to execute it
+        """
+        batches = []
+        if self.canary_size and plan:
+            batches.append(UpgradeBatch(plan[:self.canary_size], canary=True))
+            plan = plan[self.canary_size:]
+        for i in range(0, len(plan), self.batch_size):
+            batches.append(UpgradeBatch(plan[i:i + self.batch_size]))
+
+        upgrade = Upgrade(batches, url, revision, templates)
+        self._upgrades[upgrade.id] = upgrade
+        self._evict()
+        return upgrade
+
+    def start(self, upgrade, on_halt=None):
+        """
+        run the upgrade in the background, see run
+
+        @return: the upgrade
+        """
+        gevent.spawn(self._run_background, upgrade, on_halt)
+        return upgrade
+
+    def run(self, upgrade, on_halt=None):
+        """
+        upgrade the services batch after batch, until all are upgraded or the upgrade is halted
+        this method blocks until the upgrade is done
+
+        @param on_halt: if set, function called with the upgrade when it is halted
+        """
+        with self._lock:
+            upgrade.state = UPGRADE_STATE_RUNNING
+            pending = upgrade.total
+            template_upgrade_pending.inc(pending)
+            try:
+                for batch in upgrade.batches:
+                    self._run_batch(batch)
+                    pending -= len(batch.plan)
+                    template_upgrade_pending.dec(len(batch.plan))
+
+                    reason = self._halt_reason(upgrade, batch)
+                    if reason:
+                        logger.error("upgrade %s halted: %s", upgrade.id, reason)
+                        upgrade.halt(reason)
+                        template_upgrades_halted.inc()
+                        if on_halt is not None:
+                            try:
+                                on_halt(upgrade)
+                            except Exception:
+                                logger.exception("error handling the halt of upgrade %s", upgrade.id)
+                        break
+                else:
+                    upgrade.state = UPGRADE_STATE_OK
+            finally:
+                template_upgrade_pending.dec(pending)
+                upgrade.finished = int(time.time())
+        return upgrade
+
+    def get(self, id):
+        """
+        @raise KeyError: if the upgrade doesn't exist
+        """
+        return self._upgrades[id]
+
+    def _run_background(self, upgrade, on_halt):
+        try:
+            self.run(upgrade, on_halt)
+        except Exception as err:
+            logger.exception("error running upgrade %s", upgrade.id)
+            upgrade.halt("error running the upgrade: %s" % str(err))
+
+    def list(self):
+        return list(self._upgrades.values())
+
+    def _run_batch(self, batch):
+        batch.started = time.time()
+
+        def upgrade_one(service, template):
+            if scol._guid_index.get(service.guid) is None:
+                # the service has been deleted since the upgrade was planned
+                logger.info("service %s (%s) deleted, skip its upgrade", service.name, service.guid)
+                return
+            err = _upgrade_service(service, template)
+            if err is None:
+                batch.upgraded += 1
+                template_upgrade_services.labels('ok').inc()
+                return
+            batch.failed += 1
+            template_upgrade_services.labels('error').inc()
+            if len(batch.errors) < MAX_BATCH_ERRORS:
+                batch.errors.append({'guid': service.guid, 'message': err})
+
+        pool = Pool(self.concurrency)
+        for service, template in batch.plan:
+            pool.spawn(upgrade_one, service, template)
+        pool.join()
+
+        batch.finished = time.time()
+        template_upgrade_batch_duration.observe(batch.duration)
+
+    def _halt_reason(self, upgrade, batch):
+        if batch.canary and batch.failed:
+            return "%d service(s) of the canary batch failed to upgrade" % batch.failed
+        done = upgrade.upgraded + upgrade.failed
+        if done and upgrade.failed / done > self.max_error_rate:
+            return "error rate %.2f is above the maximum of %.2f" % (upgrade.failed / done, self.max_error_rate)
+        return None
+
+    def _evict(self):
+        for id in list(self._upgrades.keys()):
+            if len(self._upgrades) <= self.size:
+                return
+            if self._upgrades[id].is_done:
+                del self._upgrades[id]
+
+
+def _upgrade_service(service, template):
+    """
+    upgrade service to template then check it is healthy
+
+    @return: a message describing the error, None if the service upgraded successfully
+    """
+    try:
+        service = scol.upgrade(service, template, True)
+    except Exception as err:
+        logger.exception("error upgrading service %s (%s)", service.name, service.guid)
+        return "upgrade failed: %s" % str(err)
+
+    try:
+        service.validate()
+    except Exception as err:
+        logger.error("service %s (%s) unhealthy after upgrade: %s", service.name, service.guid, str(err))
+        return "validation failed: %s" % str(err)
+    return None
+
+
+# upgrades of the robot
+upgrades = UpgradeManager()
@@ -1,7 +1,20 @@
+"""
+This module holds the configuration of the web hooks and the dispatcher
+that delivers the payloads to them.
+"""
+
 import os
+import time
 from enum import Enum
 
+import gevent
+import requests
+from gevent.queue import Empty, Full, Queue
+
 from js9 import j
+from zerorobot.prometheus.robot import webhook_delivered, webhook_dropped
+
+logger = j.logger.get('zerorobot')
 
 
 class Kind(Enum):
@@ -10,7 +23,7 @@ class Kind(Enum):
 
 class WebHook:
 
-    def __init__(self, url, kind):
+    def __init__(self, url, kind, batch=False):
         if isinstance(kind, str):
             kind = Kind(kind)
 
@@ -20,6 +33,7 @@ class WebHook:
         self._id = j.data.hash.md5_string(url)
         self._url = url
         self._kind = kind
+        self._batch = bool(batch)
 
     @property
     def id(self):
@@ -33,8 +47,16 @@ class WebHook:
     def kind(self):
         return self._kind
 
+    @property
+    def batch(self):
+        """
+        if True, the payloads are sent grouped in a JSON list
+        otherwise each payload is sent in its own request
+        """
+        return self._batch
+
     def as_dict(self):
-        return {'id': self.id, 'url': self.url, 'kind': self.kind.value}
+        return {'id': self.id, 'url': self.url, 'kind': self.kind.value, 'batch': self.batch}
 
 
 class Storage:
@@ -47,8 +69,8 @@ class Storage:
         if not os.path.exists(self._path):
             j.data.serializer.yaml.dump(self._path, [])
 
-    def add(self, url, type):
-        webhook = WebHook(url, type)
+    def add(self, url, type, batch=False):
+        webhook = WebHook(url, type, batch)
         self.webhooks[webhook.id] = webhook
         self.save()
         return webhook
@@ -77,5 +99,191 @@ class Storage:
         self.webhooks = {}
         data = j.data.serializer.yaml.load(self._path) or []
         for item in data:
-            wb = WebHook(item['url'], Kind(item['kind']))
+            wb = WebHook(item['url'], Kind(item['kind']), item.get('batch', False))
             self.webhooks[wb.id] = wb
+
+
+class Dispatcher:
+    """
+    Dispatcher delivers payloads to the configured web hooks.
+
+    Payloads are pushed into a bounded queue, then grouped per time window and sent
+    to every web hook of the corresponding kind. Each payload is sent in its own request,
+    unless the web hook opted in for batching, in which case the payloads of the window
+    are sent as a JSON list.
+    Each web hook URL has its own pooled HTTP session and its own bounded outbox consumed
+    by its own workers, so a slow web hook doesn't delay the delivery to the others.
+    Requests have a timeout, deliveries failing with a connection error or a 5xx status are
+    retried with an exponential backoff, the ones rejected with a 4xx status are not retried.
+    When a queue is full or a delivery fails, the payloads are dropped
+    and counted in the robot_webhook_dropped prometheus metric.
+    """
+
+    def __init__(self, storage, queue_size=1000, batch_interval=1, batch_size=100,
+                 concurrency=10, outbox_size=100, timeout=10, retries=3, backoff=1):
+        """
+        @param storage: Storage object that holds the configured web hooks
+        @param queue_size: maximum number of payloads waiting to be sent
+        @param batch_interval: number of seconds during which payloads are grouped into one request
+        @param batch_size: maximum number of payloads sent in one request
+        @param concurrency: maximum number of requests in flight per web hook URL
+        @param outbox_size: maximum number of deliveries waiting per web hook URL
+        @param timeout: timeout in seconds of a request
+        @param retries: number of retries of a failed request
+        @param backoff: delay in seconds before the first retry, doubled at each retry
+        """
+        self._storage = storage
+        self._queue = Queue(maxsize=queue_size)
+        self._sessions = {}
+        # url -> (queue of the deliveries waiting, workers sending them)
+        self._outboxes = {}
+        self.concurrency = concurrency
+        self.outbox_size = outbox_size
+        self._gl = None
+        self.batch_interval = batch_interval
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+
+    @property
+    def is_running(self):
+        return self._gl is not None and not self._gl.dead
+
+    def start(self):
+        if self.is_running:
+            return
+        self._gl = gevent.spawn(self._run)
+
+    def stop(self):
+        if self._gl is not None:
+            self._gl.kill(block=False)
+            self._gl = None
+        for _, workers in self._outboxes.values():
+            gevent.killall(workers, block=False)
+        self._outboxes = {}
+        for session in self._sessions.values():
+            session.close()
+        self._sessions = {}
+
+    def send(self, kind, payload):
+        """
+        queue a payload to be sent to all the web hooks of type kind
+        this method never blocks
+
+        @return: True if the payload has been queued, False if it has been dropped
+        """
+        if isinstance(kind, str):
+            kind = Kind(kind)
+
+        try:
+            self._queue.put_nowait((kind, payload))
+        except Full:
+            logger.warning("web hook queue is full, drop %s payload" % kind.value)
+            webhook_dropped.labels(kind=kind.value, reason='overloaded').inc()
+            return False
+        return True
+
+    def _run(self):
+        while True:
+            try:
+                batch = self._next_batch()
+
+                payloads = {}
+                for kind, payload in batch:
+                    payloads.setdefault(kind, []).append(payload)
+
+                for kind, items in payloads.items():
+                    for wh in self._storage.list(kind=kind):
+                        if wh.batch:
+                            self._post(wh, items)
+                        else:
+                            for item in items:
+                                self._post(wh, [item])
+            except gevent.GreenletExit:
+                return
+            except:
+                logger.exception("error dispatching web hooks")
+
+    def _next_batch(self):
+        """
+        block until a payload is available then collect all the payloads
+        that arrive within batch_interval, up to batch_size payloads
+        """
+        batch = [self._queue.get()]
+        deadline = time.time() + self.batch_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except Empty:
+                break
+        return batch
+
+    def _post(self, webhook, payloads):
+        """
+        queue the delivery of payloads in the outbox of the web hook, never blocks
+        """
+        if webhook.url not in self._outboxes:
+            outbox = Queue(maxsize=self.outbox_size)
+            workers = [gevent.spawn(self._work, outbox) for _ in range(self.concurrency)]
+            self._outboxes[webhook.url] = (outbox, workers)
+        outbox, _ = self._outboxes[webhook.url]
+
+        try:
+            outbox.put_nowait((webhook, payloads))
+        except Full:
+            logger.warning("too many deliveries waiting for web hook %s, drop %d payloads" % (webhook.url, len(payloads)))
+            webhook_dropped.labels(kind=webhook.kind.value, reason='overloaded').inc(len(payloads))
+
+    def _work(self, outbox):
+        while True:
+            try:
+                webhook, payloads = outbox.get()
+                self._deliver(webhook, payloads)
+            except gevent.GreenletExit:
+                return
+            except:
+                logger.exception("error delivering web hook")
+
+    def _session(self, url):
+        if url not in self._sessions:
+            self._sessions[url] = requests.Session()
+        return self._sessions[url]
+
+    def _deliver(self, webhook, payloads):
+        """
+        post payloads to webhook, as a list if the web hook batches them, as a single object otherwise
+        """
+        body = payloads if webhook.batch else payloads[0]
+        delay = self.backoff
+        for attempt in range(self.retries + 1):
+            try:
+                resp = self._session(webhook.url).post(webhook.url, json=body, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as err:
+                error = str(err)
+            except requests.RequestException as err:
+                logger.error("fail to send web hook to %s: %s" % (webhook.url, str(err)))
+                webhook_dropped.labels(kind=webhook.kind.value, reason='rejected').inc(len(payloads))
+                return False
+            else:
+                if resp.status_code < 400:
+                    logger.debug("%d payloads sent to web hook %s" % (len(payloads), webhook.url))
+                    webhook_delivered.labels(kind=webhook.kind.value).inc(len(payloads))
+                    return True
+                if resp.status_code < 500:
+                    # the web hook refuses the payloads, sending them again won't help
+                    logger.error("web hook %s rejected the payloads with status %d" % (webhook.url, resp.status_code))
+                    webhook_dropped.labels(kind=webhook.kind.value, reason='rejected').inc(len(payloads))
+                    return False
+                error = "status %d" % resp.status_code
+
+            logger.warning("fail to send web hook to %s (attempt %d): %s" % (webhook.url, attempt + 1, error))
+            if attempt < self.retries:
+                gevent.sleep(delay)
+                delay *= 2
+
+        webhook_dropped.labels(kind=webhook.kind.value, reason='delivery_failed').inc(len(payloads))
+        return False